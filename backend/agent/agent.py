@@ -1,38 +1,65 @@
 """Census Data Agent using LangChain."""
 
 from langchain_community.agent_toolkits.sql.base import create_sql_agent
-from langchain.agents.agent import AgentExecutor, AgentAction
+from langchain.agents import create_react_agent
+from langchain.agents.agent import AgentExecutor, AgentAction, RunnableAgent
 from langchain.agents.agent_types import AgentType
-from langchain_core.callbacks.stdout import StdOutCallbackHandler
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import SystemMessage
+from langchain_core.prompts import ChatPromptTemplate
 from langchain_anthropic import ChatAnthropic
-from langchain_community.utilities import SQLDatabase
 from langchain_community.agent_toolkits import SQLDatabaseToolkit
-from typing import Dict, Any, List, Tuple
+from langchain_community.tools.sql_database.tool import InfoSQLDatabaseTool, ListSQLDatabaseTool
+from contextvars import ContextVar
+from typing import Dict, Any, Callable, List, Tuple, AsyncIterator, Optional, Union
+import asyncio
 import logging
 import json
+import time
 from datetime import datetime, date
 
 from config import settings
+from metrics import QUESTIONS, QUESTION_SECONDS, record_agent_iterations, timed, track_request
+from tracing import TraceRecorder, record_event, start_trace
 from database.manager import db_manager
-from agent.prompts import (
-    SQL_PREFIX,
-    CHART_TYPE_DECISION_PROMPT, 
-    BAR_CHART_DATA_PROMPT, 
-    SCATTER_CHART_DATA_PROMPT,
-    RADAR_CHART_DATA_PROMPT
-)
+from database.catalog import SchemaSelection
+from database.sql_database import ManagedSQLDatabase
+from agent.charts import build_chart_data, build_query_result, query_result_from_steps
+from agent.result_context import build_query_context, estimate_tokens
+from agent.cache import AnswerCache
+from agent.fast_path import FastPath
+from agent.instrumentation import MetricsCallbackHandler, TraceCallbackHandler
+from agent.schema_index import SchemaIndex
+from agent.similarity import normalize_text
+from agent.single_flight import SingleFlight
+from agent.templates import TemplateLibrary
+from agent.prompts import SQL_PREFIX, SCHEMA_PROMPT, TABLE_OVERVIEW_PROMPT, RELEVANT_SCHEMA_PROMPT, REACT_INSTRUCTIONS, CHART_DATA_PROMPT
 from api.models import (
     ChartData, 
     AgentResponse, 
-    ChartTypeDecision, 
+    ChartSpec,
     BarChartData, 
     ScatterChartData, 
     RadarChartData,
-    ChartType
+    AnswerPath,
+    TimingBreakdown,
+    StreamEvent,
+    StreamEventType,
+    ToolCallEvent,
+    ToolResultEvent,
+    TokenEvent
 )
 
 logger = logging.getLogger(__name__)
 
+SQL_TOP_K = 20
+
+# Receives the progress events of the agent run answering the current request, when it is streamed
+_stream_sink: ContextVar[Optional[Callable[[StreamEvent], None]]] = ContextVar("stream_sink", default=None)
+
+# Shortest prompt prefix Anthropic caches; shorter prefixes are processed in full every time
+PROMPT_CACHE_MIN_TOKENS = 1024
+
 
 class DateTimeEncoder(json.JSONEncoder):
     """Custom JSON encoder that handles datetime objects."""
@@ -43,116 +70,595 @@ class DateTimeEncoder(json.JSONEncoder):
         return super().default(obj)
 
 
+class FinalAnswerFilter:
+    """Extracts final answer tokens from streamed ReAct model output.
+    
+    The ReAct agent streams its thoughts and tool calls through the same
+    model output as the answer, so only text following the final answer
+    marker is forwarded to clients. State is tracked per model run.
+    """
+    
+    MARKER = "Final Answer:"
+    
+    def __init__(self) -> None:
+        self._buffers: Dict[str, str] = {}
+        self._emitted: Dict[str, int] = {}
+    
+    def feed(self, run_id: str, content: Union[str, List[Any]]) -> str:
+        """Add a streamed chunk and return any new answer text.
+        
+        Args:
+            run_id: Identifier of the model run producing the chunk
+            content: Chunk content, either text or a list of content blocks
+            
+        Returns:
+            Newly available answer text, or an empty string
+        """
+        if isinstance(content, list):
+            content = "".join(
+                block.get("text", "") if isinstance(block, dict) else str(block)
+                for block in content
+            )
+        
+        buffer = self._buffers.get(run_id, "") + content
+        self._buffers[run_id] = buffer
+        
+        marker_index = buffer.find(self.MARKER)
+        if marker_index < 0:
+            return ""
+        
+        answer = buffer[marker_index + len(self.MARKER):].lstrip()
+        emitted = self._emitted.get(run_id, 0)
+        self._emitted[run_id] = len(answer)
+        return answer[emitted:]
+
+
 class CensusDataAgent:
     """Agent for answering questions about Census data."""
     
-    llm: ChatAnthropic
-    sql_db: SQLDatabase
+    llm: BaseChatModel
+    sql_db: ManagedSQLDatabase
     toolkit: SQLDatabaseToolkit
     agent: AgentExecutor
+    system_message: SystemMessage
+    templates: Optional[TemplateLibrary]
+    fast_path: Optional[FastPath]
+    answer_cache: Optional[AnswerCache]
+    schema_index: Optional[SchemaIndex]
+    in_flight: Optional[SingleFlight[AgentResponse]]
+    trace_recorder: Optional[TraceRecorder]
     
-    def __init__(self) -> None:
-        """Initialize the Census Data Agent."""
+    def __init__(self, llm: Optional[BaseChatModel] = None) -> None:
+        """Initialize the Census Data Agent.
         
-        self.llm = ChatAnthropic(
+        Args:
+            llm: Chat model to use instead of Claude, such as a scripted
+                model for benchmarks; the metrics callback is added to it
+        """
+        
+        self.llm = llm or ChatAnthropic(
             model="claude-sonnet-4-20250514",
             anthropic_api_key=settings.anthropic_api_key,
             temperature=0
         )
+        self.llm.callbacks = [*(self.llm.callbacks or []), MetricsCallbackHandler()]
+        
+        self.trace_recorder = None
+        if settings.trace_sample_rate > 0:
+            self.trace_recorder = TraceRecorder(
+                path=settings.trace_path,
+                sample_rate=settings.trace_sample_rate,
+                max_queued=settings.trace_max_queued
+            )
+            self.llm.callbacks.append(TraceCallbackHandler())
         
-        self.sql_db = SQLDatabase(engine=db_manager.engine)
+        self.sql_db = ManagedSQLDatabase(db_manager)
         
         self.toolkit = SQLDatabaseToolkit(db=self.sql_db, llm=self.llm)
+        
+        self.schema_index = None
+        self._prompt_catalog = None
+        self._build_prompts()
+        
+        self.templates = None
+        if settings.templates_enabled:
+            self.templates = TemplateLibrary(
+                log_path=settings.template_log_path,
+                min_runs=settings.template_min_agent_runs
+            )
+        
+        self.in_flight = SingleFlight() if settings.coalesce_questions_enabled else None
+        
+        self.answer_cache = None
+        if settings.answer_cache_enabled:
+            self.answer_cache = AnswerCache(
+                similarity_threshold=settings.answer_cache_similarity_threshold,
+                max_entries=settings.answer_cache_max_entries,
+                ttl_seconds=settings.answer_cache_ttl_seconds
+            )
 
-        self.agent = create_sql_agent(
-            prefix=SQL_PREFIX,
-            top_k=20,
-            llm=self.llm,
-            toolkit=self.toolkit,
-            verbose=True,
-            agent_type=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
-            agent_executor_kwargs={"return_intermediate_steps": True}
-        )
+    def _build_prompts(self) -> None:
+        """Build the system prefix and everything that embeds it from the current schema catalog."""
+        self._prompt_catalog = db_manager.catalog
+        self.system_message = self._create_system_message()
 
-    def ask_question(self, question: str) -> AgentResponse:
+        if settings.agent_schema_in_prompt:
+            self.agent = self._create_schema_prompt_agent()
+        else:
+            self.agent = create_sql_agent(
+                prefix=SQL_PREFIX,
+                top_k=SQL_TOP_K,
+                llm=self.llm,
+                toolkit=self.toolkit,
+                agent_type=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
+                agent_executor_kwargs={"return_intermediate_steps": True}
+            )
+        
+        self.fast_path = None
+        if settings.fast_path_enabled:
+            self.fast_path = FastPath(self.llm, self.system_message, settings.result_context_max_tokens)
+    
+    def _refresh_prompts(self) -> None:
+        """Rebuild the system prefix, agent and fast path when the schema catalog has been refreshed."""
+        if self._prompt_catalog is not db_manager.catalog:
+            logger.info("Schema catalog changed, rebuilding the system prompt")
+            self._build_prompts()
+    
+    def _create_system_message(self) -> SystemMessage:
+        """Create the static system prefix with SQL instructions and the schema.
+        
+        The prefix is marked for provider-side prompt caching, so repeated
+        requests do not pay to re-process it. With schema retrieval enabled
+        the full schema is replaced by a list of table names and
+        descriptions, capped at `schema_overview_max_tables`, so the prefix
+        does not grow with the number of columns. The columns of the tables
+        relevant to each question come from its schema selection.
+        
+        Returns:
+            SystemMessage with a single cached text block
+        """
+        text = SQL_PREFIX.format(dialect=self.toolkit.dialect, top_k=SQL_TOP_K)
+        if settings.schema_retrieval_enabled:
+            table_info = db_manager.catalog.render_overview(
+                list(self.sql_db.get_usable_table_names()),
+                max_tables=settings.schema_overview_max_tables
+            )
+            text += "\n" + TABLE_OVERVIEW_PROMPT.format(table_info=table_info)
+        else:
+            text += "\n" + SCHEMA_PROMPT.format(table_info=self.sql_db.get_table_info())
+        
+        if estimate_tokens(text) < PROMPT_CACHE_MIN_TOKENS:
+            logger.warning(
+                f"System prefix of about {estimate_tokens(text)} tokens is shorter than the "
+                f"{PROMPT_CACHE_MIN_TOKENS} tokens needed for prompt caching; it will not be cached"
+            )
+        return SystemMessage(content=[{
+            "type": "text",
+            "text": text,
+            "cache_control": {"type": "ephemeral"}
+        }])
+    
+    def _create_schema_prompt_agent(self) -> AgentExecutor:
+        """Create a ReAct SQL agent with the schema embedded in its prompt.
+        
+        The agent prompt starts with the cached system prefix, followed by
+        the schema selected for the question when schema retrieval is
+        enabled. With the full schema in the prompt, the table listing and
+        schema tools are dropped, which saves the discovery iterations the
+        agent would otherwise spend before writing SQL. With schema
+        retrieval they are kept, so the agent can look up a table the
+        selection left out.
+        
+        Returns:
+            AgentExecutor returning intermediate steps
+        """
+        tools = self.toolkit.get_tools()
+        if not settings.schema_retrieval_enabled:
+            tools = [tool for tool in tools if not isinstance(tool, (ListSQLDatabaseTool, InfoSQLDatabaseTool))]
+        
+        instructions = REACT_INSTRUCTIONS
+        if settings.schema_retrieval_enabled:
+            instructions = f"{RELEVANT_SCHEMA_PROMPT}\n{instructions}"
+        
+        prompt = ChatPromptTemplate.from_messages([
+            self.system_message,
+            ("human", instructions)
+        ])
+        
+        agent = RunnableAgent(
+            runnable=create_react_agent(self.llm, tools, prompt),
+            input_keys_arg=["input"],
+            return_keys_arg=["output"]
+        )
+        return AgentExecutor(
+            name="SQL Agent Executor",
+            agent=agent,
+            tools=tools,
+            max_iterations=15,
+            return_intermediate_steps=True
+        )
+    
+    async def ask_question(self, question: str, data_version: Optional[int] = None) -> AgentResponse:
         """Ask a question about Census data.
         
+        Tries the answer cache first, then the verified SQL templates and
+        the single-shot fast path, and only runs the full ReAct agent when
+        none of them produces an answer. Successful LLM runs are recorded
+        so the template library can learn from them.
+        
+        Concurrent requests for the same normalized question share a single
+        execution and all receive its response, or its error.
+        
+        Every response carries the timing breakdown of the request, and its
+        stages, SQL queries and LLM tokens are recorded in the metrics.
+        Sampled requests that do work of their own, rather than being
+        answered from the answer cache or by another request's execution,
+        are recorded to the trace file.
+        
         Args:
             question: Natural language question about Census data
+            data_version: Data load version, looked up if not given
             
         Returns:
             AgentResponse with answer and metadata
         """
+        with track_request() as timings, start_trace(self.trace_recorder, question) as trace:
+            agent_response = await self._ask(question, data_version)
+            
+            path = agent_response.path or "none"
+            QUESTIONS.inc(path=path, status=agent_response.status)
+            QUESTION_SECONDS.observe(timings.elapsed(), path=path)
+            summary = timings.summary()
+            
+            if trace is not None and trace.events:
+                trace.outcome = {
+                    "path": path,
+                    "status": agent_response.status,
+                    "text_answer": agent_response.text_answer,
+                    "timings": summary
+                }
+                self.trace_recorder.submit(trace)
+            
+            return agent_response.model_copy(update={"timings": TimingBreakdown(**summary)})
+    
+    async def _ask(self, question: str, data_version: Optional[int]) -> AgentResponse:
+        """Answer a question from the answer cache, or join or start its execution."""
         try:
             logger.info(f"Processing question: {question}")
             
-            response = self.agent.invoke({"input": question})
+            if data_version is None:
+                data_version = await db_manager.aget_data_version()
             
-            text_answer = response["output"]
-            intermediate_steps = response["intermediate_steps"]
-            chart_data = None
+            if self.answer_cache is not None:
+                with timed("answer_cache"):
+                    cached_response = self.answer_cache.get(question, data_version)
+                if cached_response is not None:
+                    return cached_response
             
-            if intermediate_steps:
-                chart_data = self.generate_chart_data(
-                    question=question,
-                    text_answer=text_answer,
-                    intermediate_steps=intermediate_steps
-                )
+            if self.in_flight is None:
+                return await self._answer(question, data_version)
             
-            return AgentResponse(
-                text_answer=text_answer,
-                data=chart_data,
-                question=question,
-                status="success"
-            )
+            key = (normalize_text(question) or question, data_version)
+            agent_response = await self.in_flight.run(key, lambda: self._answer(question, data_version))
+            if agent_response.question != question:
+                agent_response = agent_response.model_copy(update={"question": question})
+            return agent_response
             
         except Exception as e:
             logger.error(f"Error processing question: {e}")
-            return AgentResponse(
-                question=question,
-                text_answer=f"Sorry, I encountered an error: {str(e)}",
-                data=None,
-                status="error",
-                error=str(e)
-            )
+            return self._error_response(question, e)
     
-    def determine_chart_type(self, question: str, text_answer: str, intermediate_steps: List[Tuple[AgentAction, str]]) -> ChartTypeDecision:
-        """Determine the most appropriate chart type using structured output.
+    async def _answer(self, question: str, data_version: int) -> AgentResponse:
+        """Answer a question that missed the answer cache and cache the response."""
+        started_at = time.perf_counter()
+        
+        agent_response = None
+        if self.templates is not None:
+            with timed("template"):
+                agent_response = await self._answer_with_template(question, data_version)
+        if agent_response is None:
+            self._refresh_prompts()
+            with timed("schema_selection"):
+                selection = self._select_schema(question)
+            with self.sql_db.schema_selection(selection):
+                if self.fast_path is not None:
+                    agent_response = await self._answer_with_fast_path(question, data_version)
+                if agent_response is None:
+                    agent_response = await self._answer_with_agent(question, data_version)
+        
+        logger.info(f"Answered question via {agent_response.path} in {time.perf_counter() - started_at:.2f}s")
+        
+        if self.answer_cache is not None:
+            self.answer_cache.put(question, agent_response, data_version)
+        
+        return agent_response
+    
+    async def ask_batch(
+            self,
+            questions: List[str],
+            max_concurrency: int) -> AsyncIterator[Tuple[int, AgentResponse]]:
+        """Answer many questions concurrently, yielding responses as they finish.
+        
+        At most `max_concurrency` questions are answered at a time. The batch
+        looks up the data version once and shares the schema index, answer
+        cache and query cache of the agent; questions that normalize to the
+        same text are answered once.
         
         Args:
-            question: Original question
-            text_answer: Text answer from SQL agent
-            intermediate_steps: Full agent execution steps with context
+            questions: Natural language questions about Census data
+            max_concurrency: Most questions answered at the same time
+            
+        Yields:
+            Position of the question in `questions` and its AgentResponse,
+            in order of completion
+        """
+        data_version = await db_manager.aget_data_version()
+        
+        groups: Dict[str, List[int]] = {}
+        for index, question in enumerate(questions):
+            groups.setdefault(normalize_text(question) or question, []).append(index)
+        
+        pending: asyncio.Queue = asyncio.Queue()
+        for indices in groups.values():
+            pending.put_nowait(indices)
+        finished: asyncio.Queue = asyncio.Queue()
+        
+        async def worker() -> None:
+            while not pending.empty():
+                indices = pending.get_nowait()
+                response = await self.ask_question(questions[indices[0]], data_version)
+                finished.put_nowait((indices, response))
+        
+        workers = [asyncio.create_task(worker()) for _ in range(min(max_concurrency, len(groups)))]
+        try:
+            for _ in range(len(groups)):
+                indices, response = await finished.get()
+                for index in indices:
+                    yield index, response.model_copy(update={"question": questions[index]})
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+    
+    async def _answer_with_template(self, question: str, data_version: int) -> Optional[AgentResponse]:
+        """Answer a question from a verified SQL template.
+        
+        Args:
+            question: Natural language question about Census data
+            data_version: Current data load version
+            
+        Returns:
+            AgentResponse, or None if no template matches the question
+        """
+        try:
+            return await self.templates.answer(question, data_version)
+        except Exception as e:
+            logger.warning(f"Template answer failed, falling back: {e}")
+            return None
+    
+    async def _answer_with_fast_path(self, question: str, data_version: int) -> Optional[AgentResponse]:
+        """Answer a question with the single-shot fast path.
+        
+        Args:
+            question: Natural language question about Census data
+            data_version: Current data load version
             
         Returns:
-            ChartTypeDecision with chart type and reasoning
+            AgentResponse, or None if the full agent should answer instead
         """
         try:
-            chart_type_prompt = CHART_TYPE_DECISION_PROMPT.format(
+            table_info = self.sql_db.get_table_info() if settings.schema_retrieval_enabled else None
+            with timed("fast_path"):
+                result = await self.fast_path.run(question, table_info)
+        except Exception as e:
+            logger.warning(f"Fast path failed, falling back to agent: {e}")
+            return None
+        
+        if result is None:
+            return None
+        
+        text_answer, intermediate_steps, query_result = result
+        self._trace_steps(intermediate_steps)
+        await self._record_run(question, intermediate_steps, data_version)
+        chart_data = await self.generate_chart_data(
+            question=question,
+            text_answer=text_answer,
+            intermediate_steps=intermediate_steps
+        )
+        
+        return AgentResponse(
+            text_answer=text_answer,
+            data=chart_data,
+            question=question,
+            status="success",
+            path=AnswerPath.fast_path,
+            result=build_query_result(query_result.columns, query_result.arrays)
+        )
+    
+    async def _answer_with_agent(self, question: str, data_version: int) -> AgentResponse:
+        """Answer a question with the full ReAct SQL agent.
+        
+        Args:
+            question: Natural language question about Census data
+            data_version: Current data load version
+            
+        Returns:
+            AgentResponse with answer and chart data
+        """
+        with timed("agent"), self.sql_db.collect_query_results() as query_results:
+            sink = _stream_sink.get()
+            if sink is None:
+                response = await self.agent.ainvoke(self._agent_inputs(question))
+            else:
+                response = await self._stream_agent(question, sink)
+        
+        text_answer = response["output"]
+        intermediate_steps = response["intermediate_steps"]
+        record_agent_iterations(len(intermediate_steps))
+        self._trace_steps(intermediate_steps)
+        chart_data = None
+        
+        if intermediate_steps:
+            await self._record_run(question, intermediate_steps, data_version)
+            chart_data = await self.generate_chart_data(
                 question=question,
                 text_answer=text_answer,
                 intermediate_steps=intermediate_steps
             )
+        
+        return AgentResponse(
+            text_answer=text_answer,
+            data=chart_data,
+            question=question,
+            status="success",
+            path=AnswerPath.agent,
+            result=query_result_from_steps(intermediate_steps, query_results)
+        )
+    
+    def _select_schema(self, question: str) -> Optional[SchemaSelection]:
+        """Select the tables and columns relevant to a question.
+        
+        The index is rebuilt whenever the schema catalog is refreshed.
+        
+        Returns:
+            SchemaSelection, or None when schema retrieval is disabled
+        """
+        if not settings.schema_retrieval_enabled:
+            return None
+        catalog = db_manager.catalog
+        if self.schema_index is None or self.schema_index.catalog is not catalog:
+            self.schema_index = SchemaIndex(
+                catalog,
+                max_tables=settings.schema_retrieval_max_tables,
+                max_columns=settings.schema_retrieval_max_columns
+            )
+        return self.schema_index.select(question)
+    
+    def _agent_inputs(self, question: str) -> Dict[str, Any]:
+        """Build the agent inputs, adding the selected schema when the prompt embeds it."""
+        inputs = {"input": question}
+        if settings.agent_schema_in_prompt and settings.schema_retrieval_enabled:
+            inputs["table_info"] = self.sql_db.get_table_info()
+        return inputs
+    
+    def _trace_steps(self, intermediate_steps: List[Tuple[AgentAction, str]]) -> None:
+        """Add the tool calls of a run to the trace of the current request."""
+        for action, observation in intermediate_steps:
+            record_event("tool", tool=action.tool, input=str(action.tool_input), output=str(observation))
+    
+    async def _record_run(
+            self,
+            question: str,
+            intermediate_steps: List[Tuple[AgentAction, str]],
+            data_version: int) -> None:
+        """Record a successful LLM run for the template library to learn from."""
+        if self.templates is None:
+            return
+        try:
+            await self.templates.record(question, intermediate_steps, data_version)
+        except Exception as e:
+            logger.warning(f"Could not record run for templates: {e}")
+    
+    async def stream_question(self, question: str) -> AsyncIterator[StreamEvent]:
+        """Ask a question and stream progress events as they happen.
+        
+        The question goes through the same pipeline as `ask_question`, with
+        the answer cache, templates, fast path, coalescing, metrics and
+        tracing. When the ReAct agent answers it, its tool calls, tool
+        results and the tokens of the final answer are streamed as the model
+        generates them. Every stream ends with the chart data, if any, and
+        the complete AgentResponse.
+        
+        Args:
+            question: Natural language question about Census data
             
-            structured_llm = self.llm.with_structured_output(ChartTypeDecision)
-            decision = structured_llm.invoke(chart_type_prompt)
+        Yields:
+            StreamEvent instances in the order they occur
+        """
+        logger.info(f"Streaming question: {question}")
+        events: asyncio.Queue = asyncio.Queue()
+        
+        async def answer() -> AgentResponse:
+            _stream_sink.set(events.put_nowait)
+            try:
+                return await self.ask_question(question)
+            finally:
+                events.put_nowait(None)
+        
+        task = asyncio.create_task(answer())
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                yield event
             
-            logger.info(f"Chart type decision: {decision.chart_type} - {decision.reasoning}")
-            return decision
+            response = await task
+            if response.data is not None:
+                yield StreamEvent(event=StreamEventType.chart, data=response.data)
+            yield StreamEvent(event=StreamEventType.response, data=response)
+        finally:
+            if not task.done():
+                task.cancel()
+    
+    async def _stream_agent(self, question: str, sink: Callable[[StreamEvent], None]) -> Dict[str, Any]:
+        """Run the ReAct agent, passing its progress events to `sink`.
+        
+        Returns:
+            Agent output with the final answer and intermediate steps
+        """
+        answer_filter = FinalAnswerFilter()
+        response = None
+        
+        async for event in self.agent.astream_events(self._agent_inputs(question), version="v2"):
+            kind = event["event"]
             
-        except Exception as e:
-            logger.warning(f"Could not determine chart type: {e}")
-            return ChartTypeDecision(
-                chart_type=ChartType.bar,
-                reasoning="Default fallback to bar chart due to decision error"
-            )
-
-    def generate_chart_data(
+            if kind == "on_chat_model_stream":
+                text = answer_filter.feed(event["run_id"], event["data"]["chunk"].content)
+                if text:
+                    sink(StreamEvent(event=StreamEventType.token, data=TokenEvent(text=text)))
+            
+            elif kind == "on_tool_end":
+                sink(StreamEvent(
+                    event=StreamEventType.tool_result,
+                    data=ToolResultEvent(tool=event["name"], output=str(event["data"].get("output", "")))
+                ))
+            
+            elif kind == "on_chain_stream" and not event["parent_ids"]:
+                chunk = event["data"]["chunk"]
+                for action in chunk.get("actions", []):
+                    sink(StreamEvent(
+                        event=StreamEventType.tool_call,
+                        data=ToolCallEvent(tool=action.tool, tool_input=str(action.tool_input))
+                    ))
+                if "output" in chunk:
+                    response = chunk
+        
+        if response is None:
+            raise RuntimeError("Agent finished without producing an answer")
+        return {"output": response["output"], "intermediate_steps": response.get("intermediate_steps", [])}
+    
+    def _error_response(self, question: str, error: Exception) -> AgentResponse:
+        """Build the response returned when answering a question fails."""
+        return AgentResponse(
+            question=question,
+            text_answer=f"Sorry, I encountered an error: {str(error)}",
+            data=None,
+            status="error",
+            error=str(error)
+        )
+    
+    async def generate_chart_data(
             self, 
             question: str, 
             text_answer: str, 
             intermediate_steps: List[Tuple[AgentAction, str]]) -> ChartData:
-        """Generate chart data using two-stage structured output approach.
+        """Generate chart data for an answer.
+        
+        Charts are built deterministically from the last SQL query result
+        when its columns fit a supported shape. Otherwise a single structured
+        output call picks the chart type and extracts the chart data, given
+        only the final SQL query and a token-budgeted table of its result.
         
         Args:
             question: Original question
@@ -160,43 +666,30 @@ class CensusDataAgent:
             intermediate_steps: Full agent execution steps with context
             
         Returns:
-            Dictionary containing chart data or None if generation failed
+            Chart data or None if generation failed
         """
         try:
-            chart_decision = self.determine_chart_type(question, text_answer, intermediate_steps)
-            
-            if chart_decision.chart_type == ChartType.bar:
-                chart_prompt = BAR_CHART_DATA_PROMPT.format(
-                    question=question,
-                    text_answer=text_answer,
-                    intermediate_steps=intermediate_steps,
-                    output_example=BarChartData.get_output_example()
-                )
-                structured_llm = self.llm.with_structured_output(BarChartData)
-            elif chart_decision.chart_type == ChartType.scatter:
-                chart_prompt = SCATTER_CHART_DATA_PROMPT.format(
-                    question=question,
-                    text_answer=text_answer,
-                    intermediate_steps=intermediate_steps,
-                    output_example=ScatterChartData.get_output_example()
-                )
-                structured_llm = self.llm.with_structured_output(ScatterChartData)
-            else:  # radar
-                chart_prompt = RADAR_CHART_DATA_PROMPT.format(
-                    question=question,
-                    text_answer=text_answer,
-                    intermediate_steps=intermediate_steps,
-                    output_example=RadarChartData.get_output_example()
-                )
-                structured_llm = self.llm.with_structured_output(RadarChartData)
-            
-            chart_response = structured_llm.invoke(
-                chart_prompt,
-                config={"callbacks": [StdOutCallbackHandler()]}
+            with timed("chart"):
+                chart_data = build_chart_data(intermediate_steps)
+            if chart_data is not None:
+                return chart_data
+            
+            logger.info("Falling back to LLM chart generation")
+            chart_prompt = CHART_DATA_PROMPT.format(
+                question=question,
+                text_answer=text_answer,
+                query_context=build_query_context(intermediate_steps, settings.result_context_max_tokens),
+                bar_example=BarChartData.get_output_example(),
+                scatter_example=ScatterChartData.get_output_example(),
+                radar_example=RadarChartData.get_output_example()
             )
+            structured_llm = self.llm.with_structured_output(ChartSpec)
+            
+            with timed("chart_llm"):
+                chart_spec = await structured_llm.ainvoke(chart_prompt)
             
-            logger.info(f"Generated chart data successfully: \n{chart_response.model_dump_json(indent=2)}")
-            return chart_response
+            logger.info(f"Generated {chart_spec.chart.chart_type} chart data with the LLM")
+            return chart_spec.chart
             
         except Exception as e:
             logger.warning(f"Could not generate chart data: {e}")
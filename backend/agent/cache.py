@@ -0,0 +1,204 @@
+"""Semantic answer cache for repeated and near-duplicate questions."""
+
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Optional, Tuple
+import logging
+import time
+
+from agent.similarity import normalize_text, vectorize, cosine_similarity
+from agent.templates import METRIC_ALIASES, DESCENDING_WORDS, ASCENDING_WORDS, FILLER_WORDS, tokenize
+from api.models import AgentResponse, AnswerPath
+
+logger = logging.getLogger(__name__)
+
+# Words rewritten before matching, so paraphrases share their terms
+SYNONYMS = {
+    "earn": "income",
+    "earning": "income",
+    "richest": "highest income",
+    "wealthiest": "highest income",
+    "poorest": "lowest income",
+    "oldest": "highest age",
+    "youngest": "lowest age",
+}
+
+# Answers that say the question was not answered, which are never cached
+NON_ANSWER_PREFIXES = ("Agent stopped due to", "I don't know")
+
+
+def _phrases() -> Dict[Tuple[str, ...], str]:
+    """Map the tokens of every metric alias and column name to the metric column."""
+    phrases = {}
+    for alias, column in METRIC_ALIASES.items():
+        phrases.setdefault(tuple(tokenize(alias)), column)
+        phrases.setdefault(tuple(tokenize(column.replace("_", " "))), column)
+    return phrases
+
+
+_METRIC_PHRASES = _phrases()
+_MAX_PHRASE_LENGTH = max(len(phrase) for phrase in _METRIC_PHRASES)
+
+
+class QuestionTerms:
+    """The terms of a question that decide its meaning.
+
+    Metric phrases are mapped to their column and direction words to
+    "desc" or "asc", after rewriting synonyms, so "highest income county"
+    and "which county earns the most" get the same terms. Entities are the
+    metrics, numbers and every other word except filler, in order of first
+    mention, so swapping a county, a metric or the order of two of them
+    changes the terms.
+    """
+
+    def __init__(self, question: str) -> None:
+        tokens: List[str] = []
+        for token in tokenize(question):
+            tokens.extend(tokenize(SYNONYMS[token]) if token in SYNONYMS else [token])
+
+        terms: List[str] = []
+        position = 0
+        while position < len(tokens):
+            for length in range(min(_MAX_PHRASE_LENGTH, len(tokens) - position), 0, -1):
+                column = _METRIC_PHRASES.get(tuple(tokens[position:position + length]))
+                if column is not None:
+                    terms.append(column)
+                    position += length
+                    break
+            else:
+                token = tokens[position]
+                terms.append("desc" if token in DESCENDING_WORDS else "asc" if token in ASCENDING_WORDS else token)
+                position += 1
+
+        entities: List[str] = []
+        for term in terms:
+            if term not in FILLER_WORDS and term not in ("desc", "asc") and term not in entities:
+                entities.append(term)
+
+        self.entities = tuple(entities)
+        self.directions = frozenset(term for term in terms if term in ("desc", "asc"))
+        self.vector = vectorize(" ".join(sorted(terms)))
+
+
+class CacheEntry:
+    """A cached answer together with its question fingerprint."""
+
+    def __init__(self, response: AgentResponse, terms: QuestionTerms, created_at: float) -> None:
+        self.response = response
+        self.terms = terms
+        self.created_at = created_at
+
+
+class AnswerCache:
+    """LRU + TTL cache of agent responses keyed on question similarity.
+
+    A lookup first tries an exact match on the normalized question and then
+    falls back to the most similar cached question with the same entities
+    and directions (see QuestionTerms). The similarity threshold decides
+    how much the remaining wording, such as filler words, may differ.
+    Questions that differ in a county, a metric, the order of two of them,
+    a direction ("highest" and "lowest") or a number ("top 5" and "top 10")
+    never match. Non-answers are not cached. All entries are dropped when
+    the data load version changes.
+    """
+
+    def __init__(self, similarity_threshold: float, max_entries: int, ttl_seconds: float) -> None:
+        """Initialize the answer cache.
+
+        Args:
+            similarity_threshold: Minimum cosine similarity for a near-duplicate hit
+            max_entries: Maximum number of cached answers before LRU eviction
+            ttl_seconds: Time after which a cached answer expires
+        """
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._data_version: Optional[int] = None
+
+    def get(self, question: str, data_version: int) -> Optional[AgentResponse]:
+        """Look up a cached answer for a question.
+
+        Args:
+            question: Natural language question
+            data_version: Current data load version
+
+        Returns:
+            Cached AgentResponse for the question, or None on a miss
+        """
+        self._check_version(data_version)
+        self._evict_expired()
+
+        key = normalize_text(question)
+        entry = self._entries.get(key)
+
+        if entry is None:
+            key, entry = self._find_similar(QuestionTerms(question))
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        logger.info(f"Answer cache hit for question: {question}")
+        return entry.response.model_copy(update={"question": question, "path": AnswerPath.cache})
+
+    def put(self, question: str, response: AgentResponse, data_version: int) -> None:
+        """Store an answer for a question.
+
+        Args:
+            question: Natural language question
+            response: Successful agent response to cache; non-answers are skipped
+            data_version: Data load version the answer was computed against
+        """
+        self._check_version(data_version)
+        if response.status != "success" or response.text_answer.strip().startswith(NON_ANSWER_PREFIXES):
+            return
+
+        key = normalize_text(question)
+        self._entries[key] = CacheEntry(
+            response=response,
+            terms=QuestionTerms(question),
+            created_at=time.monotonic()
+        )
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached answers."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache hit/miss counters and current size."""
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def _find_similar(self, terms: QuestionTerms) -> Tuple[Optional[str], Optional[CacheEntry]]:
+        """Find the most similar cached question above the threshold with the same entities and directions."""
+        best_key, best_entry, best_score = None, None, self.similarity_threshold
+
+        for candidate_key, entry in self._entries.items():
+            if entry.terms.entities != terms.entities or entry.terms.directions != terms.directions:
+                continue
+            score = cosine_similarity(terms.vector, entry.terms.vector)
+            if score >= best_score:
+                best_key, best_entry, best_score = candidate_key, entry, score
+
+        return best_key, best_entry
+
+    def _check_version(self, data_version: int) -> None:
+        """Invalidate all entries if the data has been reloaded."""
+        if self._data_version is not None and data_version != self._data_version:
+            logger.info(f"Data version changed to {data_version}, clearing answer cache")
+            self.clear()
+        self._data_version = data_version
+
+    def _evict_expired(self) -> None:
+        """Remove entries older than the TTL."""
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = [key for key, entry in self._entries.items() if entry.created_at < cutoff]
+        for key in expired:
+            del self._entries[key]
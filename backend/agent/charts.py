@@ -0,0 +1,286 @@
+"""Rule-based chart generation from SQL query results.
+
+Builds chart data directly from the rows returned by the agent's
+`sql_db_query` tool, without any additional LLM calls. The chart type is
+inferred from the shape of the result set:
+
+- one label column and one numeric column -> bar chart
+- one label column and two numeric columns -> scatter chart
+- one label column and three or more numeric columns -> radar chart
+"""
+
+from decimal import Decimal
+from langchain.agents.agent import AgentAction
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import ast
+import logging
+import re
+
+from database.results import ColumnarResult
+from api.models import (
+    ChartData,
+    BarChartData,
+    ScatterChartData,
+    RadarChartData,
+    RadarDataset,
+    ChartType,
+    QueryResult
+)
+
+logger = logging.getLogger(__name__)
+
+QUERY_TOOL_NAME = "sql_db_query"
+
+MAX_RADAR_ENTITIES = 5
+MAX_RADAR_METRICS = 6
+
+# Values in the tool output are Python reprs; these cannot be read by
+# ast.literal_eval and are rewritten to plain literals first.
+_DECIMAL_PATTERN = re.compile(r"Decimal\('([^']*)'\)")
+_DATETIME_PATTERN = re.compile(r"datetime\.(?:date|datetime|time)\(([^)]*)\)")
+
+_SELECT_PATTERN = re.compile(r"^\s*select\s+(?:distinct\s+)?(.*?)\s+from\s", re.IGNORECASE | re.DOTALL)
+_ALIAS_PATTERN = re.compile(r"\s+as\s+\"?([A-Za-z_][A-Za-z0-9_ ]*)\"?\s*$", re.IGNORECASE)
+_COLUMN_PATTERN = re.compile(r"^(?:[A-Za-z_][A-Za-z0-9_]*\.)?\"?([A-Za-z_][A-Za-z0-9_]*)\"?$")
+_FUNCTION_PATTERN = re.compile(r"^([A-Za-z_][A-Za-z0-9_]*)\s*\(")
+
+
+class ParsedResult:
+    """Query result rows with column names and per-column types."""
+
+    def __init__(self, columns: List[str], rows: List[Tuple[Any, ...]], query: Optional[str] = None) -> None:
+        self.columns = columns
+        self.rows = rows
+        self.query = query
+
+    def column(self, index: int) -> List[Any]:
+        """Get all values of a column."""
+        return [row[index] for row in self.rows]
+
+    def is_numeric(self, index: int) -> bool:
+        """Whether every non-null value in a column is a number."""
+        values = [value for value in self.column(index) if value is not None]
+        return bool(values) and all(
+            isinstance(value, (int, float, Decimal)) and not isinstance(value, bool)
+            for value in values
+        )
+
+
+def parse_observation(observation: str) -> Optional[List[Tuple[Any, ...]]]:
+    """Parse the string output of the SQL query tool into rows.
+
+    Args:
+        observation: Tool output, e.g. "[('Kings County', 2590516), ...]"
+
+    Returns:
+        List of row tuples, or None if the output is not a result set
+    """
+    if not observation or not observation.lstrip().startswith("["):
+        return None
+
+    literal = _DECIMAL_PATTERN.sub(r"\1", observation)
+    literal = _DATETIME_PATTERN.sub(lambda match: repr(match.group(1)), literal)
+
+    try:
+        rows = ast.literal_eval(literal)
+    except (ValueError, SyntaxError):
+        return None
+
+    if not isinstance(rows, list) or not rows or not all(isinstance(row, tuple) for row in rows):
+        return None
+    if len({len(row) for row in rows}) != 1:
+        return None
+    return rows
+
+
+def _split_top_level(expression: str) -> List[str]:
+    """Split a select list on commas that are not nested in parentheses."""
+    parts = []
+    depth = 0
+    current = []
+    for char in expression:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    parts.append("".join(current).strip())
+    return parts
+
+
+def parse_column_names(query: str, width: int) -> List[str]:
+    """Derive result column names from the select list of a query.
+
+    Args:
+        query: SQL query that produced the result
+        width: Number of columns in the result
+
+    Returns:
+        Column names, falling back to generic names where they cannot be derived
+    """
+    names = []
+    match = _SELECT_PATTERN.search(query)
+    if match:
+        for expression in _split_top_level(match.group(1)):
+            alias = _ALIAS_PATTERN.search(expression)
+            column = _COLUMN_PATTERN.match(expression)
+            function = _FUNCTION_PATTERN.match(expression)
+            if alias:
+                names.append(alias.group(1).strip())
+            elif column:
+                names.append(column.group(1))
+            elif function:
+                names.append(function.group(1).lower())
+            else:
+                names.append("value")
+
+    if len(names) != width:
+        return [f"column_{index + 1}" for index in range(width)]
+    return names
+
+
+def humanize(column_name: str) -> str:
+    """Turn a column name such as median_household_income into a title."""
+    return column_name.replace("_", " ").strip().title()
+
+
+def find_last_query_result(intermediate_steps: List[Tuple[AgentAction, str]]) -> Optional[ParsedResult]:
+    """Find and parse the last successful query result in the agent steps.
+
+    Args:
+        intermediate_steps: Agent execution steps
+
+    Returns:
+        ParsedResult for the last query that returned rows, or None
+    """
+    for action, observation in reversed(intermediate_steps):
+        if action.tool != QUERY_TOOL_NAME:
+            continue
+        rows = parse_observation(str(observation))
+        if rows is None:
+            continue
+        query = action.tool_input if isinstance(action.tool_input, str) else str(action.tool_input)
+        return ParsedResult(parse_column_names(query, len(rows[0])), rows, query)
+    return None
+
+
+def build_chart_from_result(result: ParsedResult) -> Optional[ChartData]:
+    """Build chart data from a parsed query result based on its column shape.
+
+    Args:
+        result: Parsed query result
+
+    Returns:
+        Chart data, or None if the result does not fit a supported shape
+    """
+    width = len(result.columns)
+    numeric = [index for index in range(width) if result.is_numeric(index)]
+    text = [index for index in range(width) if index not in numeric]
+
+    if not text or not numeric:
+        return None
+
+    label_index = text[0]
+    rows = [
+        row for row in result.rows
+        if row[label_index] is not None and all(row[index] is not None for index in numeric)
+    ]
+    if not rows:
+        return None
+
+    labels = [str(row[label_index]) for row in rows]
+    label_title = humanize(result.columns[label_index])
+    metric_titles = [humanize(result.columns[index]) for index in numeric]
+
+    if len(numeric) == 1:
+        return BarChartData(
+            chart_type=ChartType.bar,
+            values=[float(row[numeric[0]]) for row in rows],
+            labels=labels,
+            x_axis_title=label_title,
+            y_axis_title=metric_titles[0],
+            chart_title=f"{metric_titles[0]} by {label_title}"
+        )
+
+    if len(numeric) == 2:
+        return ScatterChartData(
+            chart_type=ChartType.scatter,
+            x_values=[float(row[numeric[0]]) for row in rows],
+            y_values=[float(row[numeric[1]]) for row in rows],
+            labels=labels,
+            x_axis_title=metric_titles[0],
+            y_axis_title=metric_titles[1],
+            chart_title=f"{metric_titles[1]} vs {metric_titles[0]}"
+        )
+
+    if len(rows) > MAX_RADAR_ENTITIES or len(numeric) > MAX_RADAR_METRICS:
+        return None
+
+    return RadarChartData(
+        chart_type=ChartType.radar,
+        datasets=[
+            RadarDataset(label=label, data=[float(row[index]) for index in numeric])
+            for label, row in zip(labels, rows)
+        ],
+        axis_titles=metric_titles,
+        chart_title=f"{label_title} Comparison"
+    )
+
+
+def build_query_result(columns: List[str], column_values: Sequence[Sequence[Any]]) -> QueryResult:
+    """Build the columnar API representation of a query result.
+
+    Args:
+        columns: Column names
+        column_values: One sequence of values per column
+
+    Returns:
+        QueryResult with one value array per column
+    """
+    values = [list(column) for column in column_values]
+    return QueryResult(columns=columns, values=values, row_count=len(values[0]) if values else 0)
+
+
+def query_result_from_steps(
+        intermediate_steps: List[Tuple[AgentAction, str]],
+        results: Dict[str, ColumnarResult]) -> Optional[QueryResult]:
+    """Get the agent's last query result in columnar API form, if any.
+
+    Args:
+        intermediate_steps: Agent execution steps
+        results: Full results of the queries the agent ran, by query text
+
+    Returns:
+        QueryResult of the last query that returned rows, or None
+    """
+    for action, _ in reversed(intermediate_steps):
+        if action.tool != QUERY_TOOL_NAME:
+            continue
+        query = action.tool_input if isinstance(action.tool_input, str) else str(action.tool_input)
+        result = results.get(query)
+        if result is not None and len(result):
+            return build_query_result(result.columns, result.arrays)
+    return None
+
+
+def build_chart_data(intermediate_steps: List[Tuple[AgentAction, str]]) -> Optional[ChartData]:
+    """Build chart data from the agent's last query result without an LLM.
+
+    Args:
+        intermediate_steps: Agent execution steps
+
+    Returns:
+        Chart data, or None if no usable query result was found
+    """
+    result = find_last_query_result(intermediate_steps)
+    if result is None:
+        return None
+
+    chart_data = build_chart_from_result(result)
+    if chart_data is not None:
+        logger.info(f"Built {chart_data.chart_type} chart from query result columns {result.columns}")
+    return chart_data
@@ -0,0 +1,126 @@
+"""Single-shot text-to-SQL fast path for simple questions."""
+
+from decimal import Decimal
+from langchain.agents.agent import AgentAction
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import HumanMessage, SystemMessage
+from sqlalchemy.exc import SQLAlchemyError
+from typing import Any, List, Optional, Tuple
+import logging
+
+from database.cache import normalize_sql, is_read_query
+from database.manager import db_manager
+from database.results import ColumnarResult
+from agent.charts import QUERY_TOOL_NAME
+from agent.result_context import render_table
+from agent.prompts import FAST_PATH_SQL_PROMPT, FAST_PATH_SUMMARY_PROMPT, RELEVANT_SCHEMA_PROMPT
+from api.models import SQLQueryPlan
+
+logger = logging.getLogger(__name__)
+
+
+def format_value(value: Any) -> str:
+    """Format a result value for display in an answer."""
+    if isinstance(value, bool) or value is None:
+        return str(value)
+    if isinstance(value, int):
+        return f"{value:,}"
+    if isinstance(value, (float, Decimal)):
+        return f"{value:,.2f}".rstrip("0").rstrip(".")
+    return str(value)
+
+
+class FastPath:
+    """Answers a question with one SQL generation call and one query.
+
+    The query is generated with a single structured output call that shares
+    the agent's cached system prefix, then run once through DatabaseManager.
+    Single-row results are answered from a template written alongside the
+    query; other results get one summarization call. Whenever the query is
+    unusable, fails or returns no rows, `run` returns None so the caller can
+    fall back to the full ReAct agent.
+    """
+
+    def __init__(self, llm: BaseChatModel, system_message: SystemMessage, max_result_tokens: int) -> None:
+        """Initialize the fast path.
+
+        Args:
+            llm: Chat model used for SQL generation and summarization
+            system_message: System prefix with SQL instructions and the schema
+            max_result_tokens: Most tokens of query result sent for summarization
+        """
+        self.llm = llm
+        self.system_message = system_message
+        self.max_result_tokens = max_result_tokens
+
+    async def run(
+            self,
+            question: str,
+            table_info: Optional[str] = None) -> Optional[Tuple[str, List[Tuple[AgentAction, str]], ColumnarResult]]:
+        """Try to answer a question with a single query.
+
+        Args:
+            question: Natural language question about Census data
+            table_info: Schema selected for the question, when it is not in the system prefix
+
+        Returns:
+            Text answer, agent-style intermediate steps for chart generation
+            and the query result, or None if the full agent should handle
+            the question
+        """
+        prompt = FAST_PATH_SQL_PROMPT.format(question=question)
+        if table_info is not None:
+            prompt = f"{RELEVANT_SCHEMA_PROMPT.format(table_info=table_info)}\n{prompt}"
+
+        structured_llm = self.llm.with_structured_output(SQLQueryPlan)
+        plan = await structured_llm.ainvoke([
+            self.system_message,
+            HumanMessage(content=prompt)
+        ])
+
+        sql = (plan.sql or "").strip()
+        if not sql or not is_read_query(normalize_sql(sql)):
+            logger.info("Fast path produced no usable query, falling back to agent")
+            return None
+
+        try:
+            result = await db_manager.aexecute_query_columnar(sql)
+        except SQLAlchemyError as e:
+            logger.info(f"Fast path query failed, falling back to agent: {e}")
+            return None
+
+        if not len(result):
+            logger.info("Fast path query returned no rows, falling back to agent")
+            return None
+
+        text_answer = self._fill_template(plan.answer_template, result)
+        if text_answer is None:
+            text_answer = await self._summarize(question, sql, result)
+
+        observation = str(result.rows())
+        action = AgentAction(tool=QUERY_TOOL_NAME, tool_input=sql, log="Fast path query")
+        return text_answer, [(action, observation)], result
+
+    def _fill_template(self, template: Optional[str], result: ColumnarResult) -> Optional[str]:
+        """Fill the answer template from a single-row result, if possible."""
+        if not template or len(result) != 1:
+            return None
+        try:
+            return template.format_map({column: format_value(value) for column, value in zip(result.columns, result.rows()[0])})
+        except (KeyError, IndexError, ValueError, AttributeError, TypeError):
+            logger.info("Fast path answer template did not match the result columns")
+            return None
+
+    async def _summarize(self, question: str, sql: str, result: ColumnarResult) -> str:
+        """Summarize a query result with one LLM call."""
+        response = await self.llm.ainvoke([
+            self.system_message,
+            HumanMessage(content=FAST_PATH_SUMMARY_PROMPT.format(
+                question=question,
+                sql=sql,
+                rows=render_table(result.columns, result.rows(), self.max_result_tokens)
+            ))
+        ])
+        return response.content if isinstance(response.content, str) else "".join(
+            block.get("text", "") for block in response.content if isinstance(block, dict)
+        )
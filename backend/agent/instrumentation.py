@@ -0,0 +1,127 @@
+"""LangChain callbacks feeding the LLM metrics and request traces."""
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import LLMResult
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+import threading
+import time
+
+from metrics import record_llm_call
+from tracing import record_event, tracing
+
+# Token kinds reported by Anthropic, keyed by their field in the usage block
+USAGE_KINDS = {
+    "input_tokens": "input",
+    "output_tokens": "output",
+    "cache_read_input_tokens": "cache_read",
+    "cache_creation_input_tokens": "cache_creation",
+}
+
+
+def token_usage(response: LLMResult) -> Dict[str, int]:
+    """Get the token counts of a model response by kind.
+
+    Args:
+        response: Result of one model call
+
+    Returns:
+        Mapping of token kind to count; empty when the model reported no usage
+    """
+    usage: Optional[Dict[str, Any]] = None
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            metadata = getattr(message, "response_metadata", None) or {}
+            usage = metadata.get("usage") or getattr(message, "usage_metadata", None) or usage
+    if usage is None:
+        usage = (response.llm_output or {}).get("usage")
+    if not usage:
+        return {}
+    return {
+        kind: int(usage[field])
+        for field, kind in USAGE_KINDS.items()
+        if isinstance(usage.get(field), int)
+    }
+
+
+def tool_names(tools: Optional[List[Any]]) -> List[str]:
+    """Get the names of the tools bound to a model call."""
+    names = []
+    for tool in tools or []:
+        if isinstance(tool, dict):
+            names.append(tool.get("name") or tool.get("function", {}).get("name", ""))
+        else:
+            names.append(getattr(tool, "__name__", str(tool)))
+    return names
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Records every model call and its token usage."""
+
+    run_inline = True
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        record_llm_call(token_usage(response))
+
+
+class TraceCallbackHandler(BaseCallbackHandler):
+    """Adds the prompt and response of every model call to the request trace.
+
+    Calls are only captured while the current request is being recorded.
+    """
+
+    run_inline = True
+
+    def __init__(self) -> None:
+        self._pending: Dict[UUID, Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(
+            self,
+            serialized: Dict[str, Any],
+            messages: List[List[BaseMessage]],
+            *,
+            run_id: UUID,
+            **kwargs: Any) -> None:
+        if not tracing():
+            return
+        params = kwargs.get("invocation_params") or {}
+        call = {
+            "messages": [{"type": message.type, "content": message.content} for message in messages[0]],
+            "tools": tool_names(params.get("tools")),
+            "stop": params.get("stop"),
+        }
+        with self._lock:
+            self._pending[run_id] = (time.perf_counter(), call)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            pending = self._pending.pop(run_id, None)
+        if pending is None:
+            return
+        started_at, call = pending
+        message = getattr(response.generations[0][0], "message", None) if response.generations else None
+        record_event(
+            "llm",
+            **call,
+            response={
+                "content": getattr(message, "content", ""),
+                "tool_calls": [
+                    {"name": tool_call["name"], "args": tool_call["args"], "id": tool_call.get("id")}
+                    for tool_call in getattr(message, "tool_calls", None) or []
+                ],
+            },
+            usage=token_usage(response),
+            duration_ms=round((time.perf_counter() - started_at) * 1000, 1)
+        )
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            pending = self._pending.pop(run_id, None)
+        if pending is not None:
+            started_at, call = pending
+            record_event(
+                "llm", **call, error=str(error), duration_ms=round((time.perf_counter() - started_at) * 1000, 1)
+            )
@@ -1,5 +1,7 @@
 """Prompt templates for Census Data Agent."""
 
+from langchain.agents.mrkl.prompt import FORMAT_INSTRUCTIONS
+
 SQL_PREFIX = """You are an agent designed to interact with a SQL database.
 Given an input question, create a syntactically correct {dialect} query to run, then look at the results of the query and return the answer.
 Your answer will be shown alongside a chart visualizing the data and you must summarize the findings for a non-technical audience in 1-2 paragraphs.
@@ -11,83 +13,96 @@ You have access to tools for interacting with the database.
 Only use the below tools. Only use the information returned by the below tools to construct your final answer.
 You MUST double check your query before executing it. If you get an error while executing a query, rewrite the query and try again.
 
+Query the smallest table that can answer the question:
+- ny_census_data for New York counties
+- census_state_rollup for states or national totals
+- census_county_rollup for counties in other states or across states
+- census_tract_data only when the question needs census tracts, always filtered by year and state_code
+- census_values, filtered by variable_id, for ACS variables that are not a column of the tables above; find the variable_id by searching label and concept in census_variables
+census_tract_data and its rollups are empty until tract data has been loaded and then only hold the states and years loaded. If they return no rows, answer New York county questions from ny_census_data and say when data for other states is not available.
+
 DO NOT make any DML statements (INSERT, UPDATE, DELETE, DROP etc.) to the database.
 
 If the question does not seem related to the database, just return "I don't know" as the answer.
 """
 
-CHART_TYPE_DECISION_PROMPT = """Analyze the question and data to determine the most appropriate chart type.
+SCHEMA_PROMPT = """The complete database schema is listed below, with column descriptions and sample rows.
+Use it directly to write your query. You do not need to list the tables or look up their schema.
 
-Question: {question}
-Answer: {text_answer}
-Agent Execution Steps: {intermediate_steps}
+{table_info}
+"""
 
-Choose between BAR, SCATTER, and RADAR charts based on these guidelines:
+TABLE_OVERVIEW_PROMPT = """The database tables are listed below, with table descriptions.
+The columns and sample rows of the tables most relevant to each question are shown with the question.
 
-BAR CHARTS - Use when:
-- Single metric across multiple entities
-- Comparing categories (counties, states, demographics)
-- Ranking data (top 5, bottom 10, highest/lowest)
+{table_info}
+"""
 
-SCATTER PLOTS - Use when:
-- Showing relationships between two variables
-- Correlation analysis between different metrics
-- Questions asking about connections, correlations, trends
+RELEVANT_SCHEMA_PROMPT = """The database tables and columns most relevant to the question are listed below, with column descriptions and sample rows.
+Use them directly to write your query. Only look up the schema of another table if none of these can answer the question.
 
-RADAR CHARTS - Use when:
-- Comparing multiple entities across multiple dimensions/metrics
-- Multi-dimensional analysis (e.g., comparing counties on population, income, education, housing)
-- Questions asking for comprehensive comparisons or profiles
-- When you have 3+ metrics per entity that would benefit from a holistic view
+{table_info}
+"""
 
-Analyze the question intent and data structure from the agent's execution steps to make the best choice."""
+REACT_INSTRUCTIONS = """You have access to the following tools:
 
-BAR_CHART_DATA_PROMPT = """Extract data for a bar chart from this census query result.
+{tools}
 
-Question: {question}
-Answer: {text_answer}
-Agent Execution Steps: {intermediate_steps}
+""" + FORMAT_INSTRUCTIONS + """
 
-Create a bar chart structure:
-- Extract the main numeric values for comparison/ranking from the agent's execution steps
-- Create clear labels for each bar (counties, categories, etc.)
-- Generate meaningful axis titles and chart title
-- Focus on categorical comparisons and rankings
-- Use the full context from the agent's reasoning and SQL execution
+Begin!
 
-Output example: {output_example}
-"""
+Question: {input}
+Thought:{agent_scratchpad}"""
+
+FAST_PATH_SQL_PROMPT = """Answer the question below with a single SQL query, without using any tools.
 
-SCATTER_CHART_DATA_PROMPT = """Extract data for a scatter plot from this census query result.
+Write one read-only query against the schema above that returns exactly the data needed to answer the question, following the same rules for limits, ordering and column selection.
+If the query will return exactly one row, also write an answer template: 1-2 sentences for a non-technical audience using {{column_name}} placeholders for the selected columns.
+If the question cannot be answered from the database, leave the query empty.
 
 Question: {question}
-Answer: {text_answer}
-Agent Execution Steps: {intermediate_steps}
+"""
 
-Create a scatter plot structure:
-- Identify TWO numeric variables that show a relationship from the agent's execution steps
-- Extract x_values and y_values that demonstrate correlation
-- Create labels for each data point (counties, entities, etc.)
-- Generate meaningful axis titles that describe the relationship
-- Focus on showing patterns and correlations between variables
-- Use the full context from the agent's reasoning and SQL execution
+FAST_PATH_SUMMARY_PROMPT = """Summarize the result of this census query for a non-technical audience in 1-2 paragraphs.
+Your answer will be shown alongside a chart of the same data, so focus on the main findings.
 
-Output example: {output_example}
+Question: {question}
+SQL query: {sql}
+Query result:
+{rows}
 """
 
-RADAR_CHART_DATA_PROMPT = """Extract data for a radar chart from this census query result.
+CHART_DATA_PROMPT = """Create a chart visualizing the data from this census query result.
 
 Question: {question}
 Answer: {text_answer}
-Agent Execution Steps: {intermediate_steps}
-
-Create a radar chart structure:
-- Identify 1-5 entities (counties, areas, etc.) to compare
-- Extract 3-6 numeric metrics per entity from the agent's execution steps
-- Do NOT normalize or scale values
-- Create datasets array with label and data for each entity
-- Generate meaningful axis_titles for each dimension/metric
-- Use the full context from the agent's reasoning and SQL execution
-
-Output example: {output_example}
-"""
\ No newline at end of file
+{query_context}
+
+First choose the chart type that best fits the question intent and the structure of the query result, then extract the data for it. Set chart_type to the chosen type.
+
+BAR CHARTS (chart_type "bar") - Use when:
+- Single metric across multiple entities
+- Comparing categories (counties, states, demographics)
+- Ranking data (top 5, bottom 10, highest/lowest)
+Extract the main numeric values for comparison/ranking and create clear labels for each bar (counties, categories, etc.).
+
+SCATTER PLOTS (chart_type "scatter") - Use when:
+- Showing relationships between two variables
+- Correlation analysis between different metrics
+- Questions asking about connections, correlations, trends
+Identify TWO numeric variables that show a relationship, extract x_values and y_values, and create labels for each data point (counties, entities, etc.).
+
+RADAR CHARTS (chart_type "radar") - Use when:
+- Comparing multiple entities across multiple dimensions/metrics
+- Multi-dimensional analysis (e.g., comparing counties on population, income, education, housing)
+- Questions asking for comprehensive comparisons or profiles
+- When you have 3+ metrics per entity that would benefit from a holistic view
+Identify 1-5 entities to compare and extract 3-6 numeric metrics per entity. Do NOT normalize or scale values. Create a datasets array with label and data for each entity and meaningful axis_titles for each dimension/metric.
+
+For every chart type, generate meaningful axis titles and a chart title from the question, the answer and the SQL query.
+
+Bar chart example: {bar_example}
+Scatter chart example: {scatter_example}
+Radar chart example: {radar_example}
+"""
@@ -0,0 +1,106 @@
+"""Compact, token-budgeted rendering of query results for prompts.
+
+Prompts that need a query result get the SQL and a tab-separated table
+instead of the raw agent steps. Tables that would exceed the token budget
+keep their first rows, which carry the query's ordering, and summarize the
+omitted rows with the range and mean of every numeric column.
+"""
+
+from decimal import Decimal
+from langchain.agents.agent import AgentAction
+from typing import Any, List, Sequence, Tuple
+
+from agent.charts import find_last_query_result
+
+# Rough number of characters per token, used to enforce token budgets
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens of a text."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def format_cell(value: Any) -> str:
+    """Format a result value as a short table cell."""
+    if value is None:
+        return "NULL"
+    if isinstance(value, Decimal):
+        value = float(value)
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else f"{value:.4f}".rstrip("0").rstrip(".")
+    return str(value).replace("\t", " ").replace("\n", " ")
+
+
+def is_number(value: Any) -> bool:
+    return isinstance(value, (int, float, Decimal)) and not isinstance(value, bool)
+
+
+def summarize_columns(columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> List[str]:
+    """Describe the range and mean of each numeric column over all rows."""
+    lines = []
+    for index, column in enumerate(columns):
+        values = [row[index] for row in rows if row[index] is not None]
+        if not values or not all(is_number(value) for value in values):
+            continue
+        values = [float(value) for value in values]
+        lines.append(
+            f"{column}: min {format_cell(min(values))}, max {format_cell(max(values))}, "
+            f"mean {format_cell(sum(values) / len(values))}"
+        )
+    return lines
+
+
+def render_table(columns: Sequence[str], rows: Sequence[Sequence[Any]], max_tokens: int) -> str:
+    """Render a result as a tab-separated table within a token budget.
+
+    Args:
+        columns: Column names
+        rows: Result rows
+        max_tokens: Most tokens the table may take
+
+    Returns:
+        Header and rows, one per line; when not every row fits, the rows
+        that fit followed by the number of omitted rows and a summary of
+        the numeric columns over all rows
+    """
+    budget = max_tokens * CHARS_PER_TOKEN
+    lines = ["\t".join(columns)]
+    used = len(lines[0])
+    for row in rows:
+        line = "\t".join(format_cell(value) for value in row)
+        used += len(line) + 1
+        if used > budget:
+            break
+        lines.append(line)
+    else:
+        return "\n".join(lines)
+
+    summary = summarize_columns(columns, rows)
+    while True:
+        omitted = len(rows) - (len(lines) - 1)
+        note = f"... {omitted} more rows omitted" + (f". Over all {len(rows)} rows:" if summary else "")
+        text = "\n".join(lines + [note] + summary)
+        if len(text) <= budget or len(lines) == 1:
+            return text
+        lines.pop()
+
+
+def build_query_context(intermediate_steps: List[Tuple[AgentAction, str]], max_tokens: int) -> str:
+    """Render the final SQL query and its result set for a prompt.
+
+    Only the last query that returned rows is kept; the ReAct log, schema
+    lookups and earlier queries are left out.
+
+    Args:
+        intermediate_steps: Agent execution steps
+        max_tokens: Most tokens the result table may take
+
+    Returns:
+        SQL query and result table, or a note that no query returned rows
+    """
+    result = find_last_query_result(intermediate_steps)
+    if result is None:
+        return "No query returned rows."
+    table = render_table(result.columns, result.rows, max_tokens)
+    return f"SQL query: {result.query}\nResult ({len(result.rows)} rows):\n{table}"
@@ -0,0 +1,114 @@
+"""Per-question schema retrieval over the schema catalog.
+
+Table names, column names and their COMMENT descriptions are embedded as
+hashed n-gram vectors once per catalog. Each question then selects only the
+few most similar tables and columns, so the schema sent to the model stays
+roughly the same size however many tables and variables the database holds.
+"""
+
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from agent.similarity import normalize_text, vectorize, cosine_similarity
+from database.catalog import INTERNAL_TABLES, ColumnInfo, SchemaCatalog, SchemaSelection, TableInfo
+
+logger = logging.getLogger(__name__)
+
+# Table answering most questions, about New York counties, which is always selected
+PRIMARY_TABLE = "ny_census_data"
+
+# Tables scoring below this fraction of the best table are left out
+MIN_RELATIVE_TABLE_SCORE = 0.5
+
+# Column types of names and codes, which are kept to identify and join rows
+IDENTIFIER_TYPES = ("CHAR", "TEXT")
+
+
+def describe(name: str, comment: Optional[str]) -> str:
+    """Get the normalized text indexed for a table or column."""
+    return normalize_text(f"{name.replace('_', ' ')} {comment or ''}")
+
+
+def is_identifier(column: ColumnInfo) -> bool:
+    """Whether a column identifies rows rather than holding a metric."""
+    return column.primary_key or any(kind in column.type.upper() for kind in IDENTIFIER_TYPES)
+
+
+class SchemaIndex:
+    """Similarity index over the tables and columns of one catalog snapshot.
+
+    Columns are ranked by the similarity of their name and description to
+    the question, and tables by the better of their own description and
+    their best column. The primary table is always selected first, since
+    the tract and rollup tables share its column names and can outscore it
+    on questions it answers. Small tables are always rendered whole; larger
+    ones keep their key and name columns plus the most relevant metric
+    columns. Internal bookkeeping tables are not indexed.
+    """
+
+    def __init__(self, catalog: SchemaCatalog, max_tables: int, max_columns: int) -> None:
+        """Build the index.
+
+        Args:
+            catalog: Schema catalog to index
+            max_tables: Most tables selected per question
+            max_columns: Most metric columns kept per table, besides key and name columns
+        """
+        self.catalog = catalog
+        self.max_tables = max_tables
+        self.max_columns = max_columns
+        self._tables = {name: table for name, table in catalog.tables.items() if name not in INTERNAL_TABLES}
+        self._table_vectors = {
+            name: vectorize(describe(name, table.comment))
+            for name, table in self._tables.items()
+        }
+        self._column_vectors = {
+            name: [(column, vectorize(describe(column.name, column.comment))) for column in table.columns]
+            for name, table in self._tables.items()
+        }
+
+    def select(self, question: str) -> SchemaSelection:
+        """Select the tables and columns relevant to a question.
+
+        Args:
+            question: Natural language question
+
+        Returns:
+            SchemaSelection with the primary table and the best other tables,
+            best first, and the relevant columns of every table
+        """
+        query = vectorize(normalize_text(question))
+        table_scores: Dict[str, float] = {}
+        columns: Dict[str, List[str]] = {}
+
+        for name, table in self._tables.items():
+            scored = sorted(
+                ((cosine_similarity(query, vector), column) for column, vector in self._column_vectors[name]),
+                key=lambda item: item[0],
+                reverse=True
+            )
+            best_column = scored[0][0] if scored else 0.0
+            table_scores[name] = max(cosine_similarity(query, self._table_vectors[name]), best_column)
+            columns[name] = self._pick_columns(table, scored)
+
+        ranked = sorted(table_scores, key=lambda name: (-table_scores[name], name))
+        best = table_scores[ranked[0]] if ranked else 0.0
+        tables = [PRIMARY_TABLE] if PRIMARY_TABLE in self._tables else []
+        tables += [
+            name for name in ranked
+            if name != PRIMARY_TABLE and table_scores[name] >= best * MIN_RELATIVE_TABLE_SCORE
+        ]
+        tables = tables[:self.max_tables]
+
+        logger.info(f"Selected schema tables for question: {', '.join(tables)}")
+        return SchemaSelection(tables, columns)
+
+    def _pick_columns(self, table: TableInfo, scored: List[Tuple[float, ColumnInfo]]) -> List[str]:
+        """Pick the key, name and most relevant columns of a table, in table order."""
+        if len(table.columns) <= self.max_columns:
+            return [column.name for column in table.columns]
+
+        picked = {column.name for column in table.columns if is_identifier(column)}
+        relevant = [column.name for score, column in scored if score > 0 and column.name not in picked]
+        picked.update(relevant[:self.max_columns])
+        return [column.name for column in table.columns if column.name in picked]
@@ -0,0 +1,94 @@
+"""Local text similarity helpers for matching questions.
+
+Questions are normalized and embedded as sparse hashed n-gram vectors so
+that near-duplicate phrasings can be compared without any external
+embedding service.
+"""
+
+from typing import Dict
+import math
+import re
+import zlib
+
+VECTOR_DIMENSIONS = 2 ** 18
+
+WORD_WEIGHT = 1.0
+CHAR_NGRAM_WEIGHT = 0.5
+CHAR_NGRAM_SIZE = 3
+
+STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "could", "do",
+    "does", "for", "from", "give", "had", "has", "have", "in", "is", "it",
+    "list", "me", "of", "on", "please", "show", "tell", "that", "the",
+    "their", "there", "to", "us", "was", "were", "what", "whats", "which",
+    "who", "will", "with", "would", "you",
+})
+
+_NON_ALPHANUMERIC = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for comparison.
+
+    Lowercases, strips punctuation, drops stopwords and collapses whitespace,
+    so "What's the most populous county?" and "most populous county" match.
+
+    Args:
+        text: Raw text
+
+    Returns:
+        Normalized text
+    """
+    words = _NON_ALPHANUMERIC.sub(" ", text.lower().replace("'", "")).split()
+    return " ".join(word for word in words if word not in STOPWORDS)
+
+
+def singularize(word: str) -> str:
+    """Crudely singularize a lowercase word, e.g. "counties" to "county"."""
+    if word.isdigit() or len(word) <= 3:
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def _bucket(feature: str) -> int:
+    return zlib.crc32(feature.encode("utf-8")) % VECTOR_DIMENSIONS
+
+
+def vectorize(normalized: str) -> Dict[int, float]:
+    """Embed normalized text as an L2-normalized sparse hashed n-gram vector.
+
+    Uses word unigrams plus character trigrams, which makes the vector
+    tolerant to small wording and spelling differences.
+
+    Args:
+        normalized: Text returned by normalize_text
+
+    Returns:
+        Mapping of hash bucket to weight
+    """
+    vector: Dict[int, float] = {}
+
+    for word in normalized.split():
+        bucket = _bucket(f"w:{word}")
+        vector[bucket] = vector.get(bucket, 0.0) + WORD_WEIGHT
+
+    padded = f" {normalized} "
+    for start in range(len(padded) - CHAR_NGRAM_SIZE + 1):
+        bucket = _bucket(f"c:{padded[start:start + CHAR_NGRAM_SIZE]}")
+        vector[bucket] = vector.get(bucket, 0.0) + CHAR_NGRAM_WEIGHT
+
+    norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+    if norm == 0:
+        return {}
+    return {bucket: weight / norm for bucket, weight in vector.items()}
+
+
+def cosine_similarity(left: Dict[int, float], right: Dict[int, float]) -> float:
+    """Cosine similarity of two L2-normalized sparse vectors."""
+    if len(left) > len(right):
+        left, right = right, left
+    return sum(weight * right.get(bucket, 0.0) for bucket, weight in left.items())
@@ -0,0 +1,77 @@
+"""Single-flight coalescing of concurrent identical calls."""
+
+from typing import Awaitable, Callable, Dict, Generic, Hashable, TypeVar
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class Flight(Generic[T]):
+    """An in-flight execution and the number of callers waiting on it."""
+
+    def __init__(self, task: "asyncio.Task[T]") -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight(Generic[T]):
+    """Runs concurrent calls with the same key as one shared execution.
+
+    The first caller for a key starts the execution as a task; callers
+    arriving while it runs wait on the same task and receive its result, or
+    its exception. A cancelled caller stops waiting without affecting the
+    others, and the execution itself is only cancelled once every caller
+    waiting on it has been cancelled. Keys are forgotten as soon as their
+    execution finishes, so results are never reused afterwards.
+    """
+
+    def __init__(self) -> None:
+        self.executions = 0
+        self.coalesced = 0
+        self._flights: Dict[Hashable, Flight[T]] = {}
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        """Run `factory` for a key, or join the execution already in flight.
+
+        Args:
+            key: Key identifying identical calls
+            factory: Coroutine function performing the call
+
+        Returns:
+            The result of the shared execution
+
+        Raises:
+            Exception: Whatever the shared execution raised
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = Flight(asyncio.ensure_future(factory()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+            logger.info("Joining in-flight execution of an identical question")
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+
+    def in_flight(self) -> int:
+        """Get the number of executions currently running."""
+        return len(self._flights)
+
+    def stats(self) -> Dict[str, int]:
+        """Get the numbers of executions, coalesced calls and running executions."""
+        return {"executions": self.executions, "coalesced": self.coalesced, "in_flight": self.in_flight()}
+
+    def _forget(self, key: Hashable, flight: Flight[T]) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
@@ -0,0 +1,555 @@
+"""Verified question-to-SQL templates that answer common questions without the LLM.
+
+Questions are tokenized and matched against a vocabulary built from the
+`ny_census_data` columns and county names. A question is only answered
+from a template when every word in it is explained by a slot (a metric or
+a county), a number or a known intent keyword, so anything the templates
+do not fully understand still goes to the LLM.
+
+Besides the built-in templates, the library learns new ones from logged
+agent runs: when the same question shape has produced the same
+parameterized SQL often enough, later questions of that shape are
+answered by substituting their slots into the verified SQL.
+"""
+
+from langchain.agents.agent import AgentAction
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from datetime import datetime, timezone
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+import threading
+
+from database.cache import normalize_sql, is_read_query
+from database.manager import db_manager
+from database.results import ColumnarResult
+from agent.charts import QUERY_TOOL_NAME, MAX_RADAR_ENTITIES, MAX_RADAR_METRICS, ParsedResult, humanize, build_chart_from_result, build_query_result, parse_observation
+from agent.fast_path import format_value
+from agent.similarity import STOPWORDS, singularize
+from api.models import AgentResponse, AnswerPath
+
+logger = logging.getLogger(__name__)
+
+CENSUS_TABLE = "ny_census_data"
+COUNTY_COLUMN = "county_name"
+
+DEFAULT_TOP_N = 10
+MAX_TOP_N = 100
+MIN_CORRELATION_ROWS = 3
+
+_NUMERIC_TYPES = ("INT", "REAL", "FLOAT", "DOUBLE", "NUMERIC", "DECIMAL")
+_NON_METRIC_COLUMNS = {"id", "state_code", "county_code"}
+
+METRIC_ALIASES = {
+    "population": "total_population",
+    "populous": "total_population",
+    "people": "total_population",
+    "income": "median_household_income",
+    "household income": "median_household_income",
+    "median income": "median_household_income",
+    "housing": "total_housing_units",
+    "housing units": "total_housing_units",
+    "homeowners": "owner_occupied_units",
+    "owner occupied": "owner_occupied_units",
+    "renters": "renter_occupied_units",
+    "renter occupied": "renter_occupied_units",
+    "bachelors": "bachelors_degree_holders",
+    "bachelors degrees": "bachelors_degree_holders",
+    "college graduates": "bachelors_degree_holders",
+    "graduate degrees": "graduate_degree_holders",
+    "high school graduates": "high_school_graduates",
+    "unemployment": "unemployed_count",
+    "unemployed": "unemployed_count",
+    "unemployed people": "unemployed_count",
+    "earnings": "median_earnings",
+    "age": "median_age",
+    "children": "population_under_18",
+    "under 18": "population_under_18",
+    "adults": "population_18_and_over",
+    "white": "white_alone",
+    "black": "black_alone",
+    "hispanic": "hispanic_latino",
+    "latino": "hispanic_latino",
+    "home value": "median_home_value",
+    "house value": "median_home_value",
+    "home prices": "median_home_value",
+    "house prices": "median_home_value",
+}
+
+COMPARE_DEFAULT_METRICS = ("total_population", "median_household_income", "median_age", "median_home_value")
+
+DESCENDING_WORDS = {"top", "highest", "largest", "most", "biggest", "greatest", "max", "maximum"}
+ASCENDING_WORDS = {"bottom", "lowest", "smallest", "least", "fewest", "min", "minimum"}
+CORRELATION_WORDS = {"correlation", "correlate", "correlated", "relationship", "relate", "related"}
+COMPARE_WORDS = {"compare", "comparison", "versus", "vs", "between", "difference", "differ"}
+FILLER_WORDS = {
+    "county", "state", "ny", "new", "york", "by", "rank", "ranked", "ranking",
+    "name", "value", "number", "data", "census", "across", "among", "all", "one",
+}
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+_PLACEHOLDER_PATTERN = re.compile(r"\{(metric|county|n)_(\d+)\}")
+_LIMIT_PATTERN = re.compile(r"\blimit\s+(\d+)\b", re.IGNORECASE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase, singularized words without stopwords."""
+    words = _WORD_PATTERN.findall(text.lower().replace("'", ""))
+    return [singularize(word) for word in words if word not in STOPWORDS]
+
+
+def quote_literal(value: str) -> str:
+    """Quote a string as a SQL literal."""
+    return "'" + value.replace("'", "''") + "'"
+
+
+class Slots:
+    """Metrics, counties and numbers extracted from a question, in order."""
+
+    def __init__(self) -> None:
+        self.metrics: List[str] = []
+        self.counties: List[str] = []
+        self.numbers: List[int] = []
+        self.keywords: List[str] = []
+        self.unknown: List[str] = []
+        self.shape: List[str] = []
+
+
+class Vocabulary:
+    """Phrases of the census table mapped to metric columns and county names."""
+
+    def __init__(self, metric_columns: List[str], county_names: List[str]) -> None:
+        self.metric_columns = metric_columns
+        self.county_names = county_names
+        self.phrases: Dict[Tuple[str, ...], Tuple[str, str]] = {}
+
+        for column in metric_columns:
+            self._add(column.replace("_", " "), "metric", column)
+        for alias, column in METRIC_ALIASES.items():
+            if column in metric_columns:
+                self._add(alias, "metric", column)
+        for county in county_names:
+            self._add(county, "county", county)
+            short_name = county[:-len(" County")] if county.lower().endswith(" county") else None
+            if short_name and not set(tokenize(short_name)) <= FILLER_WORDS:
+                self._add(short_name, "county", county)
+
+        self.max_phrase_length = max((len(phrase) for phrase in self.phrases), default=1)
+
+    def _add(self, phrase: str, kind: str, value: str) -> None:
+        tokens = tuple(tokenize(phrase))
+        if tokens:
+            self.phrases.setdefault(tokens, (kind, value))
+
+    def extract(self, question: str) -> Slots:
+        """Extract slots from a question with greedy longest-phrase matching.
+
+        Args:
+            question: Natural language question
+
+        Returns:
+            Slots, including the words that matched nothing and the question
+            shape with slot values replaced by placeholders
+        """
+        tokens = tokenize(question)
+        slots = Slots()
+        position = 0
+
+        while position < len(tokens):
+            match = None
+            for length in range(min(self.max_phrase_length, len(tokens) - position), 0, -1):
+                match = self.phrases.get(tuple(tokens[position:position + length]))
+                if match is not None:
+                    break
+
+            if match is not None:
+                kind, value = match
+                target = slots.metrics if kind == "metric" else slots.counties
+                if value not in target:
+                    target.append(value)
+                slots.shape.append(f"{{{kind}_{target.index(value)}}}")
+                position += length
+                continue
+
+            token = tokens[position]
+            if token.isdigit():
+                slots.numbers.append(int(token))
+                slots.shape.append(f"{{n_{len(slots.numbers) - 1}}}")
+            else:
+                known = token in DESCENDING_WORDS | ASCENDING_WORDS | CORRELATION_WORDS | COMPARE_WORDS
+                if known:
+                    slots.keywords.append(token)
+                elif token not in FILLER_WORDS:
+                    slots.unknown.append(token)
+                slots.shape.append(token)
+            position += 1
+
+        return slots
+
+
+class TemplateMatch:
+    """A template selected for a question, with its SQL ready to run."""
+
+    def __init__(self, name: str, sql: str, slots: Slots, **params: Any) -> None:
+        self.name = name
+        self.sql = sql
+        self.slots = slots
+        self.params = params
+
+
+class TemplateLibrary:
+    """Answers common questions from verified SQL templates.
+
+    Built-in templates cover ranking counties by a metric, comparing
+    counties and correlating two metrics. Learned templates come from
+    successful agent runs, optionally persisted to a JSONL log so they
+    survive restarts, and are only used once the same question shape has
+    produced the same parameterized SQL `min_runs` times.
+    """
+
+    def __init__(self, log_path: Optional[str] = None, min_runs: int = 2) -> None:
+        """Initialize the template library.
+
+        Args:
+            log_path: JSONL file of successful agent runs to learn from and append to
+            min_runs: Consistent agent runs needed before a learned template is used
+        """
+        self.log_path = log_path
+        self.min_runs = min_runs
+        self._vocabulary: Optional[Vocabulary] = None
+        self._data_version: Optional[int] = None
+        self._observations: Dict[Tuple[str, ...], Dict[str, int]] = {}
+        self._logged_runs: List[Tuple[str, str]] = []
+        self._lock = threading.Lock()
+
+        if log_path and os.path.exists(log_path):
+            with open(log_path, encoding="utf-8") as log_file:
+                for line in log_file:
+                    try:
+                        run = json.loads(line)
+                        self._logged_runs.append((run["question"], run["sql"]))
+                    except (ValueError, KeyError):
+                        logger.warning(f"Skipping malformed template log line in {log_path}")
+            logger.info(f"Loaded {len(self._logged_runs)} logged agent runs from {log_path}")
+
+    async def answer(self, question: str, data_version: int) -> Optional[AgentResponse]:
+        """Answer a question from a template if one matches with full confidence.
+
+        Args:
+            question: Natural language question
+            data_version: Current data load version
+
+        Returns:
+            AgentResponse with answer and chart data, or None if no template matches
+        """
+        vocabulary = await self._get_vocabulary(data_version)
+        if vocabulary is None:
+            return None
+
+        match = self.match(question, vocabulary)
+        if match is None:
+            return None
+
+        result = await db_manager.aexecute_query_columnar(match.sql)
+        if not len(result):
+            return None
+
+        text_answer = self._render_answer(match, result)
+        if text_answer is None:
+            return None
+        logger.info(f"Answered question from template {match.name}")
+
+        return AgentResponse(
+            text_answer=text_answer,
+            data=build_chart_from_result(ParsedResult(result.columns, result.rows())),
+            question=question,
+            status="success",
+            path=AnswerPath.template,
+            result=build_query_result(result.columns, result.arrays)
+        )
+
+    def match(self, question: str, vocabulary: Vocabulary) -> Optional[TemplateMatch]:
+        """Select a built-in or learned template for a question.
+
+        Args:
+            question: Natural language question
+            vocabulary: Vocabulary of the census table
+
+        Returns:
+            TemplateMatch, or None if no template fits the question
+        """
+        slots = vocabulary.extract(question)
+        if not slots.unknown:
+            match = self._match_builtin(slots, vocabulary)
+            if match is not None:
+                return match
+        return self._match_learned(slots)
+
+    async def record(self, question: str, intermediate_steps: List[Tuple[AgentAction, str]], data_version: int) -> None:
+        """Record a successful agent run so its SQL can become a template.
+
+        Args:
+            question: Question the agent answered
+            intermediate_steps: Agent execution steps
+            data_version: Current data load version
+        """
+        sql = self._final_query(intermediate_steps)
+        if sql is None:
+            return
+
+        vocabulary = await self._get_vocabulary(data_version)
+        if vocabulary is None:
+            return
+
+        with self._lock:
+            if not self._observe(self._observations, vocabulary, question, sql):
+                return
+            self._logged_runs.append((question, sql))
+
+        if self.log_path:
+            await asyncio.to_thread(self._append_log, question, sql)
+
+    async def _get_vocabulary(self, data_version: int) -> Optional[Vocabulary]:
+        """Get the vocabulary, rebuilding it when the data has been reloaded."""
+        if self._vocabulary is not None and self._data_version == data_version:
+            return self._vocabulary
+
+        table = db_manager.catalog.get_table(CENSUS_TABLE)
+        if table is None:
+            return None
+
+        metric_columns = [
+            column.name for column in table.columns
+            if column.name not in _NON_METRIC_COLUMNS
+            and any(numeric in column.type.upper() for numeric in _NUMERIC_TYPES)
+        ]
+        counties = await db_manager.aexecute_query_columnar(
+            f"SELECT DISTINCT {COUNTY_COLUMN} FROM {CENSUS_TABLE} WHERE {COUNTY_COLUMN} IS NOT NULL"
+        )
+        vocabulary = Vocabulary(metric_columns, list(counties.column(COUNTY_COLUMN)))
+
+        with self._lock:
+            observations: Dict[Tuple[str, ...], Dict[str, int]] = {}
+            for logged_question, logged_sql in self._logged_runs:
+                self._observe(observations, vocabulary, logged_question, logged_sql)
+            self._observations = observations
+            self._vocabulary = vocabulary
+            self._data_version = data_version
+
+        return vocabulary
+
+    def _match_builtin(self, slots: Slots, vocabulary: Vocabulary) -> Optional[TemplateMatch]:
+        """Match a fully understood question against the built-in templates."""
+        keywords = set(slots.keywords)
+        descending = bool(keywords & DESCENDING_WORDS)
+        ascending = bool(keywords & ASCENDING_WORDS)
+
+        if keywords & CORRELATION_WORDS:
+            if len(slots.metrics) != 2 or slots.counties or slots.numbers or descending or ascending:
+                return None
+            x, y = slots.metrics
+            sql = (
+                f"SELECT {COUNTY_COLUMN}, {x}, {y} FROM {CENSUS_TABLE} "
+                f"WHERE {x} IS NOT NULL AND {y} IS NOT NULL ORDER BY {COUNTY_COLUMN}"
+            )
+            return TemplateMatch("correlation", sql, slots)
+
+        if len(slots.counties) >= 2:
+            if descending or ascending or slots.numbers or len(slots.counties) > MAX_RADAR_ENTITIES:
+                return None
+            metrics = slots.metrics or [
+                column for column in COMPARE_DEFAULT_METRICS if column in vocabulary.metric_columns
+            ]
+            if not metrics or len(metrics) > MAX_RADAR_METRICS:
+                return None
+            counties = ", ".join(quote_literal(county) for county in slots.counties)
+            sql = (
+                f"SELECT {COUNTY_COLUMN}, {', '.join(metrics)} FROM {CENSUS_TABLE} "
+                f"WHERE {COUNTY_COLUMN} IN ({counties}) ORDER BY {COUNTY_COLUMN}"
+            )
+            return TemplateMatch("compare", sql, slots, metrics=metrics)
+
+        if descending != ascending and len(slots.metrics) == 1 and not slots.counties and len(slots.numbers) <= 1:
+            limit = slots.numbers[0] if slots.numbers else None
+            if limit is None:
+                limit = DEFAULT_TOP_N if "top" in keywords or "bottom" in keywords else 1
+            if not 0 < limit <= MAX_TOP_N:
+                return None
+            metric = slots.metrics[0]
+            order = "DESC" if descending else "ASC"
+            sql = (
+                f"SELECT {COUNTY_COLUMN}, {metric} FROM {CENSUS_TABLE} "
+                f"WHERE {metric} IS NOT NULL ORDER BY {metric} {order} LIMIT {limit}"
+            )
+            return TemplateMatch("top_n", sql, slots, descending=descending)
+
+        return None
+
+    def _match_learned(self, slots: Slots) -> Optional[TemplateMatch]:
+        """Match a question shape against templates learned from agent runs."""
+        with self._lock:
+            observations = self._observations.get(tuple(slots.shape))
+            if not observations:
+                return None
+            sql_template, runs = max(observations.items(), key=lambda item: item[1])
+
+        if runs < self.min_runs:
+            return None
+
+        values = {
+            "metric": slots.metrics,
+            "county": [quote_literal(county) for county in slots.counties],
+            "n": [str(number) for number in slots.numbers],
+        }
+        sql = _PLACEHOLDER_PATTERN.sub(lambda match: values[match.group(1)][int(match.group(2))], sql_template)
+        return TemplateMatch("learned", sql, slots)
+
+    def _parameterize(self, vocabulary: Vocabulary, question: str, sql: str) -> Optional[Tuple[Tuple[str, ...], str]]:
+        """Parameterize an agent query by the question's slots.
+
+        A run can only be learned when every slot value of the question
+        appears in the SQL, so the template generalizes to other values.
+
+        Returns:
+            Question shape and SQL template, or None if the run cannot be learned
+        """
+        if not is_read_query(normalize_sql(sql)):
+            return None
+
+        slots = vocabulary.extract(question)
+        if not (slots.metrics or slots.counties):
+            return None
+
+        template = sql
+        for index, county in enumerate(slots.counties):
+            literal = quote_literal(county)
+            if literal not in template:
+                return None
+            template = template.replace(literal, f"{{county_{index}}}")
+        for index, metric in enumerate(slots.metrics):
+            template, count = re.subn(rf"\b{re.escape(metric)}\b", f"{{metric_{index}}}", template)
+            if not count:
+                return None
+        for index, number in enumerate(slots.numbers):
+            limit = next((match for match in _LIMIT_PATTERN.finditer(template) if int(match.group(1)) == number), None)
+            if limit is None:
+                return None
+            template = template[:limit.start(1)] + f"{{n_{index}}}" + template[limit.end(1):]
+
+        return tuple(slots.shape), template
+
+    def _observe(
+            self,
+            observations: Dict[Tuple[str, ...], Dict[str, int]],
+            vocabulary: Vocabulary,
+            question: str,
+            sql: str) -> bool:
+        """Count a run towards its learned template. Returns whether it was learned."""
+        learned = self._parameterize(vocabulary, question, sql)
+        if learned is None:
+            return False
+        shape, template = learned
+        runs = observations.setdefault(shape, {})
+        runs[template] = runs.get(template, 0) + 1
+        return True
+
+    def _append_log(self, question: str, sql: str) -> None:
+        """Append a successful agent run to the template log."""
+        run = {
+            "question": question,
+            "sql": sql,
+            "recorded_at": datetime.now(timezone.utc).isoformat()
+        }
+        with open(self.log_path, "a", encoding="utf-8") as log_file:
+            log_file.write(json.dumps(run) + "\n")
+
+    def _final_query(self, intermediate_steps: List[Tuple[AgentAction, str]]) -> Optional[str]:
+        """Get the last query in the agent steps that returned rows."""
+        for action, observation in reversed(intermediate_steps):
+            if action.tool == QUERY_TOOL_NAME and parse_observation(str(observation)) is not None:
+                return action.tool_input if isinstance(action.tool_input, str) else None
+        return None
+
+    def _render_answer(self, match: TemplateMatch, result: ColumnarResult) -> Optional[str]:
+        """Write the text answer for a template result."""
+        if match.name == "top_n":
+            return self._render_top_n(match, result)
+        if match.name == "compare":
+            return self._render_compare(match, result)
+        if match.name == "correlation":
+            return self._render_correlation(match, result)
+        return self._render_table(result)
+
+    def _render_top_n(self, match: TemplateMatch, result: ColumnarResult) -> str:
+        metric = match.slots.metrics[0]
+        label = humanize(metric).lower()
+        extreme = "highest" if match.params["descending"] else "lowest"
+        ranking = list(zip(result.column(COUNTY_COLUMN), result.column(metric)))
+
+        if len(ranking) == 1:
+            county, value = ranking[0]
+            return f"{county} has the {extreme} {label}, at {format_value(value)}."
+
+        lines = [f"The {len(ranking)} counties with the {extreme} {label} are:"]
+        lines.extend(
+            f"{rank}. {county}: {format_value(value)}"
+            for rank, (county, value) in enumerate(ranking, start=1)
+        )
+        return "\n".join(lines)
+
+    def _render_compare(self, match: TemplateMatch, result: ColumnarResult) -> str:
+        metrics = match.params["metrics"]
+        counties = list(result.column(COUNTY_COLUMN))
+        missing = [county for county in match.slots.counties if county not in counties]
+
+        lines = [f"Comparison of {' and '.join(counties)}:"]
+        for index, county in enumerate(counties):
+            values = ", ".join(f"{humanize(metric)} {format_value(result.column(metric)[index])}" for metric in metrics)
+            lines.append(f"- {county}: {values}")
+        if missing:
+            lines.append(f"No data was found for {', '.join(missing)}.")
+        return "\n".join(lines)
+
+    def _render_correlation(self, match: TemplateMatch, result: ColumnarResult) -> Optional[str]:
+        x, y = match.slots.metrics
+        r = pearson_correlation(result.column(x), result.column(y))
+        if r is None:
+            return None
+
+        if abs(r) < 0.2:
+            relationship = "little or no linear relationship"
+        else:
+            strength = "strong" if abs(r) >= 0.7 else "moderate" if abs(r) >= 0.4 else "weak"
+            relationship = f"a {strength} {'positive' if r > 0 else 'negative'} linear relationship"
+        return (
+            f"Across {len(result)} counties, the correlation between {humanize(x).lower()} and "
+            f"{humanize(y).lower()} is {r:.2f}, indicating {relationship}."
+        )
+
+    def _render_table(self, result: ColumnarResult) -> str:
+        if len(result) == 1 and len(result.columns) == 1:
+            return f"{humanize(result.columns[0])}: {format_value(result.arrays[0][0])}"
+
+        lines = []
+        for record in result.iter_records():
+            lines.append("- " + ", ".join(f"{humanize(column)}: {format_value(value)}" for column, value in record.items()))
+        return "\n".join(lines)
+
+
+def pearson_correlation(xs: Sequence[Any], ys: Sequence[Any]) -> Optional[float]:
+    """Pearson correlation coefficient, or None if it is undefined."""
+    if len(xs) < MIN_CORRELATION_ROWS:
+        return None
+    xs = [float(x) for x in xs]
+    ys = [float(y) for y in ys]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    variance_x = sum((x - mean_x) ** 2 for x in xs)
+    variance_y = sum((y - mean_y) ** 2 for y in ys)
+    if variance_x == 0 or variance_y == 0:
+        return None
+    return covariance / math.sqrt(variance_x * variance_y)
@@ -0,0 +1,29 @@
+"""Response compression for the API."""
+
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+from typing import Iterable
+
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """GZip middleware that leaves streaming endpoints uncompressed.
+
+    Starlette's gzip responder only emits compressed bytes as its buffer
+    fills, which would hold back Server-Sent Events until the stream ends,
+    so the given paths are passed through untouched.
+    """
+
+    def __init__(
+            self,
+            app: ASGIApp,
+            minimum_size: int = 500,
+            compresslevel: int = 9,
+            excluded_paths: Iterable[str] = ()) -> None:
+        super().__init__(app, minimum_size=minimum_size, compresslevel=compresslevel)
+        self.excluded_paths = frozenset(excluded_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
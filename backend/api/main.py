@@ -2,9 +2,16 @@
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+import asyncio
 import logging
 
+from agent.agent import data_agent
+from api.compression import SelectiveGZipMiddleware
 from api.routes import router
+from config import settings
+from database.manager import db_manager
+from metrics import registry
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -23,12 +30,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(
+    SelectiveGZipMiddleware,
+    minimum_size=settings.response_gzip_min_bytes,
+    compresslevel=settings.response_gzip_level,
+    excluded_paths=["/ask/stream", "/ask/batch"]
+)
+
 app.include_router(router)
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> PlainTextResponse:
+    """Expose latency, token and query metrics in the Prometheus text format."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.on_event("startup")
 async def startup_event():
     logger.info("Starting Census Data Agent API")
+    catalog = await asyncio.to_thread(lambda: db_manager.catalog)
+    logger.info(f"Schema catalog ready with tables: {', '.join(catalog.table_names())}")
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    logger.info("Shutting down Census Data Agent API")
\ No newline at end of file
+    logger.info("Shutting down Census Data Agent API")
+    if data_agent.trace_recorder is not None:
+        await asyncio.to_thread(data_agent.trace_recorder.close)
\ No newline at end of file
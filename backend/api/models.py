@@ -1,7 +1,7 @@
 """API models for data-agent."""
 
-from pydantic import BaseModel, Field, computed_field
-from typing import List, Optional, Union
+from pydantic import BaseModel, Field
+from typing import Annotated, Any, Dict, List, Literal, Optional, Union
 from enum import StrEnum, auto
 
 
@@ -15,20 +15,18 @@ class ChartType(StrEnum):
 class BarChartData(BaseModel):
     """Pydantic model for bar chart data."""
     
+    chart_type: Literal[ChartType.bar] = Field(description="Chart type, always 'bar'")
     values: List[float] = Field(description="Numeric values for the bars")
     labels: List[str] = Field(description="Labels for each bar")
     x_axis_title: str = Field(description="Title for x-axis")
     y_axis_title: str = Field(description="Title for y-axis") 
     chart_title: str = Field(description="Main chart title")
-
-    @computed_field
-    def chart_type(self) -> ChartType:
-        return ChartType.bar
     
     @classmethod
     def get_output_example(cls) -> str:
         return """
         {
+            "chart_type": "bar",
             "values": [1000000, 850000, 750000, 600000, 500000],
             "labels": ["Kings County", "Queens County", "New York County", "Suffolk County", "Bronx County"],
             "x_axis_title": "County",
@@ -40,21 +38,19 @@ class BarChartData(BaseModel):
 class ScatterChartData(BaseModel):
     """Pydantic model for scatter chart data."""
     
+    chart_type: Literal[ChartType.scatter] = Field(description="Chart type, always 'scatter'")
     x_values: List[float] = Field(description="X-axis numeric values")
     y_values: List[float] = Field(description="Y-axis numeric values")
     labels: List[str] = Field(description="Labels for each data point")
     x_axis_title: str = Field(description="Title for x-axis")
     y_axis_title: str = Field(description="Title for y-axis")
     chart_title: str = Field(description="Main chart title")
-
-    @computed_field
-    def chart_type(self) -> ChartType:
-        return ChartType.scatter
     
     @classmethod
     def get_output_example(cls) -> str:
         return """
         {
+            "chart_type": "scatter",
             "x_values": [45000, 55000, 65000, 75000, 85000],
             "y_values": [25, 30, 35, 40, 45],
             "labels": ["Kings County", "Queens County", "New York County", "Suffolk County", "Bronx County"],
@@ -73,18 +69,16 @@ class RadarDataset(BaseModel):
 class RadarChartData(BaseModel):
     """Pydantic model for radar chart data."""
     
+    chart_type: Literal[ChartType.radar] = Field(description="Chart type, always 'radar'")
     datasets: List[RadarDataset] = Field(description="Radar chart datasets with labels and data")
     axis_titles: List[str] = Field(description="Names of the radar chart axes/dimensions")
     chart_title: str = Field(description="Main chart title")
-
-    @computed_field
-    def chart_type(self) -> ChartType:
-        return ChartType.radar
     
     @classmethod
     def get_output_example(cls) -> str:
         return """
         {
+            "chart_type": "radar",
             "datasets": [
                 {"label": "Kings County", "data": [1000000, 100000, 10000, 1000, 100]},
                 {"label": "Queens County", "data": [500000, 50000, 5000, 500, 50]}
@@ -95,14 +89,66 @@ class RadarChartData(BaseModel):
         """
 
 
-ChartData = Union[BarChartData, ScatterChartData, RadarChartData]
+ChartData = Annotated[
+    Union[BarChartData, ScatterChartData, RadarChartData],
+    Field(discriminator="chart_type")
+]
+
+
+class ChartSpec(BaseModel):
+    """Chart visualizing a census query result, using the chart type that best fits the data."""
+    
+    chart: ChartData = Field(description="Chart data; chart_type selects bar, scatter or radar")
+
+
+class SQLQueryPlan(BaseModel):
+    """Single SQL query that answers a census question directly."""
+    
+    sql: Optional[str] = Field(
+        description="One read-only PostgreSQL SELECT query answering the question; empty if the database cannot answer it",
+        default=None
+    )
+    answer_template: Optional[str] = Field(
+        description=(
+            "Only if the query returns exactly one row: a 1-2 sentence answer for a non-technical "
+            "audience with {column_name} placeholders for the selected columns; otherwise empty"
+        ),
+        default=None
+    )
+
+
+class AnswerPath(StrEnum):
+    """Enumeration of pipelines that can answer a question."""
+    cache = auto()
+    template = auto()
+    fast_path = auto()
+    agent = auto()
+
+
+class ResponseFormat(StrEnum):
+    """Enumeration of encodings for the answer endpoints."""
+    json = auto()
+    columnar = auto()
+
+
+class QueryResult(BaseModel):
+    """Raw result of the query behind an answer, with one value array per column."""
+    
+    columns: List[str] = Field(description="Column names")
+    values: List[List[Any]] = Field(description="One array of values per column, in column order")
+    row_count: int = Field(description="Number of rows")
 
 
-class ChartTypeDecision(BaseModel):
-    """Model for structured chart type selection."""
+class TimingBreakdown(BaseModel):
+    """Where the time of one answer went."""
     
-    chart_type: ChartType = Field(description="The recommended chart type for the data")
-    reasoning: str = Field(description="Brief explanation for why this chart type was chosen")
+    total_ms: float = Field(description="Time to answer the question, in milliseconds")
+    stages: Dict[str, float] = Field(description="Time spent in each stage, in milliseconds")
+    sql_queries: int = Field(description="Number of SQL queries run or served from the query cache")
+    sql_ms: float = Field(description="Time spent in SQL queries, in milliseconds")
+    llm_calls: int = Field(description="Number of LLM calls")
+    tokens: Dict[str, int] = Field(description="LLM tokens used, by kind")
+    agent_iterations: int = Field(description="Tool calls made by the ReAct agent")
 
 
 class QuestionRequest(BaseModel):
@@ -118,4 +164,80 @@ class AgentResponse(BaseModel):
     data: Optional[ChartData] = Field(description="Chart data if available", default=None)
     question: str = Field(description="Original question")
     status: str = Field(description="Response status", default="success")
-    error: Optional[str] = Field(description="Error message if status is error", default=None)
\ No newline at end of file
+    error: Optional[str] = Field(description="Error message if status is error", default=None)
+    path: Optional[AnswerPath] = Field(description="Pipeline that produced the answer", default=None)
+    result: Optional[QueryResult] = Field(description="Raw query result, only sent with the columnar format", default=None)
+    timings: Optional[TimingBreakdown] = Field(description="Timing breakdown, only sent when requested", default=None)
+
+
+class BatchQuestionRequest(BaseModel):
+    """Request model for answering many questions in one call."""
+    
+    questions: List[QuestionRequest] = Field(description="Questions to answer", min_length=1)
+    max_concurrency: Optional[int] = Field(
+        description="Most questions answered at the same time, capped by the server limit",
+        default=None,
+        ge=1
+    )
+
+
+class BatchEventType(StrEnum):
+    """Enumeration of events emitted by the batch endpoint."""
+    item = auto()
+    done = auto()
+
+
+class BatchItem(BaseModel):
+    """The response to one question of a batch."""
+    
+    index: int = Field(description="Position of the question in the batch request")
+    response: AgentResponse = Field(description="Response to the question")
+
+
+class BatchSummary(BaseModel):
+    """Totals sent once every question of a batch has been answered."""
+    
+    total: int = Field(description="Number of questions answered")
+    errors: int = Field(description="Number of questions answered with an error")
+
+
+class StreamEventType(StrEnum):
+    """Enumeration of events emitted by the streaming endpoint."""
+    tool_call = auto()
+    tool_result = auto()
+    token = auto()
+    chart = auto()
+    response = auto()
+
+
+class ToolCallEvent(BaseModel):
+    """A tool invocation chosen by the agent."""
+    
+    tool: str = Field(description="Name of the tool being called")
+    tool_input: str = Field(description="Input passed to the tool, e.g. the SQL query")
+
+
+class ToolResultEvent(BaseModel):
+    """The observation returned by a tool."""
+    
+    tool: str = Field(description="Name of the tool that produced the result")
+    output: str = Field(description="Raw tool output, e.g. the query result rows")
+
+
+class TokenEvent(BaseModel):
+    """A chunk of the streamed text answer."""
+    
+    text: str = Field(description="Text fragment of the final answer")
+
+
+class StreamEvent(BaseModel):
+    """Typed event emitted while a question is being answered.
+    
+    The stream always ends with a `response` event carrying the complete
+    AgentResponse, so clients can rely on it as the source of truth.
+    """
+    
+    event: StreamEventType = Field(description="Type of the event")
+    data: Union[ToolCallEvent, ToolResultEvent, TokenEvent, ChartData, AgentResponse] = Field(
+        description="Event payload"
+    )
@@ -1,34 +1,176 @@
 """API routes for Census Data Agent."""
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from typing import Any, AsyncIterator, Dict, Optional, Set
 import logging
 
-from api.models import QuestionRequest, AgentResponse
+from api.models import (
+    QuestionRequest, AgentResponse, ResponseFormat, BatchQuestionRequest, BatchEventType, BatchItem, BatchSummary
+)
 from agent.agent import data_agent
+from config import settings
+from database.manager import db_manager
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-@router.post("/ask", response_model=AgentResponse, tags=["Census Data"])
-async def ask_question(request: QuestionRequest) -> AgentResponse:
+COLUMNAR_MEDIA_TYPE = "application/vnd.census.columnar+json"
+
+
+def wants_columnar(format: Optional[ResponseFormat], accept: Optional[str]) -> bool:
+    """Whether the client asked for the columnar response format."""
+    if format is not None:
+        return format == ResponseFormat.columnar
+    return bool(accept) and COLUMNAR_MEDIA_TYPE in accept
+
+
+def response_exclude(columnar: bool, timings: bool = False) -> Optional[Set[str]]:
+    """Get the response fields left out unless the client asked for them."""
+    exclude = set()
+    if not columnar:
+        exclude.add("result")
+    if not timings:
+        exclude.add("timings")
+    return exclude or None
+
+
+def encode_response(response: AgentResponse, columnar: bool, timings: bool = False) -> str:
+    """Serialize a response, including the raw query result only in columnar format."""
+    return response.model_dump_json(exclude=response_exclude(columnar, timings))
+
+
+@router.post(
+    "/ask",
+    response_class=JSONResponse,
+    responses={200: {
+        "model": AgentResponse,
+        "content": {COLUMNAR_MEDIA_TYPE: {"schema": {"$ref": "#/components/schemas/AgentResponse"}}}
+    }},
+    tags=["Census Data"]
+)
+async def ask_question(
+        request: QuestionRequest,
+        format: Optional[ResponseFormat] = Query(default=None, description="Response encoding"),
+        timings: bool = Query(default=False, description="Include the timing breakdown"),
+        accept: Optional[str] = Header(default=None)) -> Response:
     """
     Ask a natural language question about census data.
     
     Returns both a text answer and structured chart data when applicable.
+    With `format=columnar` or `Accept: application/vnd.census.columnar+json`,
+    the raw query result is added as column names plus one value array per
+    column. With `timings=true`, the time spent in each stage, SQL query
+    totals, LLM calls and tokens are added as well.
     """
     try:
         logger.info(f"Received question: {request.question}")
         
         # Call the census data agent
-        response = data_agent.ask_question(request.question)
+        response = await data_agent.ask_question(request.question)
         
         logger.info(f"Successfully processed question with status: {response.status}")
-        return response
+        
+        columnar = wants_columnar(format, accept)
+        return Response(
+            content=encode_response(response, columnar, timings),
+            media_type=COLUMNAR_MEDIA_TYPE if columnar else "application/json"
+        )
         
     except Exception as e:
         logger.error(f"Error processing question: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Internal server error: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+@router.post("/ask/stream", tags=["Census Data"])
+async def ask_question_stream(
+        request: QuestionRequest,
+        format: Optional[ResponseFormat] = Query(default=None, description="Response encoding"),
+        accept: Optional[str] = Header(default=None)) -> StreamingResponse:
+    """
+    Ask a natural language question and stream the answer as Server-Sent Events.
+    
+    The question is answered like on `/ask`, from the answer cache, a
+    template, the fast path or the agent. When the agent answers it,
+    `tool_call`, `tool_result` and `token` events are emitted while it
+    works. Every stream ends with a `chart` event, if there is a chart,
+    and a `response` event containing the complete AgentResponse, which
+    carries the raw query result in the columnar format.
+    """
+    logger.info(f"Received streaming question: {request.question}")
+    columnar = wants_columnar(format, accept)
+    
+    async def event_source() -> AsyncIterator[str]:
+        async for event in data_agent.stream_question(request.question):
+            if isinstance(event.data, AgentResponse):
+                data = encode_response(event.data, columnar)
+            else:
+                data = event.data.model_dump_json()
+            yield f"event: {event.event}\ndata: {data}\n\n"
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/ask/batch", tags=["Census Data"])
+async def ask_batch(
+        request: BatchQuestionRequest,
+        format: Optional[ResponseFormat] = Query(default=None, description="Response encoding"),
+        timings: bool = Query(default=False, description="Include the timing breakdown of each answer"),
+        accept: Optional[str] = Header(default=None)) -> StreamingResponse:
+    """
+    Answer many questions concurrently and stream each answer as Server-Sent Events.
+    
+    Emits an `item` event with the question's position and its AgentResponse
+    as soon as each question is answered, in order of completion, and ends
+    with a `done` event with the totals. At most `max_concurrency` questions,
+    capped by the server limit, are answered at the same time.
+    """
+    if len(request.questions) > settings.batch_max_questions:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch can have at most {settings.batch_max_questions} questions"
+        )
+    
+    questions = [item.question for item in request.questions]
+    max_concurrency = min(request.max_concurrency or settings.batch_max_concurrency, settings.batch_max_concurrency)
+    columnar = wants_columnar(format, accept)
+    logger.info(f"Received batch of {len(questions)} questions, concurrency {max_concurrency}")
+    
+    async def event_source() -> AsyncIterator[str]:
+        errors = 0
+        async for index, response in data_agent.ask_batch(questions, max_concurrency):
+            if response.status == "error":
+                errors += 1
+            item = BatchItem(index=index, response=response)
+            exclude = response_exclude(columnar, timings)
+            data = item.model_dump_json(exclude={"response": exclude} if exclude else None)
+            yield f"event: {BatchEventType.item}\ndata: {data}\n\n"
+        
+        summary = BatchSummary(total=len(questions), errors=errors)
+        yield f"event: {BatchEventType.done}\ndata: {summary.model_dump_json()}\n\n"
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/stats/database", tags=["Monitoring"])
+async def database_stats() -> Dict[str, Any]:
+    """
+    Get connection pool occupancy, checkout latency, query cache and cost guard counters.
+    """
+    return {
+        "pool": db_manager.pool_stats(),
+        "query_cache": db_manager.query_cache.stats() if db_manager.query_cache is not None else None,
+        "query_guard": db_manager.query_guard.stats() if db_manager.query_guard is not None else None
+    }
@@ -0,0 +1,131 @@
+"""Deterministic stand-in for ChatAnthropic with simulated latency."""
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import random
+import time
+
+from benchmarks.scenarios import SCENARIOS, Scenario
+
+# Rough number of characters per token, used for the simulated usage
+CHARS_PER_TOKEN = 4
+
+
+def message_text(message: BaseMessage) -> str:
+    """Get the text of a message, joining content blocks."""
+    if isinstance(message.content, str):
+        return message.content
+    return "".join(
+        block.get("text", "") if isinstance(block, dict) else str(block)
+        for block in message.content
+    )
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Chat model answering the benchmark scenarios from a script.
+
+    Recognizes the question of a scenario in the prompt and answers each
+    call the application makes for it: the fast path SQL plan, the ReAct
+    agent's query and final answer, result summaries and chart extraction.
+    Every call waits `latency_ms`, plus `ms_per_1k_input_tokens` for each
+    thousand prompt tokens and up to `jitter_ms` drawn from a seeded
+    generator, and reports token usage like the Anthropic API.
+    """
+
+    scenarios: List[Scenario] = SCENARIOS
+    latency_ms: float = 300.0
+    ms_per_1k_input_tokens: float = 20.0
+    jitter_ms: float = 0.0
+    seed: int = 0
+    rng: Any = None
+
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> Any:
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def _generate(
+            self,
+            messages: List[BaseMessage],
+            stop: Optional[List[str]] = None,
+            run_manager: Any = None,
+            **kwargs: Any) -> ChatResult:
+        message, delay = self._respond(messages, stop, kwargs.get("tools"))
+        time.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+            self,
+            messages: List[BaseMessage],
+            stop: Optional[List[str]] = None,
+            run_manager: Any = None,
+            **kwargs: Any) -> ChatResult:
+        message, delay = self._respond(messages, stop, kwargs.get("tools"))
+        await asyncio.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _respond(
+            self,
+            messages: List[BaseMessage],
+            stop: Optional[List[str]],
+            tools: Optional[List[Dict[str, Any]]]) -> Tuple[AIMessage, float]:
+        """Build the scripted reply and its simulated latency in seconds."""
+        prompt = "\n".join(message_text(message) for message in messages)
+        scenario = self._find_scenario(messages[-1])
+        tool_names = [tool["function"]["name"] for tool in tools or []]
+
+        if "SQLQueryPlan" in tool_names:
+            plan = {"sql": None, "answer_template": None}
+            if scenario is not None and scenario.route == "fast_path":
+                plan = {"sql": scenario.sql, "answer_template": scenario.answer_template}
+            message = AIMessage(content="", tool_calls=[{"name": "SQLQueryPlan", "args": plan, "id": "plan"}])
+        elif "ChartSpec" in tool_names:
+            message = AIMessage(content="", tool_calls=[{"name": "ChartSpec", "args": self._chart(scenario), "id": "chart"}])
+        elif stop:
+            message = AIMessage(content=self._react_step(scenario, prompt))
+        else:
+            message = AIMessage(content="Here is a summary of the census data for this question.")
+
+        input_tokens = len(prompt) // CHARS_PER_TOKEN
+        output_tokens = max(1, len(message_text(message) + str(message.tool_calls)) // CHARS_PER_TOKEN)
+        message.response_metadata = {"usage": {"input_tokens": input_tokens, "output_tokens": output_tokens}}
+
+        delay_ms = self.latency_ms + self.ms_per_1k_input_tokens * input_tokens / 1000
+        if self.jitter_ms:
+            delay_ms += self.rng.uniform(0, self.jitter_ms)
+        return message, delay_ms / 1000
+
+    def _find_scenario(self, message: BaseMessage) -> Optional[Scenario]:
+        """Find the scenario whose question is asked in a message."""
+        text = message_text(message)
+        matches = [scenario for scenario in self.scenarios if scenario.question in text]
+        return max(matches, key=lambda scenario: len(scenario.question), default=None)
+
+    def _react_step(self, scenario: Optional[Scenario], prompt: str) -> str:
+        """Run the scenario's query first, then give the final answer."""
+        if scenario is None:
+            return "Thought: I cannot answer this from the database.\nFinal Answer: I don't know."
+        if f"Action Input: {scenario.sql}" in prompt:
+            return "Thought: I now know the final answer\nFinal Answer: Here is what the census data shows."
+        return f"Thought: I should query the census data.\nAction: sql_db_query\nAction Input: {scenario.sql}"
+
+    def _chart(self, scenario: Optional[Scenario]) -> Dict[str, Any]:
+        """Chart returned by the chart extraction call."""
+        return {"chart": {
+            "chart_type": "bar",
+            "values": [1.0, 2.0, 3.0],
+            "labels": ["A", "B", "C"],
+            "x_axis_title": "Item",
+            "y_axis_title": "Value",
+            "chart_title": scenario.question if scenario is not None else "Census data"
+        }}
@@ -0,0 +1,125 @@
+"""Embedded sqlite stand-in for the census database."""
+
+from sqlalchemy import create_engine, text
+import random
+
+NY_STATE_CODE = "36"
+
+NY_COUNTIES = [
+    "Albany", "Allegany", "Bronx", "Broome", "Cattaraugus", "Cayuga", "Chautauqua", "Chemung",
+    "Chenango", "Clinton", "Columbia", "Cortland", "Delaware", "Dutchess", "Erie", "Essex",
+    "Franklin", "Fulton", "Genesee", "Greene", "Hamilton", "Herkimer", "Jefferson", "Kings",
+    "Lewis", "Livingston", "Madison", "Monroe", "Montgomery", "Nassau", "New York", "Niagara",
+    "Oneida", "Onondaga", "Ontario", "Orange", "Orleans", "Oswego", "Otsego", "Putnam",
+    "Queens", "Rensselaer", "Richmond", "Rockland", "St. Lawrence", "Saratoga", "Schenectady",
+    "Schoharie", "Schuyler", "Seneca", "Steuben", "Suffolk", "Sullivan", "Tioga", "Tompkins",
+    "Ulster", "Warren", "Washington", "Wayne", "Westchester", "Wyoming", "Yates",
+]
+
+# Metric columns of the ny_census_data view generated by the bootstrap script
+CENSUS_COLUMNS = [
+    ("total_population", "INTEGER"),
+    ("median_household_income", "INTEGER"),
+    ("total_housing_units", "INTEGER"),
+    ("owner_occupied_units", "INTEGER"),
+    ("renter_occupied_units", "INTEGER"),
+    ("bachelors_degree_holders", "INTEGER"),
+    ("graduate_degree_holders", "INTEGER"),
+    ("high_school_graduates", "INTEGER"),
+    ("unemployed_count", "REAL"),
+    ("median_earnings", "INTEGER"),
+    ("median_age", "REAL"),
+    ("population_under_18", "INTEGER"),
+    ("population_18_and_over", "INTEGER"),
+    ("white_alone", "INTEGER"),
+    ("black_alone", "INTEGER"),
+    ("hispanic_latino", "INTEGER"),
+    ("median_home_value", "INTEGER"),
+]
+
+
+def county_values(rng: random.Random) -> dict:
+    """Generate plausible values for one county."""
+    population = rng.randint(5_000, 2_600_000)
+    housing_units = population * rng.randint(38, 48) // 100
+    owner_occupied = housing_units * rng.randint(30, 75) // 100
+    adults = population * rng.randint(75, 82) // 100
+    return {
+        "total_population": population,
+        "median_household_income": rng.randint(45_000, 125_000),
+        "total_housing_units": housing_units,
+        "owner_occupied_units": owner_occupied,
+        "renter_occupied_units": housing_units - owner_occupied,
+        "bachelors_degree_holders": adults * rng.randint(10, 30) // 100,
+        "graduate_degree_holders": adults * rng.randint(5, 25) // 100,
+        "high_school_graduates": adults * rng.randint(20, 35) // 100,
+        "unemployed_count": round(population * rng.uniform(0.01, 0.04), 1),
+        "median_earnings": rng.randint(28_000, 75_000),
+        "median_age": round(rng.uniform(34.0, 52.0), 1),
+        "population_under_18": population - adults,
+        "population_18_and_over": adults,
+        "white_alone": population * rng.randint(30, 95) // 100,
+        "black_alone": population * rng.randint(1, 30) // 100,
+        "hispanic_latino": population * rng.randint(2, 30) // 100,
+        "median_home_value": rng.randint(90_000, 1_100_000),
+    }
+
+
+def create_fixture_database(path: str, seed: int = 0) -> str:
+    """Create a sqlite database with `ny_census_data` and `data_loads` tables.
+
+    The county rows have the columns of the generated ny_census_data view
+    and deterministic values derived from `seed`.
+
+    Args:
+        path: File to write the database to; replaced if it exists
+        seed: Seed for the generated county values
+
+    Returns:
+        SQLAlchemy URL of the database
+    """
+    url = f"sqlite:///{path}"
+    engine = create_engine(url)
+    columns = [column for column, _ in CENSUS_COLUMNS]
+    column_definitions = ", ".join(f"{column} {sql_type}" for column, sql_type in CENSUS_COLUMNS)
+    rng = random.Random(seed)
+
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS ny_census_data"))
+        conn.execute(text("DROP TABLE IF EXISTS data_loads"))
+        conn.execute(text(f"""
+            CREATE TABLE ny_census_data (
+                id INTEGER PRIMARY KEY,
+                county_name VARCHAR(100),
+                state_code CHAR(2),
+                county_code CHAR(3),
+                {column_definitions},
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+        conn.execute(text("""
+            CREATE TABLE data_loads (
+                id INTEGER PRIMARY KEY,
+                row_count INTEGER,
+                loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+
+        insert = text(
+            f"INSERT INTO ny_census_data (id, county_name, state_code, county_code, {', '.join(columns)}) "
+            f"VALUES (:id, :county_name, :state_code, :county_code, {', '.join(':' + column for column in columns)})"
+        )
+        conn.execute(insert, [
+            {
+                "id": index + 1,
+                "county_name": f"{name} County",
+                "state_code": NY_STATE_CODE,
+                "county_code": f"{2 * index + 1:03d}",
+                **county_values(rng),
+            }
+            for index, name in enumerate(NY_COUNTIES)
+        ])
+        conn.execute(text("INSERT INTO data_loads (id, row_count) VALUES (1, :rows)"), {"rows": len(NY_COUNTIES)})
+
+    engine.dispose()
+    return url
@@ -0,0 +1,207 @@
+"""Replay of recorded request traces through CensusDataAgent.
+
+Re-asks the questions of a trace file recorded with TRACE_SAMPLE_RATE,
+answering every LLM call with the response recorded for it, so the
+non-LLM work of answering real traffic (SQL, schema selection, charts and
+the agent loop) can be profiled and optimized without calling Claude. LLM
+calls return immediately unless `--llm-latency recorded` is given.
+
+Run from the backend directory, against the database the traces were
+recorded on or a copy of it:
+
+    python -m benchmarks.replay traces.jsonl
+    python -m benchmarks.replay traces.jsonl --concurrency 8 --llm-latency recorded
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence
+import argparse
+import asyncio
+import collections
+import json
+import logging
+import sys
+import time
+
+from config import settings
+from agent.instrumentation import USAGE_KINDS
+from benchmarks.run import print_result, summarize
+
+# Answer paths whose LLM calls a trace holds; template answers depend on
+# the learned template library, which traces do not capture
+REPLAYABLE_PATHS = ("fast_path", "agent")
+
+_recorded_calls: ContextVar[Optional[Deque[Dict[str, Any]]]] = ContextVar("recorded_calls", default=None)
+
+
+class ReplayMismatch(Exception):
+    """Raised when a replayed request makes more LLM calls than were recorded."""
+
+
+def load_traces(path: str) -> List[Dict[str, Any]]:
+    """Read the traces of a JSONL trace file."""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class ReplayChatModel(BaseChatModel):
+    """Chat model answering each call with the next response of the trace being replayed."""
+
+    recorded_latency: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    @contextmanager
+    def replaying(self, trace: Dict[str, Any]) -> Iterator[Deque[Dict[str, Any]]]:
+        """Answer the LLM calls made within the block from a trace.
+
+        Yields:
+            Recorded calls not replayed yet
+        """
+        calls = collections.deque(event for event in trace["events"] if event["type"] == "llm")
+        token = _recorded_calls.set(calls)
+        try:
+            yield calls
+        finally:
+            _recorded_calls.reset(token)
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> Any:
+        return self.bind(tools=list(tools), **kwargs)
+
+    def _generate(
+            self,
+            messages: List[BaseMessage],
+            stop: Optional[List[str]] = None,
+            run_manager: Any = None,
+            **kwargs: Any) -> ChatResult:
+        call = self._next_call()
+        if self.recorded_latency:
+            time.sleep(call.get("duration_ms", 0) / 1000)
+        return self._result(call)
+
+    async def _agenerate(
+            self,
+            messages: List[BaseMessage],
+            stop: Optional[List[str]] = None,
+            run_manager: Any = None,
+            **kwargs: Any) -> ChatResult:
+        call = self._next_call()
+        if self.recorded_latency:
+            await asyncio.sleep(call.get("duration_ms", 0) / 1000)
+        return self._result(call)
+
+    def _next_call(self) -> Dict[str, Any]:
+        calls = _recorded_calls.get()
+        if not calls:
+            raise ReplayMismatch("No recorded LLM response left for this call")
+        call = calls.popleft()
+        if "error" in call:
+            raise RuntimeError(f"Recorded LLM call failed: {call['error']}")
+        return call
+
+    def _result(self, call: Dict[str, Any]) -> ChatResult:
+        fields = {kind: field for field, kind in USAGE_KINDS.items()}
+        message = AIMessage(
+            content=call["response"]["content"],
+            tool_calls=call["response"]["tool_calls"],
+            response_metadata={"usage": {fields[kind]: count for kind, count in call.get("usage", {}).items()}}
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+async def replay(
+        traces: List[Dict[str, Any]],
+        concurrency: int,
+        recorded_latency: bool) -> Dict[str, Any]:
+    """Replay traces with `concurrency` requests at a time and compare the outcomes."""
+    from agent.agent import CensusDataAgent
+
+    model = ReplayChatModel(recorded_latency=recorded_latency)
+    agent = CensusDataAgent(llm=model)
+
+    pending: asyncio.Queue = asyncio.Queue()
+    for trace in traces:
+        pending.put_nowait(trace)
+    samples: List[Dict[str, Any]] = []
+    mismatches: List[str] = []
+
+    async def worker() -> None:
+        while not pending.empty():
+            trace = pending.get_nowait()
+            with model.replaying(trace) as unused_calls:
+                started_at = time.perf_counter()
+                response = await agent.ask_question(trace["question"])
+                latency_ms = (time.perf_counter() - started_at) * 1000
+
+            outcome = (response.path or "none", response.status)
+            if outcome != (trace["path"], trace["status"]) or unused_calls:
+                mismatches.append(
+                    f"{trace['trace_id']}: recorded {trace['path']}/{trace['status']}, "
+                    f"replayed {outcome[0]}/{outcome[1]}, {len(unused_calls)} LLM responses unused"
+                )
+            samples.append({
+                "latency_ms": latency_ms,
+                "path": outcome[0],
+                "error": response.status != "success",
+                "timings": response.timings.model_dump() if response.timings else None,
+            })
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    result = summarize(concurrency, time.perf_counter() - started_at, samples)
+    result["mismatches"] = mismatches
+    return result
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("traces", help="JSONL trace file to replay")
+    parser.add_argument("--concurrency", type=int, default=1, help="Requests replayed at the same time")
+    parser.add_argument(
+        "--llm-latency", choices=["none", "recorded"], default="none",
+        help="Return LLM responses immediately or after their recorded duration"
+    )
+    parser.add_argument("--database-url", default=None, help="Database to run against instead of the configured one")
+    parser.add_argument("--output", default=None, help="File to write the results to as JSON")
+    parser.add_argument("--log-level", default="WARNING", help="Log level of the application")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=args.log_level)
+
+    traces = load_traces(args.traces)
+    replayable = [trace for trace in traces if trace.get("path") in REPLAYABLE_PATHS]
+    print(f"Replaying {len(replayable)} of {len(traces)} traces")
+    if not replayable:
+        return 0
+
+    # Every trace replays its own LLM responses, so none may be answered
+    # from a cache, a template or another request's execution
+    settings.answer_cache_enabled = False
+    settings.templates_enabled = False
+    settings.coalesce_questions_enabled = False
+    settings.trace_sample_rate = 0.0
+    if args.database_url:
+        settings.db_url = args.database_url
+
+    result = asyncio.run(replay(replayable, args.concurrency, args.llm_latency == "recorded"))
+    print_result(result)
+    for mismatch in result["mismatches"]:
+        print(f"    mismatch {mismatch}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    return 1 if result["mismatches"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""Questions sent by the benchmark, with the SQL the scripted model answers them with."""
+
+from typing import List, NamedTuple, Optional
+
+
+class Scenario(NamedTuple):
+    """One benchmark question and how the scripted model answers it.
+
+    With `route` "fast_path" the model writes the query in the fast path
+    SQL call; with "agent" it declines there, so the question goes through
+    the ReAct agent, which runs the same query as a tool call.
+    """
+    question: str
+    sql: str
+    route: str = "fast_path"
+    answer_template: Optional[str] = None
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario(
+        question="Which county has the highest median age?",
+        sql="SELECT county_name, median_age FROM ny_census_data ORDER BY median_age DESC LIMIT 1",
+        answer_template="{county_name} has the highest median age, at {median_age} years."
+    ),
+    Scenario(
+        question="What are the 10 most populous counties?",
+        sql="SELECT county_name, total_population FROM ny_census_data ORDER BY total_population DESC LIMIT 10"
+    ),
+    Scenario(
+        question="What is the total population of New York State?",
+        sql="SELECT SUM(total_population) AS total_population FROM ny_census_data",
+        answer_template="New York State has a total population of {total_population}."
+    ),
+    Scenario(
+        question="How do median income and median home value compare across the largest counties?",
+        sql=(
+            "SELECT county_name, median_household_income, median_home_value FROM ny_census_data "
+            "ORDER BY total_population DESC LIMIT 15"
+        ),
+        route="agent"
+    ),
+    Scenario(
+        question="Compare population, income, age and home values of the five largest counties",
+        sql=(
+            "SELECT county_name, total_population, median_household_income, median_age, median_home_value "
+            "FROM ny_census_data ORDER BY total_population DESC LIMIT 5"
+        ),
+        route="agent"
+    ),
+    Scenario(
+        question="Show population, income, housing units and median age for every county",
+        sql=(
+            "SELECT total_population, median_household_income, total_housing_units, median_age "
+            "FROM ny_census_data ORDER BY total_population DESC"
+        ),
+        route="agent"
+    ),
+]
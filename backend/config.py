@@ -31,6 +31,11 @@ class Settings(BaseSettings):
         env="DB_PASSWORD"
     )
     
+    db_url: Optional[str] = Field(
+        default=None,
+        env="DB_URL"
+    )
+    
     db_read_only_user: str = Field(
         default="census_reader",
         env="DB_READ_ONLY_USER"
@@ -41,6 +46,76 @@ class Settings(BaseSettings):
         env="DB_READ_ONLY_PASSWORD"
     )
     
+    db_pool_size: int = Field(
+        default=5,
+        env="DB_POOL_SIZE"
+    )
+    
+    db_max_overflow: int = Field(
+        default=10,
+        env="DB_MAX_OVERFLOW"
+    )
+    
+    db_pool_timeout_seconds: float = Field(
+        default=10.0,
+        env="DB_POOL_TIMEOUT_SECONDS"
+    )
+    
+    db_pool_recycle_seconds: int = Field(
+        default=30 * 60,
+        env="DB_POOL_RECYCLE_SECONDS"
+    )
+    
+    db_pool_pre_ping: bool = Field(
+        default=True,
+        env="DB_POOL_PRE_PING"
+    )
+    
+    db_slow_checkout_seconds: float = Field(
+        default=0.5,
+        env="DB_SLOW_CHECKOUT_SECONDS"
+    )
+    
+    db_read_only_statement_timeout_ms: int = Field(
+        default=15000,
+        env="DB_READ_ONLY_STATEMENT_TIMEOUT_MS"
+    )
+    
+    query_stream_batch_size: int = Field(
+        default=1000,
+        env="QUERY_STREAM_BATCH_SIZE"
+    )
+    
+    query_guard_enabled: bool = Field(
+        default=True,
+        env="QUERY_GUARD_ENABLED"
+    )
+    
+    query_guard_max_cost: float = Field(
+        default=100000.0,
+        env="QUERY_GUARD_MAX_COST"
+    )
+    
+    query_guard_max_rows: int = Field(
+        default=10000,
+        env="QUERY_GUARD_MAX_ROWS"
+    )
+    
+    query_guard_row_cap_mode: str = Field(
+        default="wrap",
+        env="QUERY_GUARD_ROW_CAP_MODE"
+    )
+    
+    response_gzip_min_bytes: int = Field(
+        default=1024,
+        env="RESPONSE_GZIP_MIN_BYTES"
+    )
+    
+    response_gzip_level: int = Field(
+        default=5,
+        env="RESPONSE_GZIP_LEVEL"
+    )
+    
     anthropic_api_key: Optional[str] = Field(
         default=None,
         env="ANTHROPIC_API_KEY"
@@ -51,6 +126,136 @@ class Settings(BaseSettings):
         env="LOG_LEVEL"
     )
     
+    agent_schema_in_prompt: bool = Field(
+        default=True,
+        env="AGENT_SCHEMA_IN_PROMPT"
+    )
+    
+    schema_retrieval_enabled: bool = Field(
+        default=True,
+        env="SCHEMA_RETRIEVAL_ENABLED"
+    )
+    
+    schema_retrieval_max_tables: int = Field(
+        default=3,
+        env="SCHEMA_RETRIEVAL_MAX_TABLES"
+    )
+    
+    schema_retrieval_max_columns: int = Field(
+        default=10,
+        env="SCHEMA_RETRIEVAL_MAX_COLUMNS"
+    )
+    
+    schema_overview_max_tables: int = Field(
+        default=30,
+        env="SCHEMA_OVERVIEW_MAX_TABLES"
+    )
+    
+    templates_enabled: bool = Field(
+        default=True,
+        env="TEMPLATES_ENABLED"
+    )
+    
+    template_log_path: Optional[str] = Field(
+        default=None,
+        env="TEMPLATE_LOG_PATH"
+    )
+    
+    template_min_agent_runs: int = Field(
+        default=2,
+        env="TEMPLATE_MIN_AGENT_RUNS"
+    )
+    
+    fast_path_enabled: bool = Field(
+        default=True,
+        env="FAST_PATH_ENABLED"
+    )
+    
+    data_version_check_seconds: float = Field(
+        default=30.0,
+        env="DATA_VERSION_CHECK_SECONDS"
+    )
+    
+    catalog_sample_rows: int = Field(
+        default=3,
+        env="CATALOG_SAMPLE_ROWS"
+    )
+    
+    query_cache_enabled: bool = Field(
+        default=True,
+        env="QUERY_CACHE_ENABLED"
+    )
+    
+    query_cache_max_bytes: int = Field(
+        default=64 * 1024 * 1024,
+        env="QUERY_CACHE_MAX_BYTES"
+    )
+    
+    query_cache_max_entry_bytes: int = Field(
+        default=4 * 1024 * 1024,
+        env="QUERY_CACHE_MAX_ENTRY_BYTES"
+    )
+    
+    answer_cache_enabled: bool = Field(
+        default=True,
+        env="ANSWER_CACHE_ENABLED"
+    )
+    
+    answer_cache_similarity_threshold: float = Field(
+        default=0.85,
+        env="ANSWER_CACHE_SIMILARITY_THRESHOLD"
+    )
+    
+    answer_cache_max_entries: int = Field(
+        default=512,
+        env="ANSWER_CACHE_MAX_ENTRIES"
+    )
+    
+    answer_cache_ttl_seconds: float = Field(
+        default=24 * 60 * 60,
+        env="ANSWER_CACHE_TTL_SECONDS"
+    )
+    
+    coalesce_questions_enabled: bool = Field(
+        default=True,
+        env="COALESCE_QUESTIONS_ENABLED"
+    )
+    
+    result_context_max_tokens: int = Field(
+        default=1000,
+        env="RESULT_CONTEXT_MAX_TOKENS"
+    )
+    
+    batch_max_concurrency: int = Field(
+        default=4,
+        env="BATCH_MAX_CONCURRENCY"
+    )
+    
+    batch_max_questions: int = Field(
+        default=500,
+        env="BATCH_MAX_QUESTIONS"
+    )
+    
+    trace_sample_rate: float = Field(
+        default=0.0,
+        env="TRACE_SAMPLE_RATE"
+    )
+    
+    trace_path: str = Field(
+        default="traces.jsonl",
+        env="TRACE_PATH"
+    )
+    
+    trace_max_rows: int = Field(
+        default=100,
+        env="TRACE_MAX_ROWS"
+    )
+    
+    trace_max_queued: int = Field(
+        default=1000,
+        env="TRACE_MAX_QUEUED"
+    )
+    
     class Config:
         env_file = "../.env"
         case_sensitive = False
@@ -1,15 +1,26 @@
-import requests
 import psycopg2
-from psycopg2.extras import RealDictCursor
+import csv
+import io
 import os
+import re
 from dotenv import load_dotenv
 
+from census_fetcher import (
+    CensusFetcher, FetchError, build_shards, ALL_STATES, DEFAULT_BASE_URL, MAIN_ENDPOINT, PROFILE_ENDPOINT, SUBJECT_ENDPOINT
+)
+from census_records import CENSUS_COLUMNS, TRACT_LOAD_COLUMNS, safe_float, to_tract_record
+
 load_dotenv()
 
 # Census API configuration
-BASE_URL = "https://api.census.gov/data/2022/acs/acs5"
-PROFILE_URL = "https://api.census.gov/data/2022/acs/acs5/profile"
+CENSUS_API_BASE_URL = os.getenv("CENSUS_API_BASE_URL", DEFAULT_BASE_URL)  # Point at a local stub server for testing
 API_KEY = os.getenv("CENSUS_API_KEY", "")  # Get your free key from https://api.census.gov/data/key_signup.html
+CENSUS_YEAR = 2022
+CENSUS_STATES = ["36"]  # New York
+CENSUS_EXTRA_VARIABLES = [v for v in os.getenv("CENSUS_EXTRA_VARIABLES", "").split(",") if v]  # e.g. B08303_001E,S1501_C01_006E
+CENSUS_FETCH_WORKERS = int(os.getenv("CENSUS_FETCH_WORKERS", "8"))
+CENSUS_LOAD_TRACTS = os.getenv("CENSUS_LOAD_TRACTS", "false").lower() == "true"  # Tracts of all states, a much larger download
+CENSUS_CACHE_DIR = os.getenv("CENSUS_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".census_cache"))
 
 # Database configuration
 DB_CONFIG = {
@@ -47,158 +58,417 @@ PROFILE_VARIABLES = [
     "DP04_0089E",   # Median home value
 ]
 
-def fetch_census_data():
-    """Fetch census data from both main and profile APIs"""
+VALUES_TABLE = "census_values"
+VALUES_STAGING_TABLE = "census_values_staging"
+GEOGRAPHIES_TABLE = "census_geographies"
+VARIABLES_TABLE = "census_variables"
+
+# Wide views generated from the popular variables: (view, state FIPS code or None for all, comment)
+PIVOT_VIEWS = [
+    ("ny_census_data", "36", "ACS 5-year estimates per New York county, one column per popular variable"),
+]
+
+TRACT_TABLE = "census_tract_data"
+TRACT_ROLLUPS = ["census_county_rollup", "census_state_rollup"]  # Refreshed in dependency order
+
+# Identifiers that are safe to interpolate into generated view definitions
+VARIABLE_ID_PATTERN = re.compile(r"^[A-Z0-9_]+$")
+COLUMN_NAME_PATTERN = re.compile(r"^[a-z_][a-z0-9_]*$")
+SQL_TYPES = {"INTEGER", "REAL", "DOUBLE PRECISION"}
+
+# Data load log, also created by init.sql; kept here for databases created before it existed
+CREATE_DATA_LOADS_QUERY = """
+    CREATE TABLE IF NOT EXISTS data_loads (
+        id SERIAL PRIMARY KEY,
+        row_count INTEGER,
+        loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+def dataset_of(variable):
+    """Get the Census API dataset a variable is published in, from its table prefix"""
+    if variable.startswith("DP"):
+        return PROFILE_ENDPOINT
+    if variable.startswith("S"):
+        return SUBJECT_ENDPOINT
+    return MAIN_ENDPOINT
+
+
+def load_variables():
+    """Get the variables to load: the popular ones plus CENSUS_EXTRA_VARIABLES"""
+    variables = [variable for _, variable, _ in CENSUS_COLUMNS]
+    return variables + [variable for variable in CENSUS_EXTRA_VARIABLES if variable not in variables]
+
+
+def make_fetcher():
+    """Create a fetcher with the configured API, cache and concurrency"""
+    return CensusFetcher(
+        cache_dir=CENSUS_CACHE_DIR,
+        base_url=CENSUS_API_BASE_URL,
+        api_key=API_KEY,
+        max_workers=CENSUS_FETCH_WORKERS
+    )
+
+
+def fetch_census_data(variables, states=CENSUS_STATES, year=CENSUS_YEAR):
+    """Fetch county estimates of any number of variables in long format
     
-    # Fetch main variables
-    main_variables_str = ",".join(MAIN_VARIABLES)
-    main_url = f"{BASE_URL}?get={main_variables_str}&for=county:*&in=state:36"
-    if API_KEY:
-        main_url += f"&key={API_KEY}"
+    Shards are fetched concurrently and cached on disk, so re-running after
+    a partial failure only fetches what is missing.
     
-    print(f"Fetching main data from: {main_url}")
+    Returns:
+        Geography records and (variable_id, year, geo_id, value) records,
+        or None, None if any shard failed
+    """
+    endpoint_variables = {}
+    for variable in variables:
+        endpoint_variables.setdefault(dataset_of(variable), []).append(variable)
+    shards = build_shards(endpoint_variables, years=[year], states=states)
     
-    try:
-        main_response = requests.get(main_url)
-        main_response.raise_for_status()
-        main_data = main_response.json()
-        main_headers = main_data[0]
-        main_rows = main_data[1:]
-        
-        # Convert to dict for easier lookup
-        main_dict = {}
-        for row in main_rows:
-            county_name = row[0]  # NAME is first column
-            main_dict[county_name] = dict(zip(main_headers, row))
-        
-    except requests.RequestException as e:
-        print(f"Error fetching main data: {e}")
+    print(f"Fetching {len(shards)} shards from {CENSUS_API_BASE_URL}")
+    results, failures = make_fetcher().fetch_all(shards)
+    if failures:
+        print(f"Failed to fetch {len(failures)} shards; re-run to resume")
         return None, None
     
-    # Fetch profile variables
-    profile_variables_str = ",".join(PROFILE_VARIABLES)
-    profile_url = f"{PROFILE_URL}?get={profile_variables_str}&for=county:*&in=state:36"
-    if API_KEY:
-        profile_url += f"&key={API_KEY}"
+    geographies = {}
+    values = []
+    for shard, data in results.items():
+        if not data:
+            continue
+        headers = data[0]
+        for row in data[1:]:
+            row_dict = dict(zip(headers, row))
+            geo_id = f"0500000US{row_dict['state']}{row_dict['county']}"
+            geographies[geo_id] = [geo_id, "county", row_dict["state"], row_dict["county"], row_dict["NAME"]]
+            for variable in shard.variables[1:]:
+                value = safe_float(row_dict.get(variable))
+                if value is not None:
+                    values.append([variable, year, geo_id, value])
+    
+    return [geographies[geo_id] for geo_id in sorted(geographies)], values
+
+
+def fetch_variable_catalog(year=CENSUS_YEAR, endpoints=(MAIN_ENDPOINT, PROFILE_ENDPOINT, SUBJECT_ENDPOINT)):
+    """Fetch labels and concepts of every estimate variable of the datasets
+    
+    Returns:
+        (variable_id, dataset, label, concept) records
+    """
+    fetcher = make_fetcher()
+    catalog = []
+    for endpoint in endpoints:
+        try:
+            variables = fetcher.fetch_variables(endpoint, year)
+        except FetchError as e:
+            print(f"Failed to fetch variable metadata: {e}")
+            continue
+        for variable_id, metadata in sorted(variables.items()):
+            if not VARIABLE_ID_PATTERN.match(variable_id) or not variable_id.endswith("E"):
+                continue
+            parts = [part.rstrip(":") for part in metadata.get("label", "").split("!!") if part != "Estimate"]
+            label = " - ".join(parts)
+            catalog.append([variable_id, endpoint, label, metadata.get("concept")])
+    print(f"Fetched metadata of {len(catalog)} variables")
+    return catalog
+
+
+class CopyBuffer(io.TextIOBase):
+    """File-like object that renders records as CSV lazily for COPY FROM STDIN"""
+    
+    def __init__(self, records):
+        self._records = iter(records)
+        self._buffer = ""
+        self._line = io.StringIO()
+        self._writer = csv.writer(self._line)
+        self.row_count = 0
+    
+    def readable(self):
+        return True
+    
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            record = next(self._records, None)
+            if record is None:
+                break
+            self._line.seek(0)
+            self._line.truncate()
+            self._writer.writerow(record)
+            self._buffer += self._line.getvalue()
+            self.row_count += 1
+        
+        if size < 0:
+            size = len(self._buffer)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+
+def fetch_tract_data(states=ALL_STATES, year=CENSUS_YEAR):
+    """Fetch tract-level census data from both main and profile APIs
+    
+    Returns:
+        One dict of merged variables per tract, or None if any shard failed
+    """
+    shards = build_shards(
+        {MAIN_ENDPOINT: MAIN_VARIABLES, PROFILE_ENDPOINT: PROFILE_VARIABLES},
+        years=[year],
+        states=states,
+        geography="tract"
+    )
     
-    print(f"Fetching profile data from: {profile_url}")
+    print(f"Fetching {len(shards)} tract shards from {CENSUS_API_BASE_URL}")
+    results, failures = make_fetcher().fetch_all(shards)
+    if failures:
+        print(f"Failed to fetch {len(failures)} tract shards; re-run to resume")
+        return None
     
+    tracts = {}
+    for shard, data in results.items():
+        if not data:
+            continue
+        headers = data[0]
+        for row in data[1:]:
+            row_dict = dict(zip(headers, row))
+            key = (row_dict["state"], row_dict["county"], row_dict["tract"])
+            tracts.setdefault(key, {}).update(row_dict)
+    
+    return [tracts[key] for key in sorted(tracts)]
+
+
+def refresh_rollup(cursor, rollup):
+    """Refresh a rollup of the tract data and update its planner statistics
+    
+    Populated rollups are refreshed concurrently, using their unique key
+    index, so readers are not blocked while the view is rebuilt. A rollup
+    that was never populated can only be refreshed with a plain REFRESH.
+    """
+    cursor.execute("SELECT ispopulated FROM pg_matviews WHERE matviewname = %s", (rollup,))
+    row = cursor.fetchone()
+    concurrently = "CONCURRENTLY " if row and row[0] else ""
+    cursor.execute(f"REFRESH MATERIALIZED VIEW {concurrently}{rollup}")
+    cursor.execute(f"ANALYZE {rollup}")
+
+
+def load_tract_data(rows, year=CENSUS_YEAR):
+    """Load one year of tract data as a partition and refresh the rollups
+    
+    The year is loaded with COPY into a standalone table that is indexed,
+    analyzed and then attached in place of the year's previous partition.
+    The swap is committed on its own, so readers of census_tract_data see
+    either the old or the new year. The county and state rollups are then
+    refreshed concurrently in a second transaction. They may show the old
+    year for the length of the refresh, but stay readable throughout.
+    """
+    partition = f"{TRACT_TABLE}_{year}"
+    staging = f"{partition}_staging"
+    conn = None
+    cursor = None
     try:
-        profile_response = requests.get(profile_url)
-        profile_response.raise_for_status()
-        profile_data = profile_response.json()
-        profile_headers = profile_data[0]
-        profile_rows = profile_data[1:]
-        
-        # Convert to dict for easier lookup
-        profile_dict = {}
-        for row in profile_rows:
-            county_name = row[0]  # NAME is first column
-            profile_dict[county_name] = dict(zip(profile_headers, row))
-        
-    except requests.RequestException as e:
-        print(f"Error fetching profile data: {e}")
-        return None, None
+        conn = psycopg2.connect(**DB_CONFIG)
+        cursor = conn.cursor()
+        
+        cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+        cursor.execute(f"CREATE TABLE {staging} (LIKE {TRACT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        # Matching the partition bound lets ATTACH PARTITION skip its validation scan
+        cursor.execute(f"ALTER TABLE {staging} ADD CONSTRAINT {staging}_year_check CHECK (year = {int(year)})")
+        
+        records = (to_tract_record(row_dict, year) for row_dict in rows)
+        copy_buffer = CopyBuffer(records)
+        cursor.copy_expert(
+            f"COPY {staging} ({', '.join(TRACT_LOAD_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            copy_buffer
+        )
+        print(f"Copied {copy_buffer.row_count} tracts into {staging}")
+        
+        # Indexes matching the parent's are adopted by ATTACH PARTITION instead of rebuilt
+        cursor.execute(
+            f"ALTER TABLE {staging} ADD CONSTRAINT {staging}_pkey "
+            f"PRIMARY KEY (year, state_code, county_code, tract_code)"
+        )
+        cursor.execute(f"CREATE INDEX {staging}_county_idx ON {staging} (state_code, county_code)")
+        cursor.execute(f"ANALYZE {staging}")
+        
+        # Swap the partition. DETACH PARTITION takes an ACCESS EXCLUSIVE lock on
+        # census_tract_data, so the swap is committed before the rollups are refreshed
+        # and the lock blocks readers only for the swap itself
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (partition,))
+        if cursor.fetchone()[0]:
+            cursor.execute(f"ALTER TABLE {TRACT_TABLE} DETACH PARTITION {partition}")
+            cursor.execute(f"DROP TABLE {partition}")
+        cursor.execute(f"ALTER TABLE {staging} RENAME TO {partition}")
+        cursor.execute(f"ALTER INDEX {staging}_pkey RENAME TO {partition}_pkey")
+        cursor.execute(f"ALTER INDEX {staging}_county_idx RENAME TO {partition}_county_idx")
+        cursor.execute(f"ALTER TABLE {TRACT_TABLE} ATTACH PARTITION {partition} FOR VALUES IN ({int(year)})")
+        cursor.execute(f"ALTER TABLE {partition} DROP CONSTRAINT {staging}_year_check")
+        conn.commit()
+        print(f"Attached {partition}")
+        
+        for rollup in TRACT_ROLLUPS:
+            refresh_rollup(cursor, rollup)
+        
+        # Bump the data version so the API invalidates its caches
+        cursor.execute(CREATE_DATA_LOADS_QUERY)
+        cursor.execute("INSERT INTO data_loads (row_count) VALUES (%s)", (copy_buffer.row_count,))
+        
+        conn.commit()
+        print(f"Successfully loaded {copy_buffer.row_count} tracts for {year}")
+        
+    except psycopg2.Error as e:
+        print(f"Database error: {e}")
+        if conn:
+            conn.rollback()
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+
+def popular_variables(cursor):
+    """Get the (variable_id, column_name, value_type, description) of the popular variables
     
-    # Merge the data
-    all_headers = MAIN_VARIABLES + [var for var in PROFILE_VARIABLES if var != "NAME"] + ["state", "county"]
-    merged_rows = []
-    
-    for county_name in main_dict.keys():
-        if county_name in profile_dict:
-            merged_row = []
-            main_row = main_dict[county_name]
-            profile_row = profile_dict[county_name]
-            
-            # Add main variables
-            for var in MAIN_VARIABLES:
-                merged_row.append(main_row[var])
-            
-            # Add profile variables (skip NAME since it's already included)
-            for var in PROFILE_VARIABLES:
-                if var != "NAME":
-                    merged_row.append(profile_row[var])
-            
-            # Add state and county codes
-            merged_row.append(main_row["state"])
-            merged_row.append(main_row["county"])
-            
-            merged_rows.append(merged_row)
-    
-    return all_headers, merged_rows
-
-
-def insert_data(headers, rows):
-    """Insert data into PostgreSQL database"""
+    Ordered like CENSUS_COLUMNS, so ny_census_data keeps the column order of the
+    original wide table.
+    """
+    cursor.execute(
+        f"SELECT variable_id, column_name, value_type, COALESCE(description, label) "
+        f"FROM {VARIABLES_TABLE} WHERE is_popular AND column_name IS NOT NULL"
+    )
+    order = [column for column, _, _ in CENSUS_COLUMNS]
+    variables = []
+    for variable_id, column, value_type, description in cursor.fetchall():
+        if not (VARIABLE_ID_PATTERN.match(variable_id) and COLUMN_NAME_PATTERN.match(column) and value_type in SQL_TYPES):
+            print(f"Skipping variable {variable_id} with an invalid column name or type")
+            continue
+        variables.append((variable_id, column, value_type, description))
+    return sorted(variables, key=lambda v: (order.index(v[1]) if v[1] in order else len(order), v[1]))
+
+
+def drop_relation(cursor, name):
+    """Drop a table, view or materialized view, whichever the name refers to"""
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (name,))
+    row = cursor.fetchone()
+    kinds = {"r": "TABLE", "v": "VIEW", "m": "MATERIALIZED VIEW"}
+    if row and row[0] in kinds:
+        cursor.execute(f"DROP {kinds[row[0]]} {name} CASCADE")
+
+
+def create_pivot_view(cursor, view, state_code, comment, variables, year):
+    """Create a materialized wide view of one year of county values
+    
+    Each popular variable becomes a column cast to its catalog type. The
+    values join reads one primary key range per variable.
+    """
+    columns = ",\n".join(
+        f"            (MAX(v.value) FILTER (WHERE v.variable_id = '{variable_id}'))::{value_type} AS {column}"
+        for variable_id, column, value_type, _ in variables
+    )
+    variable_ids = ", ".join(f"'{variable_id}'" for variable_id, _, _, _ in variables)
+    state_filter = f"AND g.state_code = '{state_code}'" if state_code else ""
+    cursor.execute(f"""
+        CREATE MATERIALIZED VIEW {view} AS
+        SELECT
+            (ROW_NUMBER() OVER (ORDER BY g.geo_id))::INTEGER AS id,
+            split_part(g.name, ', ', 1)::VARCHAR(100) AS county_name,
+            g.state_code,
+            g.county_code,
+{columns},
+            CURRENT_TIMESTAMP::TIMESTAMP AS created_at
+        FROM {GEOGRAPHIES_TABLE} g
+        LEFT JOIN {VALUES_TABLE} v
+            ON v.geo_id = g.geo_id AND v.year = {int(year)} AND v.variable_id IN ({variable_ids})
+        WHERE g.geo_level = 'county' {state_filter}
+        GROUP BY g.geo_id, g.name, g.state_code, g.county_code
+    """)
+    cursor.execute(f"CREATE UNIQUE INDEX {view}_id_idx ON {view} (id)")
+    cursor.execute(f"CREATE INDEX {view}_county_name_idx ON {view} (county_name)")
+    
+    cursor.execute(f"COMMENT ON MATERIALIZED VIEW {view} IS %s", (f"{comment} ({year})",))
+    column_comments = [
+        ("county_name", "Name of the county extracted from Census API NAME field"),
+        ("state_code", "State FIPS code"),
+        ("county_code", "3-digit county FIPS code within the state"),
+        ("created_at", "Timestamp when the view was generated from census_values"),
+    ] + [(column, f"{variable_id}: {description}") for variable_id, column, _, description in variables]
+    for column, column_comment in column_comments:
+        cursor.execute(f"COMMENT ON COLUMN {view}.{column} IS %s", (column_comment,))
+    
+    cursor.execute(f"ANALYZE {view}")
+    cursor.execute(f"GRANT SELECT ON {view} TO census_reader")
+
+
+def insert_data(geographies, values, catalog, year=CENSUS_YEAR):
+    """Load the long-format store with COPY and regenerate the pivot views
+    
+    Values are streamed with COPY into a staging table, which is indexed and
+    analyzed before it replaces census_values with a rename. The variable
+    catalog, geographies and generated views are replaced in the same
+    transaction, so readers never see an empty or partially loaded store.
+    """
+    conn = None
+    cursor = None
     try:
         conn = psycopg2.connect(**DB_CONFIG)
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        
-        # Clear existing data
-        cursor.execute("DELETE FROM ny_census_data")
-        
-        for row in rows:
-            # Create a dictionary from headers and row data
-            data_dict = dict(zip(headers, row))
-            
-            # Extract values, handling nulls and converting to appropriate types
-            def safe_int(value):
-                try:
-                    return int(value) if value and value != '-888888888' else None
-                except (ValueError, TypeError):
-                    return None
-            
-            def safe_float(value):
-                try:
-                    return float(value) if value and value != '-888888888' else None
-                except (ValueError, TypeError):
-                    return None
-            
-            # Extract county name from API response (format: "County Name, New York")
-            county_name = data_dict['NAME'].split(', ')[0]
-            
-            insert_query = """
-                INSERT INTO ny_census_data (
-                    county_name, state_code, county_code,
-                    total_population, median_household_income, total_housing_units,
-                    owner_occupied_units, renter_occupied_units,
-                    bachelors_degree_holders, graduate_degree_holders, high_school_graduates,
-                    unemployed_count, median_earnings,
-                    median_age, population_under_18, population_18_and_over,
-                    white_alone, black_alone, hispanic_latino,
-                    median_home_value
-                ) VALUES (
-                    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-                )
-            """
-            
-            values = (
-                county_name,
-                data_dict['state'],
-                data_dict['county'],
-                safe_int(data_dict['B01003_001E']),
-                safe_int(data_dict['B19013_001E']),
-                safe_int(data_dict['B25001_001E']),
-                safe_int(data_dict['B25003_002E']),
-                safe_int(data_dict['B25003_003E']),
-                safe_int(data_dict['DP02_0065E']),
-                safe_int(data_dict['DP02_0066E']),
-                safe_int(data_dict['DP02_0062E']),
-                safe_float(data_dict['DP03_0005E']),
-                safe_int(data_dict['DP03_0062E']),
-                safe_float(data_dict['DP05_0018E']),
-                safe_int(data_dict['DP05_0019E']),
-                safe_int(data_dict['DP05_0021E']),
-                safe_int(data_dict['DP05_0037E']),
-                safe_int(data_dict['DP05_0038E']),
-                safe_int(data_dict['DP05_0071E']),
-                safe_int(data_dict['DP04_0089E']),
-            )
-            
-            cursor.execute(insert_query, values)
+        cursor = conn.cursor()
+        
+        # Add new variables to the catalog; curated descriptions and pivot columns are kept
+        cursor.execute(f"CREATE TEMP TABLE variables_load (LIKE {VARIABLES_TABLE} INCLUDING DEFAULTS) ON COMMIT DROP")
+        cursor.copy_expert(
+            "COPY variables_load (variable_id, dataset, label, concept) FROM STDIN WITH (FORMAT csv)",
+            CopyBuffer(catalog)
+        )
+        cursor.execute(f"""
+            INSERT INTO {VARIABLES_TABLE} (variable_id, dataset, label, concept)
+            SELECT variable_id, dataset, label, concept FROM variables_load
+            ON CONFLICT (variable_id) DO UPDATE
+            SET dataset = EXCLUDED.dataset, label = EXCLUDED.label, concept = EXCLUDED.concept
+        """)
+        
+        cursor.execute(f"CREATE TEMP TABLE geographies_load (LIKE {GEOGRAPHIES_TABLE}) ON COMMIT DROP")
+        cursor.copy_expert("COPY geographies_load FROM STDIN WITH (FORMAT csv)", CopyBuffer(geographies))
+        cursor.execute(f"""
+            INSERT INTO {GEOGRAPHIES_TABLE} SELECT * FROM geographies_load
+            ON CONFLICT (geo_id) DO UPDATE SET name = EXCLUDED.name
+        """)
+        
+        cursor.execute(f"DROP TABLE IF EXISTS {VALUES_STAGING_TABLE}")
+        cursor.execute(
+            f"CREATE TABLE {VALUES_STAGING_TABLE} "
+            f"(LIKE {VALUES_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING COMMENTS)"
+        )
+        copy_buffer = CopyBuffer(values)
+        cursor.copy_expert(f"COPY {VALUES_STAGING_TABLE} FROM STDIN WITH (FORMAT csv)", copy_buffer)
+        print(f"Copied {copy_buffer.row_count} values into {VALUES_STAGING_TABLE}")
+        
+        # Build the index after the load, which is much faster than maintaining it per row
+        cursor.execute(
+            f"ALTER TABLE {VALUES_STAGING_TABLE} ADD CONSTRAINT {VALUES_STAGING_TABLE}_pkey "
+            f"PRIMARY KEY (variable_id, year, geo_id)"
+        )
+        cursor.execute(f"ANALYZE {VALUES_STAGING_TABLE}")
+        
+        # Swap the staging table in; dropping the old one also drops the generated views
+        cursor.execute(f"LOCK TABLE {VALUES_TABLE} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(f"DROP TABLE {VALUES_TABLE} CASCADE")
+        cursor.execute(f"ALTER TABLE {VALUES_STAGING_TABLE} RENAME TO {VALUES_TABLE}")
+        cursor.execute(f"ALTER INDEX {VALUES_STAGING_TABLE}_pkey RENAME TO {VALUES_TABLE}_pkey")
+        cursor.execute(f"GRANT SELECT ON {VALUES_TABLE} TO census_reader")
+        
+        # The wide tables of earlier versions are replaced by generated views of the same name
+        variables = popular_variables(cursor)
+        for view, state_code, comment in PIVOT_VIEWS:
+            drop_relation(cursor, view)
+            create_pivot_view(cursor, view, state_code, comment, variables, year)
+        cursor.execute(f"ANALYZE {VARIABLES_TABLE}")
+        cursor.execute(f"ANALYZE {GEOGRAPHIES_TABLE}")
+        
+        # Bump the data version so the API invalidates its caches
+        cursor.execute(CREATE_DATA_LOADS_QUERY)
+        cursor.execute("GRANT SELECT ON data_loads TO census_reader")
+        cursor.execute("INSERT INTO data_loads (row_count) VALUES (%s)", (copy_buffer.row_count,))
         
         conn.commit()
-        print(f"Successfully inserted {len(rows)} records")
+        print(f"Successfully inserted {copy_buffer.row_count} values for {len(geographies)} counties")
         
     except psycopg2.Error as e:
         print(f"Database error: {e}")
@@ -212,14 +482,24 @@ def insert_data(headers, rows):
 
 def main():
     print("Fetching New York Census data...")
-    headers, rows = fetch_census_data()
+    variables = load_variables()
+    geographies, values = fetch_census_data(variables)
     
-    if headers and rows:
-        print(f"Retrieved {len(rows)} counties")
-        insert_data(headers, rows)
+    if geographies and values:
+        print(f"Retrieved {len(values)} values of {len(variables)} variables for {len(geographies)} counties")
+        insert_data(geographies, values, fetch_variable_catalog())
         print("Data insertion complete!")
     else:
         print("Failed to fetch data")
+    
+    if CENSUS_LOAD_TRACTS:
+        print("Fetching tract data for all states...")
+        tract_rows = fetch_tract_data()
+        if tract_rows:
+            print(f"Retrieved {len(tract_rows)} tracts")
+            load_tract_data(tract_rows)
+        else:
+            print("Failed to fetch tract data")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,178 @@
+"""Result cache for SQL queries against the static census data."""
+
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import logging
+import re
+import threading
+
+from database.results import ColumnarResult
+
+logger = logging.getLogger(__name__)
+
+_SQL_TOKEN_PATTERN = re.compile(
+    r"""
+    (?P<string>'(?:[^']|'')*')
+    | (?P<identifier>"(?:[^"]|"")*")
+    | (?P<comment>--[^\n]*|/\*.*?\*/)
+    | (?P<number>(?:\d+\.\d*|\.\d+|\d+)(?:[eE][+-]?\d+)?)
+    | (?P<word>\w+)
+    | (?P<space>\s+)
+    | (?P<symbol>.)
+    """,
+    re.VERBOSE | re.DOTALL
+)
+
+_READ_STATEMENTS = ("select", "with")
+
+
+def normalize_sql(query: str) -> str:
+    """Canonicalize a SQL query for use as a cache key.
+
+    Whitespace and comments are dropped, keywords and unquoted identifiers
+    are lowercased, integer literals lose leading zeros and a trailing
+    semicolon is ignored. String literals and quoted identifiers are kept
+    verbatim since they are case sensitive.
+
+    Args:
+        query: SQL query text
+
+    Returns:
+        Normalized query text
+    """
+    tokens = []
+    for match in _SQL_TOKEN_PATTERN.finditer(query):
+        kind = match.lastgroup
+        value = match.group()
+        if kind in ("space", "comment"):
+            continue
+        if kind == "word":
+            value = value.lower()
+        elif kind == "number":
+            value = str(int(value)) if value.isdigit() else value.lower()
+        tokens.append(value)
+
+    while tokens and tokens[-1] == ";":
+        tokens.pop()
+    return " ".join(tokens)
+
+
+def strip_sql_trailer(query: str) -> str:
+    """Remove trailing whitespace, comments and semicolons from a SQL query.
+
+    The rest of the query is kept verbatim, so it can be embedded in a
+    larger statement, e.g. as a subquery, without a trailing line comment
+    swallowing the text after it.
+
+    Args:
+        query: SQL query text
+
+    Returns:
+        Query text ending at its last token
+    """
+    end = 0
+    for match in _SQL_TOKEN_PATTERN.finditer(query):
+        if match.lastgroup not in ("space", "comment") and match.group() != ";":
+            end = match.end()
+    return query[:end]
+
+
+def is_read_query(normalized_query: str) -> bool:
+    """Whether a normalized query is a read-only statement worth caching."""
+    return normalized_query.split(" ", 1)[0] in _READ_STATEMENTS
+
+
+class QueryResultCache:
+    """Thread-safe, memory-bounded LRU cache of query results.
+
+    Results are keyed on the normalized SQL text. Entries larger than
+    `max_entry_bytes` are never cached, and least recently used entries are
+    evicted once the total estimated size exceeds `max_bytes`. All entries
+    are dropped when the data load version changes.
+    """
+
+    def __init__(self, max_bytes: int, max_entry_bytes: int) -> None:
+        """Initialize the query result cache.
+
+        Args:
+            max_bytes: Total estimated size of all cached results
+            max_entry_bytes: Largest single result that may be cached
+        """
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[ColumnarResult, int]]" = OrderedDict()
+        self._size = 0
+        self._data_version: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def get(self, key: str, data_version: int) -> Optional[ColumnarResult]:
+        """Look up a cached result for a normalized query.
+
+        Args:
+            key: Normalized SQL query
+            data_version: Current data load version
+
+        Returns:
+            Cached result, or None on a miss. Results are shared and must not be mutated.
+        """
+        with self._lock:
+            self._check_version(data_version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: str, result: ColumnarResult, data_version: int) -> None:
+        """Store the result of a normalized query if it fits the size limits.
+
+        Args:
+            key: Normalized SQL query
+            result: Query result
+            data_version: Data load version the result was read from
+        """
+        size = result.estimate_size()
+        if size > self.max_entry_bytes:
+            logger.debug(f"Not caching query result of {size} bytes")
+            return
+
+        with self._lock:
+            self._check_version(data_version)
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[1]
+
+            self._entries[key] = (result, size)
+            self._size += size
+
+            while self._size > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+
+    def clear(self) -> None:
+        """Drop all cached results."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache hit/miss counters and current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._size
+            }
+
+    def _check_version(self, data_version: int) -> None:
+        """Invalidate all entries if the data has been reloaded. Caller holds the lock."""
+        if self._data_version is not None and data_version != self._data_version:
+            logger.info(f"Data version changed to {data_version}, clearing query cache")
+            self._entries.clear()
+            self._size = 0
+        self._data_version = data_version
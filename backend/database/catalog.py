@@ -0,0 +1,255 @@
+"""In-memory schema catalog for the census database."""
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from typing import Any, Dict, List, Optional, Set
+import logging
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_VALUE_LENGTH = 100
+
+# Bookkeeping tables that hold no census data and are never shown to the agent
+INTERNAL_TABLES = frozenset({"data_loads"})
+
+
+class ColumnInfo:
+    """Column metadata, including its COMMENT ON COLUMN description."""
+
+    def __init__(
+            self,
+            name: str,
+            type: str,
+            nullable: bool,
+            default: Optional[str],
+            primary_key: bool,
+            comment: Optional[str]) -> None:
+        self.name = name
+        self.type = type
+        self.nullable = nullable
+        self.default = default
+        self.primary_key = primary_key
+        self.comment = comment
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to the dictionary format returned by DatabaseManager."""
+        return {
+            "name": self.name,
+            "type": self.type,
+            "nullable": self.nullable,
+            "default": self.default,
+            "primary_key": self.primary_key,
+            "comment": self.comment
+        }
+
+
+class TableInfo:
+    """Table metadata with its columns and a few sample rows.
+
+    `all_rows` holds every row of the table once a sample query has returned
+    fewer rows than it asked for, and is None while that is unknown.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            columns: List[ColumnInfo],
+            comment: Optional[str],
+            sample_rows: List[Dict[str, Any]],
+            all_rows: Optional[List[Dict[str, Any]]] = None) -> None:
+        self.name = name
+        self.columns = columns
+        self.comment = comment
+        self.sample_rows = sample_rows
+        self.all_rows = all_rows
+
+    def render(self, column_names: Optional[List[str]] = None) -> str:
+        """Render the table as a CREATE TABLE statement with sample rows.
+
+        Follows the format of LangChain's SQLDatabase.get_table_info, with
+        column descriptions added as inline comments.
+
+        Args:
+            column_names: Columns to include, all columns if None
+        """
+        columns = self.columns
+        if column_names is not None:
+            columns = [column for column in self.columns if column.name in column_names]
+
+        lines = []
+        for column in columns:
+            line = f"\t{column.name} {column.type}"
+            if not column.nullable:
+                line += " NOT NULL"
+            lines.append((line, column.comment))
+
+        primary_key = [column.name for column in columns if column.primary_key]
+        if primary_key:
+            lines.append((f"\tPRIMARY KEY ({', '.join(primary_key)})", None))
+
+        body = []
+        for index, (line, comment) in enumerate(lines):
+            separator = "," if index < len(lines) - 1 else ""
+            body.append(f"{line}{separator} -- {comment}" if comment else f"{line}{separator}")
+
+        header = f"-- {self.comment}\n" if self.comment else ""
+        if len(columns) < len(self.columns):
+            header += f"-- Showing {len(columns)} of {len(self.columns)} columns, those relevant to the question\n"
+        create_table = f"{header}CREATE TABLE {self.name} (\n" + "\n".join(body) + "\n)"
+
+        header_row = "\t".join(column.name for column in columns)
+        sample_rows = "\n".join(
+            "\t".join(str(row.get(column.name))[:SAMPLE_VALUE_LENGTH] for column in columns)
+            for row in self.sample_rows
+        )
+        return (
+            f"{create_table}\n\n/*\n"
+            f"{len(self.sample_rows)} rows from {self.name} table:\n"
+            f"{header_row}\n"
+            f"{sample_rows}\n*/"
+        )
+
+
+class SchemaSelection:
+    """Tables and columns of the catalog selected as relevant to one question."""
+
+    def __init__(self, tables: List[str], columns: Dict[str, List[str]]) -> None:
+        """Initialize the selection.
+
+        Args:
+            tables: Most relevant tables, best first
+            columns: Relevant columns per table, for every table of the catalog
+        """
+        self.tables = tables
+        self.columns = columns
+
+
+def _partition_names(engine: Engine) -> Set[str]:
+    """Get the names of table partitions, which are queried through their parent table."""
+    if engine.dialect.name != "postgresql":
+        return set()
+    try:
+        with engine.connect() as conn:
+            return set(conn.execute(text("SELECT relname FROM pg_class WHERE relispartition")).scalars())
+    except SQLAlchemyError as e:
+        logger.warning(f"Could not list table partitions: {e}")
+        return set()
+
+
+def _unpopulated_view_names(engine: Engine) -> Set[str]:
+    """Get the names of materialized views that were never refreshed and cannot be queried."""
+    if engine.dialect.name != "postgresql":
+        return set()
+    try:
+        with engine.connect() as conn:
+            return set(conn.execute(text(
+                "SELECT matviewname FROM pg_matviews WHERE schemaname = current_schema() AND NOT ispopulated"
+            )).scalars())
+    except SQLAlchemyError as e:
+        logger.warning(f"Could not list unpopulated materialized views: {e}")
+        return set()
+
+
+class SchemaCatalog:
+    """Snapshot of the database schema held in memory.
+
+    Built once by introspecting the database and then served without any
+    further catalog or sample queries until it is explicitly refreshed.
+    """
+
+    def __init__(self, tables: Dict[str, TableInfo]) -> None:
+        self.tables = tables
+
+    @classmethod
+    def build(cls, engine: Engine, sample_rows: int = 3) -> "SchemaCatalog":
+        """Introspect the database and build a catalog.
+
+        Args:
+            engine: Database engine to introspect
+            sample_rows: Number of sample rows to keep per table
+
+        Returns:
+            SchemaCatalog with all tables and populated materialized views in the default schema
+        """
+        inspector = inspect(engine)
+        tables = {}
+
+        partitions = _partition_names(engine)
+        table_names = [name for name in inspector.get_table_names() if name not in partitions]
+        unpopulated = _unpopulated_view_names(engine)
+        try:
+            table_names += [
+                name for name in inspector.get_materialized_view_names() if name not in unpopulated
+            ]
+        except NotImplementedError:
+            pass
+
+        for table_name in table_names:
+            primary_key = set(inspector.get_pk_constraint(table_name).get("constrained_columns") or [])
+            columns = [
+                ColumnInfo(
+                    name=column["name"],
+                    type=str(column["type"]),
+                    nullable=column["nullable"],
+                    default=column.get("default"),
+                    primary_key=column["name"] in primary_key,
+                    comment=column.get("comment")
+                )
+                for column in inspector.get_columns(table_name)
+            ]
+
+            try:
+                comment = inspector.get_table_comment(table_name).get("text")
+            except NotImplementedError:
+                comment = None
+
+            rows = []
+            all_rows = None
+            if sample_rows:
+                try:
+                    with engine.connect() as conn:
+                        result = conn.execute(text(f"SELECT * FROM {table_name} LIMIT {sample_rows}"))
+                        rows = [dict(row._mapping) for row in result]
+                    if len(rows) < sample_rows:
+                        all_rows = rows
+                except SQLAlchemyError as e:
+                    logger.warning(f"Could not get sample data for table {table_name}: {e}")
+
+            tables[table_name] = TableInfo(table_name, columns, comment, rows, all_rows)
+
+        logger.info(f"Built schema catalog with {len(tables)} tables")
+        return cls(tables)
+
+    def table_names(self) -> List[str]:
+        """Get the sorted names of all tables."""
+        return sorted(self.tables)
+
+    def get_table(self, table_name: str) -> Optional[TableInfo]:
+        """Get a table by name, or None if it does not exist."""
+        return self.tables.get(table_name)
+
+    def render(self, table_names: List[str], columns: Optional[Dict[str, List[str]]] = None) -> str:
+        """Render several tables for prompt context.
+
+        Args:
+            table_names: Tables to render, in the order given
+            columns: Columns to include per table, all columns of tables missing from it
+        """
+        columns = columns or {}
+        return "\n\n".join(self.tables[name].render(columns.get(name)) for name in table_names)
+
+    def render_overview(self, table_names: List[str], max_tables: int) -> str:
+        """Render a list of table names and descriptions, without columns.
+
+        Args:
+            table_names: Tables to list, in the order given
+            max_tables: Maximum number of tables listed; the rest are counted
+        """
+        lines = []
+        for name in table_names[:max_tables]:
+            comment = self.tables[name].comment
+            lines.append(f"- {name}: {comment}" if comment else f"- {name}")
+        if len(table_names) > max_tables:
+            lines.append(f"- ... and {len(table_names) - max_tables} more tables")
+        return "\n".join(lines)
@@ -0,0 +1,224 @@
+"""Concurrent, resumable fetcher for the Census ACS API
+
+Requests are split into (endpoint, variable chunk, year, state) shards that
+are fetched by a bounded thread pool. Failed requests are retried with exponential backoff,
+and every successful raw response is cached on disk under a key derived
+from the request contents, so re-runs and runs that failed part way only
+fetch the shards that are missing.
+
+The API base URL is configurable, which allows running the fetcher against
+a local stub HTTP server.
+"""
+
+import hashlib
+import json
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import requests
+
+DEFAULT_BASE_URL = "https://api.census.gov/data"
+
+MAIN_ENDPOINT = "acs/acs5"
+PROFILE_ENDPOINT = "acs/acs5/profile"
+SUBJECT_ENDPOINT = "acs/acs5/subject"
+
+# FIPS codes of the 50 states, DC and Puerto Rico
+ALL_STATES = [
+    "01", "02", "04", "05", "06", "08", "09", "10", "11", "12", "13", "15", "16",
+    "17", "18", "19", "20", "21", "22", "23", "24", "25", "26", "27", "28", "29",
+    "30", "31", "32", "33", "34", "35", "36", "37", "38", "39", "40", "41", "42",
+    "44", "45", "46", "47", "48", "49", "50", "51", "53", "54", "55", "56", "72",
+]
+
+# The API rejects requests for more than 50 variables, NAME included
+MAX_VARIABLES_PER_REQUEST = 49
+
+# Status codes worth retrying; other client errors are permanent
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Status the API answers with when a geography has no data
+NO_CONTENT_STATUS_CODE = 204
+
+
+class Shard(NamedTuple):
+    """One Census API request: a set of variables for all counties or tracts of a state in a year"""
+    endpoint: str
+    year: int
+    state: str
+    variables: Tuple[str, ...]
+    geography: str = "county"
+
+
+class FetchError(Exception):
+    """Raised when a shard could not be fetched after all retries"""
+
+
+def build_shards(
+        endpoint_variables: Dict[str, Sequence[str]],
+        years: Sequence[int],
+        states: Sequence[str],
+        geography: str = "county",
+        max_variables: int = MAX_VARIABLES_PER_REQUEST) -> List[Shard]:
+    """Build the shards for every combination of endpoint, variable chunk, year and state
+
+    Variables are split into chunks of at most `max_variables`, each
+    requested together with NAME, so any number of variables can be fetched.
+    """
+    shards = []
+    for endpoint, variables in endpoint_variables.items():
+        variables = [variable for variable in variables if variable != "NAME"]
+        for start in range(0, len(variables), max_variables):
+            chunk = ("NAME",) + tuple(variables[start:start + max_variables])
+            shards += [Shard(endpoint, year, state, chunk, geography) for year in years for state in states]
+    return shards
+
+
+class CensusFetcher:
+    """Fetches Census API shards concurrently with retries and an on-disk cache"""
+
+    def __init__(
+            self,
+            cache_dir: str,
+            base_url: str = DEFAULT_BASE_URL,
+            api_key: str = "",
+            max_workers: int = 8,
+            max_retries: int = 5,
+            backoff_seconds: float = 1.0,
+            timeout_seconds: float = 30.0):
+        """Initialize the fetcher
+
+        Args:
+            cache_dir: Directory for cached raw responses
+            base_url: Census API base URL, e.g. a local stub server in tests
+            api_key: Census API key, never part of the cache key
+            max_workers: Maximum number of concurrent requests
+            max_retries: Retries per shard after the first attempt
+            backoff_seconds: Base delay, doubled on every retry
+            timeout_seconds: Timeout of a single request
+        """
+        self.cache_dir = cache_dir
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.timeout_seconds = timeout_seconds
+        self.session = requests.Session()
+
+    def request_for(self, shard: Shard) -> Tuple[str, Dict[str, str]]:
+        """Get the URL and query parameters of a shard, without the API key"""
+        url = f"{self.base_url}/{shard.year}/{shard.endpoint}"
+        params = {
+            "get": ",".join(shard.variables),
+            "for": f"{shard.geography}:*",
+            "in": f"state:{shard.state}",
+        }
+        return url, params
+
+    def cache_path(self, shard: Shard) -> str:
+        """Get the cache file of a shard, keyed on a hash of its request"""
+        return self._cache_path(*self.request_for(shard))
+
+    def fetch_shard(self, shard: Shard) -> List[List[str]]:
+        """Fetch one shard, from the cache if it has been fetched before
+
+        Returns:
+            Raw API rows, the first row being the headers, or no rows at all
+            if the API has no data for the shard
+
+        Raises:
+            FetchError: If the shard could not be fetched after all retries
+        """
+        url, params = self.request_for(shard)
+        return self._fetch_cached(url, params, f"{shard.endpoint} {shard.year} state {shard.state}")
+
+    def fetch_variables(self, endpoint: str, year: int) -> Dict[str, Dict[str, Any]]:
+        """Fetch the metadata of all variables of an endpoint, from the cache if possible
+
+        Returns:
+            Label, concept and predicate type, among others, per variable ID
+
+        Raises:
+            FetchError: If the metadata could not be fetched after all retries
+        """
+        url = f"{self.base_url}/{year}/{endpoint}/variables.json"
+        return self._fetch_cached(url, {}, f"{endpoint} {year} variables")["variables"]
+
+    def fetch_all(self, shards: Sequence[Shard]) -> Tuple[Dict[Shard, List[List[str]]], Dict[Shard, str]]:
+        """Fetch shards concurrently
+
+        A failed shard does not stop the others; re-running with the same
+        shards picks up the failed ones from where this run left off.
+
+        Returns:
+            Raw rows per fetched shard and the error message per failed shard
+        """
+        results: Dict[Shard, List[List[str]]] = {}
+        failures: Dict[Shard, str] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.fetch_shard, shard): shard for shard in shards}
+            for future in as_completed(futures):
+                shard = futures[future]
+                try:
+                    results[shard] = future.result()
+                except FetchError as e:
+                    failures[shard] = str(e)
+                    print(f"Failed to fetch {e}")
+
+        print(f"Fetched {len(results)} of {len(shards)} shards")
+        return results, failures
+
+    def _cache_path(self, url: str, params: Dict[str, str]) -> str:
+        """Get the cache file of a request, keyed on a hash of its URL and parameters"""
+        canonical = json.dumps({"url": url, "params": params}, sort_keys=True)
+        digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.json")
+
+    def _fetch_cached(self, url: str, params: Dict[str, str], description: str) -> Any:
+        """GET a JSON response with retries, caching it on disk under the request"""
+        path = self._cache_path(url, params)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as cache_file:
+                return json.load(cache_file)
+
+        if self.api_key:
+            params = {**params, "key": self.api_key}
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout_seconds)
+                if response.status_code not in RETRY_STATUS_CODES:
+                    response.raise_for_status()
+                    data = [] if response.status_code == NO_CONTENT_STATUS_CODE else response.json()
+                    self._write_cache(path, data)
+                    return data
+                error = f"HTTP {response.status_code}"
+            except requests.HTTPError as e:
+                raise FetchError(f"{description}: {e}") from e
+            except (requests.RequestException, ValueError) as e:
+                error = str(e)
+
+            if attempt < self.max_retries:
+                delay = self.backoff_seconds * 2 ** attempt * (1 + random.random())
+                print(f"Retrying {description} in {delay:.1f}s: {error}")
+                time.sleep(delay)
+
+        raise FetchError(f"{description}: {error}")
+
+    def _write_cache(self, path: str, data: Optional[list]) -> None:
+        """Write a response to the cache atomically, so partial files are never read"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as temp_file:
+                json.dump(data, temp_file)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
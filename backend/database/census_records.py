@@ -0,0 +1,76 @@
+"""Conversion of Census API rows to database values
+
+Kept free of database drivers, so the conversions can be tested without
+a database.
+"""
+
+# The Census API reports unavailable estimates as large negative markers,
+# e.g. -666666666 (too few sample observations), -888888888 (not applicable)
+# or -999999999 (not computed). No real estimate is this low.
+MISSING_VALUE_LIMIT = -100000000
+
+
+def safe_int(value):
+    """Convert a Census API value to int, treating missing values as NULL"""
+    try:
+        number = int(value)
+    except (ValueError, TypeError):
+        return None
+    return number if number > MISSING_VALUE_LIMIT else None
+
+
+def safe_float(value):
+    """Convert a Census API value to float, treating missing values as NULL"""
+    try:
+        number = float(value)
+    except (ValueError, TypeError):
+        return None
+    return number if number > MISSING_VALUE_LIMIT else None
+
+
+# Popular variables with their ny_census_data columns and converters, also loaded per tract
+CENSUS_COLUMNS = [
+    ("total_population", "B01003_001E", safe_int),
+    ("median_household_income", "B19013_001E", safe_int),
+    ("total_housing_units", "B25001_001E", safe_int),
+    ("owner_occupied_units", "B25003_002E", safe_int),
+    ("renter_occupied_units", "B25003_003E", safe_int),
+    ("bachelors_degree_holders", "DP02_0065E", safe_int),
+    ("graduate_degree_holders", "DP02_0066E", safe_int),
+    ("high_school_graduates", "DP02_0062E", safe_int),
+    ("unemployed_count", "DP03_0005E", safe_float),
+    ("median_earnings", "DP03_0062E", safe_int),
+    ("median_age", "DP05_0018E", safe_float),
+    ("population_under_18", "DP05_0019E", safe_int),
+    ("population_18_and_over", "DP05_0021E", safe_int),
+    ("white_alone", "DP05_0037E", safe_int),
+    ("black_alone", "DP05_0038E", safe_int),
+    ("hispanic_latino", "DP05_0071E", safe_int),
+    ("median_home_value", "DP04_0089E", safe_int),
+]
+
+TRACT_LOAD_COLUMNS = (
+    ["year", "state_code", "county_code", "tract_code", "tract_name", "county_name", "state_name"]
+    + [column for column, _, _ in CENSUS_COLUMNS]
+)
+
+
+def split_tract_name(name):
+    """Split a tract NAME into tract, county and state names
+
+    Recent vintages separate the parts with semicolons, older ones with commas.
+    """
+    separator = "; " if "; " in name else ", "
+    parts = name.split(separator)
+    if len(parts) != 3:
+        return name, None, None
+    return parts[0], parts[1], parts[2]
+
+
+def to_tract_record(row_dict, year):
+    """Convert a merged tract row to the values of TRACT_LOAD_COLUMNS"""
+    tract_name, county_name, state_name = split_tract_name(row_dict["NAME"])
+    return (
+        [year, row_dict["state"], row_dict["county"], row_dict["tract"], tract_name, county_name, state_name]
+        + [converter(row_dict.get(variable)) for _, variable, converter in CENSUS_COLUMNS]
+    )
@@ -0,0 +1,148 @@
+"""EXPLAIN-based cost guard for SQL written by the agent."""
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import SQLAlchemyError
+from typing import Any, Dict, Iterator, List
+import json
+import logging
+
+from database.cache import strip_sql_trailer
+
+logger = logging.getLogger(__name__)
+
+ROW_CAP_WRAP = "wrap"
+ROW_CAP_REJECT = "reject"
+
+_SUPPORTED_DIALECTS = ("postgresql",)
+
+
+class QueryBudgetExceeded(SQLAlchemyError):
+    """Raised when the planner estimates a query to be over budget.
+
+    Derives from SQLAlchemyError so callers that already handle query
+    errors, including LangChain's SQL tools, surface the message to the
+    agent, which can then rewrite the query.
+    """
+
+
+class PlanEstimate:
+    """Planner estimates for the top node of a query plan."""
+
+    def __init__(self, cost: float, rows: float, node_types: List[str], has_cross_join: bool) -> None:
+        self.cost = cost
+        self.rows = rows
+        self.node_types = node_types
+        self.has_cross_join = has_cross_join
+
+
+def _walk_plan(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _walk_plan(child)
+
+
+def parse_plan(explain_output: Any) -> PlanEstimate:
+    """Parse the output of EXPLAIN (FORMAT JSON).
+
+    Args:
+        explain_output: JSON text or decoded JSON returned by EXPLAIN
+
+    Returns:
+        PlanEstimate for the query
+    """
+    if isinstance(explain_output, str):
+        explain_output = json.loads(explain_output)
+    plan = explain_output[0]["Plan"]
+    nodes = list(_walk_plan(plan))
+    has_cross_join = any(
+        node["Node Type"] == "Nested Loop" and "Join Filter" not in node
+        and not any("Index Cond" in child or "Filter" in child for child in node.get("Plans", []))
+        for node in nodes
+    )
+    return PlanEstimate(
+        cost=float(plan["Total Cost"]),
+        rows=float(plan["Plan Rows"]),
+        node_types=[node["Node Type"] for node in nodes],
+        has_cross_join=has_cross_join
+    )
+
+
+class QueryCostGuard:
+    """Checks queries against planner cost and row budgets before they run.
+
+    Queries whose estimated cost exceeds `max_cost` are rejected with a
+    hint on how to make them cheaper. Queries that are cheap enough but
+    estimated to return more than `max_rows` rows are either wrapped with a
+    row cap or rejected, depending on `row_cap_mode`.
+    """
+
+    def __init__(self, max_cost: float, max_rows: int, row_cap_mode: str = ROW_CAP_WRAP) -> None:
+        """Initialize the cost guard.
+
+        Args:
+            max_cost: Largest planner total cost a query may have
+            max_rows: Largest estimated number of rows a query may return
+            row_cap_mode: "wrap" to cap over-budget results, "reject" to refuse them
+        """
+        if row_cap_mode not in (ROW_CAP_WRAP, ROW_CAP_REJECT):
+            raise ValueError(f"Unknown row cap mode: {row_cap_mode}")
+        self.max_cost = max_cost
+        self.max_rows = max_rows
+        self.row_cap_mode = row_cap_mode
+        self.rejected = 0
+        self.wrapped = 0
+
+    def check(self, conn: Connection, query: str) -> str:
+        """Check a read query against the budgets.
+
+        Args:
+            conn: Connection the query will run on
+            query: SQL query to check
+
+        Returns:
+            The query to run, possibly wrapped with a row cap
+
+        Raises:
+            QueryBudgetExceeded: If the query is over budget and cannot be capped
+        """
+        if conn.dialect.name not in _SUPPORTED_DIALECTS:
+            return query
+
+        statement = strip_sql_trailer(query)
+        estimate = parse_plan(conn.execute(text(f"EXPLAIN (FORMAT JSON) {statement}")).scalar())
+
+        if estimate.cost > self.max_cost:
+            self.rejected += 1
+            logger.warning(f"Rejected query with estimated cost {estimate.cost:.0f}: {statement}")
+            raise QueryBudgetExceeded(
+                f"Query rejected: estimated cost {estimate.cost:.0f} exceeds the budget of "
+                f"{self.max_cost:.0f}. {self._hint(estimate)}"
+            )
+
+        if estimate.rows > self.max_rows:
+            if self.row_cap_mode == ROW_CAP_REJECT:
+                self.rejected += 1
+                raise QueryBudgetExceeded(
+                    f"Query rejected: it would return about {estimate.rows:.0f} rows, more than the "
+                    f"limit of {self.max_rows}. Add a LIMIT or aggregate the rows with GROUP BY."
+                )
+            self.wrapped += 1
+            logger.info(f"Capping query estimated at {estimate.rows:.0f} rows to {self.max_rows} rows")
+            return f"SELECT * FROM ({statement}) AS capped_result LIMIT {self.max_rows}"
+
+        return query
+
+    def stats(self) -> Dict[str, int]:
+        """Get the numbers of rejected and row-capped queries."""
+        return {"rejected": self.rejected, "wrapped": self.wrapped}
+
+    def _hint(self, estimate: PlanEstimate) -> str:
+        """Suggest how to bring an over-budget query within budget."""
+        if estimate.has_cross_join:
+            return "The plan contains a cross join; add a join condition between the tables."
+        if estimate.rows > self.max_rows:
+            return "Aggregate first with GROUP BY or add a WHERE filter and a LIMIT."
+        if "Sort" in estimate.node_types:
+            return "Filter the rows with WHERE before sorting, or query a smaller table."
+        return "Add a WHERE filter or aggregate first to scan fewer rows."
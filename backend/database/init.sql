@@ -5,81 +5,205 @@ CREATE USER census_reader WITH PASSWORD 'readonly_password';
 GRANT CONNECT ON DATABASE data_agent TO census_reader;
 GRANT USAGE ON SCHEMA public TO census_reader;
 
--- Create the main table
-CREATE TABLE IF NOT EXISTS ny_census_data (
+-- Long-format store of ACS estimates: one row per geography, variable and year.
+-- Adding a variable only needs a catalog row and a reload, not a schema change.
+CREATE TABLE IF NOT EXISTS census_geographies (
+    geo_id VARCHAR(40) PRIMARY KEY,
+    geo_level VARCHAR(20) NOT NULL,
+    state_code VARCHAR(2) NOT NULL,
+    county_code VARCHAR(3),
+    name VARCHAR(200)
+);
+
+COMMENT ON TABLE census_geographies IS 'Geographies with values in census_values';
+COMMENT ON COLUMN census_geographies.geo_id IS 'Census GEO_ID, e.g. 0500000US36001 for Albany County, New York';
+COMMENT ON COLUMN census_geographies.geo_level IS 'Geographic level: county';
+COMMENT ON COLUMN census_geographies.name IS 'Full Census name, e.g. Albany County, New York';
+
+CREATE TABLE IF NOT EXISTS census_variables (
+    variable_id VARCHAR(20) PRIMARY KEY,
+    dataset VARCHAR(40) NOT NULL,
+    label TEXT,
+    concept TEXT,
+    description TEXT,
+    column_name VARCHAR(63) UNIQUE,
+    value_type VARCHAR(20) NOT NULL DEFAULT 'DOUBLE PRECISION',
+    is_popular BOOLEAN NOT NULL DEFAULT FALSE
+);
+
+COMMENT ON TABLE census_variables IS 'Catalog of ACS variables; search label and concept to find the variable_id of a metric in census_values';
+COMMENT ON COLUMN census_variables.variable_id IS 'ACS variable ID, e.g. B01003_001E';
+COMMENT ON COLUMN census_variables.dataset IS 'Census API dataset of the variable, e.g. acs/acs5 or acs/acs5/profile';
+COMMENT ON COLUMN census_variables.label IS 'Census label of the variable';
+COMMENT ON COLUMN census_variables.concept IS 'Census concept (table title) the variable belongs to';
+COMMENT ON COLUMN census_variables.column_name IS 'Column of the variable in the generated pivot views such as ny_census_data';
+COMMENT ON COLUMN census_variables.is_popular IS 'Whether the variable is a column of the generated pivot views';
+
+CREATE TABLE IF NOT EXISTS census_values (
+    variable_id VARCHAR(20) NOT NULL,
+    year SMALLINT NOT NULL,
+    geo_id VARCHAR(40) NOT NULL,
+    value DOUBLE PRECISION NOT NULL,
+    PRIMARY KEY (variable_id, year, geo_id)
+);
+
+COMMENT ON TABLE census_values IS 'ACS estimates in long format; the primary key serves scans of one variable across geographies. Join census_geographies for names';
+COMMENT ON COLUMN census_values.year IS 'Final year of the ACS 5-year estimate period';
+COMMENT ON COLUMN census_values.value IS 'Estimate; unavailable estimates are omitted rather than stored as NULL';
+
+-- Variables of the ny_census_data pivot, with official Census Bureau definitions.
+-- The bootstrap adds labels and concepts for every other variable of the datasets.
+INSERT INTO census_variables (variable_id, dataset, label, description, column_name, value_type, is_popular) VALUES
+    ('B01003_001E', 'acs/acs5', 'Total Population', 'Total Population - Total count of all people residing in the geographic area', 'total_population', 'INTEGER', TRUE),
+    ('B19013_001E', 'acs/acs5', 'Median Household Income in the Past 12 Months (in 2022 Inflation-Adjusted Dollars)', 'Median Household Income in the Past 12 Months (in 2022 Inflation-Adjusted Dollars)', 'median_household_income', 'INTEGER', TRUE),
+    ('B25001_001E', 'acs/acs5', 'Housing Units', 'Housing Units - Total count of all housing units (occupied and vacant)', 'total_housing_units', 'INTEGER', TRUE),
+    ('B25003_002E', 'acs/acs5', 'Tenure', 'Tenure - Number of housing units that are owner-occupied', 'owner_occupied_units', 'INTEGER', TRUE),
+    ('B25003_003E', 'acs/acs5', 'Tenure', 'Tenure - Number of housing units that are renter-occupied', 'renter_occupied_units', 'INTEGER', TRUE),
+    ('DP02_0065E', 'acs/acs5/profile', 'Educational Attainment', 'Educational Attainment - Population 25 years and over with bachelor''s degree', 'bachelors_degree_holders', 'INTEGER', TRUE),
+    ('DP02_0066E', 'acs/acs5/profile', 'Educational Attainment', 'Educational Attainment - Population 25 years and over with graduate or professional degree', 'graduate_degree_holders', 'INTEGER', TRUE),
+    ('DP02_0062E', 'acs/acs5/profile', 'Educational Attainment', 'Educational Attainment - Population 25 years and over who are high school graduates (includes equivalency)', 'high_school_graduates', 'INTEGER', TRUE),
+    ('DP03_0005E', 'acs/acs5/profile', 'Employment Status', 'Employment Status - Population 16 years and over in civilian labor force who are unemployed', 'unemployed_count', 'INTEGER', TRUE),
+    ('DP03_0062E', 'acs/acs5/profile', 'Income and Benefits', 'Income and Benefits - Median household income in dollars (in 2022 inflation-adjusted dollars)', 'median_earnings', 'INTEGER', TRUE),
+    ('DP05_0018E', 'acs/acs5/profile', 'Sex and Age', 'Sex and Age - Median age in years of the total population', 'median_age', 'REAL', TRUE),
+    ('DP05_0019E', 'acs/acs5/profile', 'Sex and Age', 'Sex and Age - Number of people under 18 years of age', 'population_under_18', 'INTEGER', TRUE),
+    ('DP05_0021E', 'acs/acs5/profile', 'Sex and Age', 'Sex and Age - Number of people 18 years and over', 'population_18_and_over', 'INTEGER', TRUE),
+    ('DP05_0037E', 'acs/acs5/profile', 'Race', 'Race - Number of people who identify as White alone (one race)', 'white_alone', 'INTEGER', TRUE),
+    ('DP05_0038E', 'acs/acs5/profile', 'Race', 'Race - Number of people who identify as Black or African American alone (one race)', 'black_alone', 'INTEGER', TRUE),
+    ('DP05_0071E', 'acs/acs5/profile', 'Hispanic or Latino', 'Hispanic or Latino - Number of people of Hispanic or Latino origin (any race)', 'hispanic_latino', 'INTEGER', TRUE),
+    ('DP04_0089E', 'acs/acs5/profile', 'Housing Value', 'Housing Value - Median value in dollars of owner-occupied housing units', 'median_home_value', 'INTEGER', TRUE)
+ON CONFLICT (variable_id) DO NOTHING;
+
+-- ny_census_data, the original wide table of New York counties, is generated by the
+-- bootstrap as a materialized pivot of the popular variables in census_values.
+
+-- Record of data loads, used by the API to invalidate caches after a reload
+CREATE TABLE IF NOT EXISTS data_loads (
     id SERIAL PRIMARY KEY,
+    row_count INTEGER,
+    loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE data_loads IS 'One row per census data load; the latest id is the current data version';
+
+-- Grant SELECT permission on the tables to read-only user
+GRANT SELECT ON census_geographies TO census_reader;
+GRANT SELECT ON census_variables TO census_reader;
+GRANT SELECT ON census_values TO census_reader;
+GRANT SELECT ON data_loads TO census_reader;
+
+-- Cancel runaway agent-generated queries; the API also sets this per connection
+ALTER ROLE census_reader SET statement_timeout = '15s';
+
+-- Tract-level fact table for all states, one partition per ACS vintage created by the bootstrap
+CREATE TABLE IF NOT EXISTS census_tract_data (
+    year SMALLINT NOT NULL,
+    state_code VARCHAR(2) NOT NULL,
+    county_code VARCHAR(3) NOT NULL,
+    tract_code VARCHAR(6) NOT NULL,
+    tract_name VARCHAR(200),
     county_name VARCHAR(100),
-    state_code VARCHAR(2),
-    county_code VARCHAR(3),
+    state_name VARCHAR(100),
     
-    -- Population & Housing
     total_population INTEGER,
     median_household_income INTEGER,
     total_housing_units INTEGER,
     owner_occupied_units INTEGER,
     renter_occupied_units INTEGER,
-    
-    -- Education
     bachelors_degree_holders INTEGER,
     graduate_degree_holders INTEGER,
     high_school_graduates INTEGER,
-    
-    -- Employment
     unemployed_count INTEGER,
     median_earnings INTEGER,
-    
-    -- Age Demographics
     median_age REAL,
     population_under_18 INTEGER,
     population_18_and_over INTEGER,
-    
-    -- Race/Ethnicity
     white_alone INTEGER,
     black_alone INTEGER,
     hispanic_latino INTEGER,
-    
-    -- Economic
     median_home_value INTEGER,
     
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+    PRIMARY KEY (year, state_code, county_code, tract_code)
+) PARTITION BY LIST (year);
+
+CREATE INDEX IF NOT EXISTS census_tract_data_county_idx ON census_tract_data (state_code, county_code);
+
+COMMENT ON TABLE census_tract_data IS 'ACS 5-year estimates per census tract for all states, partitioned by year. Large: always filter by year and state_code, and prefer the county or state rollups unless tract detail is needed';
+COMMENT ON COLUMN census_tract_data.year IS 'Final year of the ACS 5-year estimate period';
+COMMENT ON COLUMN census_tract_data.state_code IS 'State FIPS code';
+COMMENT ON COLUMN census_tract_data.county_code IS '3-digit county FIPS code within the state';
+COMMENT ON COLUMN census_tract_data.tract_code IS '6-digit census tract code within the county';
+
+-- County and state rollups of the tract data, refreshed by the bootstrap after every load.
+-- They are created populated, empty until the first tract load, so they can be queried
+-- (REFRESH ... CONCURRENTLY also requires a populated view).
+-- Counts are summed; medians cannot be re-aggregated exactly, so they are approximated by
+-- averages of the tract medians weighted by the relevant tract totals.
+CREATE MATERIALIZED VIEW IF NOT EXISTS census_county_rollup AS
+SELECT
+    year,
+    state_code,
+    county_code,
+    MAX(county_name) AS county_name,
+    MAX(state_name) AS state_name,
+    COUNT(*) AS tract_count,
+    SUM(total_population) AS total_population,
+    ROUND(SUM(median_household_income::NUMERIC * (owner_occupied_units + renter_occupied_units))
+        / NULLIF(SUM(owner_occupied_units + renter_occupied_units) FILTER (WHERE median_household_income IS NOT NULL), 0)) AS median_household_income,
+    SUM(total_housing_units) AS total_housing_units,
+    SUM(owner_occupied_units) AS owner_occupied_units,
+    SUM(renter_occupied_units) AS renter_occupied_units,
+    SUM(bachelors_degree_holders) AS bachelors_degree_holders,
+    SUM(graduate_degree_holders) AS graduate_degree_holders,
+    SUM(high_school_graduates) AS high_school_graduates,
+    SUM(unemployed_count) AS unemployed_count,
+    ROUND(SUM(median_age::NUMERIC * total_population)
+        / NULLIF(SUM(total_population) FILTER (WHERE median_age IS NOT NULL), 0), 1) AS median_age,
+    SUM(population_under_18) AS population_under_18,
+    SUM(population_18_and_over) AS population_18_and_over,
+    SUM(white_alone) AS white_alone,
+    SUM(black_alone) AS black_alone,
+    SUM(hispanic_latino) AS hispanic_latino,
+    ROUND(SUM(median_home_value::NUMERIC * owner_occupied_units)
+        / NULLIF(SUM(owner_occupied_units) FILTER (WHERE median_home_value IS NOT NULL), 0)) AS median_home_value
+FROM census_tract_data
+GROUP BY year, state_code, county_code;
+
+CREATE UNIQUE INDEX IF NOT EXISTS census_county_rollup_key_idx ON census_county_rollup (year, state_code, county_code);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS census_state_rollup AS
+SELECT
+    year,
+    state_code,
+    MAX(state_name) AS state_name,
+    COUNT(*) AS county_count,
+    SUM(tract_count) AS tract_count,
+    SUM(total_population) AS total_population,
+    ROUND(SUM(median_household_income * (owner_occupied_units + renter_occupied_units))
+        / NULLIF(SUM(owner_occupied_units + renter_occupied_units) FILTER (WHERE median_household_income IS NOT NULL), 0)) AS median_household_income,
+    SUM(total_housing_units) AS total_housing_units,
+    SUM(owner_occupied_units) AS owner_occupied_units,
+    SUM(renter_occupied_units) AS renter_occupied_units,
+    SUM(bachelors_degree_holders) AS bachelors_degree_holders,
+    SUM(graduate_degree_holders) AS graduate_degree_holders,
+    SUM(high_school_graduates) AS high_school_graduates,
+    SUM(unemployed_count) AS unemployed_count,
+    ROUND(SUM(median_age * total_population)
+        / NULLIF(SUM(total_population) FILTER (WHERE median_age IS NOT NULL), 0), 1) AS median_age,
+    SUM(population_under_18) AS population_under_18,
+    SUM(population_18_and_over) AS population_18_and_over,
+    SUM(white_alone) AS white_alone,
+    SUM(black_alone) AS black_alone,
+    SUM(hispanic_latino) AS hispanic_latino,
+    ROUND(SUM(median_home_value * owner_occupied_units)
+        / NULLIF(SUM(owner_occupied_units) FILTER (WHERE median_home_value IS NOT NULL), 0)) AS median_home_value
+FROM census_county_rollup
+GROUP BY year, state_code;
+
+CREATE UNIQUE INDEX IF NOT EXISTS census_state_rollup_key_idx ON census_state_rollup (year, state_code);
+
+COMMENT ON MATERIALIZED VIEW census_county_rollup IS 'Tract data rolled up per county and year for all states; medians are weighted averages of tract medians';
+COMMENT ON MATERIALIZED VIEW census_state_rollup IS 'Tract data rolled up per state and year; the smallest table for state-level questions';
 
--- Add comments to columns with official Census Bureau definitions
-COMMENT ON COLUMN ny_census_data.county_name IS 'Name of the New York county extracted from Census API NAME field';
-COMMENT ON COLUMN ny_census_data.state_code IS 'State FIPS code (36 for New York)';
-COMMENT ON COLUMN ny_census_data.county_code IS '3-digit county FIPS code within the state';
-
--- Population & Housing Comments (B01003, B19013, B25001, B25003)
-COMMENT ON COLUMN ny_census_data.total_population IS 'B01003_001E: Total Population - Total count of all people residing in the geographic area';
-COMMENT ON COLUMN ny_census_data.median_household_income IS 'B19013_001E: Median Household Income in the Past 12 Months (in 2022 Inflation-Adjusted Dollars)';
-COMMENT ON COLUMN ny_census_data.total_housing_units IS 'B25001_001E: Housing Units - Total count of all housing units (occupied and vacant)';
-COMMENT ON COLUMN ny_census_data.owner_occupied_units IS 'B25003_002E: Tenure - Number of housing units that are owner-occupied';
-COMMENT ON COLUMN ny_census_data.renter_occupied_units IS 'B25003_003E: Tenure - Number of housing units that are renter-occupied';
-
--- Education Comments (DP02) - Population 25 years and over
-COMMENT ON COLUMN ny_census_data.bachelors_degree_holders IS 'DP02_0065E: Educational Attainment - Population 25 years and over with bachelor''s degree';
-COMMENT ON COLUMN ny_census_data.graduate_degree_holders IS 'DP02_0066E: Educational Attainment - Population 25 years and over with graduate or professional degree';
-COMMENT ON COLUMN ny_census_data.high_school_graduates IS 'DP02_0062E: Educational Attainment - Population 25 years and over who are high school graduates (includes equivalency)';
-
--- Employment Comments (DP03)
-COMMENT ON COLUMN ny_census_data.unemployed_count IS 'DP03_0005E: Employment Status - Population 16 years and over in civilian labor force who are unemployed';
-COMMENT ON COLUMN ny_census_data.median_earnings IS 'DP03_0062E: Income and Benefits - Median household income in dollars (in 2022 inflation-adjusted dollars)';
-
--- Age Demographics Comments (DP05)
-COMMENT ON COLUMN ny_census_data.median_age IS 'DP05_0018E: Sex and Age - Median age in years of the total population';
-COMMENT ON COLUMN ny_census_data.population_under_18 IS 'DP05_0019E: Sex and Age - Number of people under 18 years of age';
-COMMENT ON COLUMN ny_census_data.population_18_and_over IS 'DP05_0021E: Sex and Age - Number of people 18 years and over';
-
--- Race/Ethnicity Comments (DP05)
-COMMENT ON COLUMN ny_census_data.white_alone IS 'DP05_0037E: Race - Number of people who identify as White alone (one race)';
-COMMENT ON COLUMN ny_census_data.black_alone IS 'DP05_0038E: Race - Number of people who identify as Black or African American alone (one race)';
-COMMENT ON COLUMN ny_census_data.hispanic_latino IS 'DP05_0071E: Hispanic or Latino - Number of people of Hispanic or Latino origin (any race)';
-
--- Economic Comments (DP04)
-COMMENT ON COLUMN ny_census_data.median_home_value IS 'DP04_0089E: Housing Value - Median value in dollars of owner-occupied housing units';
-
--- System field
-COMMENT ON COLUMN ny_census_data.created_at IS 'Timestamp when record was inserted into database';
-
--- Grant SELECT permission on the table to read-only user
-GRANT SELECT ON ny_census_data TO census_reader;
\ No newline at end of file
+GRANT SELECT ON census_tract_data TO census_reader;
+GRANT SELECT ON census_county_rollup TO census_reader;
+GRANT SELECT ON census_state_rollup TO census_reader;
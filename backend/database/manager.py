@@ -1,12 +1,22 @@
 """Database connection and schema introspection for Census Data Agent."""
 
-from sqlalchemy import create_engine, text, inspect
+from sqlalchemy import create_engine, text
 from sqlalchemy.engine import Engine
-from sqlalchemy.exc import SQLAlchemyError
-from typing import Dict, List, Any, Optional
+from sqlalchemy.exc import SQLAlchemyError, NoSuchTableError
+from typing import Dict, Iterator, List, Any, Optional
+import asyncio
 import logging
+import threading
+import time
 
 from config import settings
+from database.cache import QueryResultCache, normalize_sql, is_read_query
+from database.catalog import SchemaCatalog, TableInfo
+from database.guard import QueryCostGuard
+from database.pool import InstrumentedQueuePool, PoolMetrics
+from database.results import ColumnarResult
+from metrics import SQL_ERRORS, record_sql
+from tracing import record_event, tracing
 
 logger = logging.getLogger(__name__)
 
@@ -22,11 +32,40 @@ class DatabaseManager:
         """
         self.use_read_only = use_read_only
         self._engine: Optional[Engine] = None
+        self._data_version: Optional[int] = None
+        self._data_version_checked_at = 0.0
+        self._catalog: Optional[SchemaCatalog] = None
+        self._catalog_lock = threading.Lock()
+        
+        self.query_cache: Optional[QueryResultCache] = None
+        if settings.query_cache_enabled:
+            self.query_cache = QueryResultCache(
+                max_bytes=settings.query_cache_max_bytes,
+                max_entry_bytes=settings.query_cache_max_entry_bytes
+            )
+        
+        self.query_guard: Optional[QueryCostGuard] = None
+        if settings.query_guard_enabled:
+            self.query_guard = QueryCostGuard(
+                max_cost=settings.query_guard_max_cost,
+                max_rows=settings.query_guard_max_rows,
+                row_cap_mode=settings.query_guard_row_cap_mode
+            )
     
     @property
     def engine(self) -> Engine:
-        """Get database engine, creating if necessary."""
+        """Get database engine, creating if necessary.
+        
+        The pool is sized and recycled from settings, and connections are
+        pre-pinged before use. The read-only engine runs LLM-written SQL,
+        so its sessions get a server-side statement timeout that cancels
+        runaway queries instead of letting them hold a connection.
+        
+        When `db_url` is set it is used as is, for both engines, in place
+        of the host, credentials and database name settings.
+        """
         if self._engine is None:
+            connect_args = {}
             if self.use_read_only:
                 user = settings.db_read_only_user
                 password = settings.db_read_only_password
@@ -34,10 +73,65 @@ class DatabaseManager:
                 user = settings.db_user
                 password = settings.db_password
             
-            db_url = f"postgresql://{user}:{password}@{settings.db_host}:{settings.db_port}/{settings.db_name}"
-            self._engine = create_engine(db_url)
+            db_url = settings.db_url or f"postgresql://{user}:{password}@{settings.db_host}:{settings.db_port}/{settings.db_name}"
+            if self.use_read_only and db_url.startswith("postgresql") and settings.db_read_only_statement_timeout_ms > 0:
+                connect_args["options"] = f"-c statement_timeout={settings.db_read_only_statement_timeout_ms}"
+            
+            engine = create_engine(
+                db_url,
+                poolclass=InstrumentedQueuePool,
+                pool_size=settings.db_pool_size,
+                max_overflow=settings.db_max_overflow,
+                pool_timeout=settings.db_pool_timeout_seconds,
+                pool_recycle=settings.db_pool_recycle_seconds,
+                pool_pre_ping=settings.db_pool_pre_ping,
+                connect_args=connect_args
+            )
+            engine.pool.metrics = PoolMetrics(settings.db_slow_checkout_seconds)
+            self._engine = engine
         return self._engine
     
+    def pool_stats(self) -> Dict[str, Any]:
+        """Get connection pool occupancy and checkout latency counters.
+        
+        Returns:
+            Pool statistics, or only the pool class name if the engine does
+            not use an instrumented pool
+        """
+        pool = self.engine.pool
+        if isinstance(pool, InstrumentedQueuePool):
+            return pool.stats()
+        return {"pool": type(pool).__name__}
+    
+    @property
+    def catalog(self) -> SchemaCatalog:
+        """Get the in-memory schema catalog, building it on first use."""
+        catalog = self._catalog
+        if catalog is None:
+            with self._catalog_lock:
+                if self._catalog is None:
+                    self._catalog = SchemaCatalog.build(self.engine, sample_rows=settings.catalog_sample_rows)
+                catalog = self._catalog
+        return catalog
+    
+    def refresh_catalog(self) -> SchemaCatalog:
+        """Rebuild the schema catalog, e.g. after a data load.
+        
+        Returns:
+            The freshly built catalog
+        """
+        catalog = SchemaCatalog.build(self.engine, sample_rows=settings.catalog_sample_rows)
+        with self._catalog_lock:
+            self._catalog = catalog
+        return catalog
+    
+    def _get_catalog_table(self, table_name: str) -> TableInfo:
+        """Get a table from the catalog, raising if it does not exist."""
+        table = self.catalog.get_table(table_name)
+        if table is None:
+            raise NoSuchTableError(table_name)
+        return table
+    
     def get_table_schema(self, table_name: str = "ny_census_data") -> Dict[str, Any]:
         """Get schema information for a specific table.
         
@@ -48,26 +142,12 @@ class DatabaseManager:
             Dictionary with table schema information
         """
         try:
-            inspector = inspect(self.engine)
-            columns = inspector.get_columns(table_name)
-            
-            schema = {
+            table = self._get_catalog_table(table_name)
+            return {
                 "table_name": table_name,
-                "columns": []
+                "columns": [column.to_dict() for column in table.columns]
             }
             
-            for column in columns:
-                col_info = {
-                    "name": column["name"],
-                    "type": str(column["type"]),
-                    "nullable": column["nullable"],
-                    "default": column.get("default"),
-                    "primary_key": column.get("primary_key", False)
-                }
-                schema["columns"].append(col_info)
-            
-            return schema
-            
         except SQLAlchemyError as e:
             logger.error(f"Error getting table schema: {e}")
             raise
@@ -75,8 +155,7 @@ class DatabaseManager:
     def get_all_tables(self) -> List[str]:
         """Get list of all tables in the database."""
         try:
-            inspector = inspect(self.engine)
-            return inspector.get_table_names()
+            return self.catalog.table_names()
         except SQLAlchemyError as e:
             logger.error(f"Error getting table list: {e}")
             raise
@@ -123,23 +202,166 @@ class DatabaseManager:
             
         Returns:
             List of dictionaries representing query results
+            
+        Raises:
+            QueryBudgetExceeded: If the planner estimates the query to be over budget
+        """
+        return self.execute_query_columnar(query).to_records()
+    
+    def execute_query_columnar(self, query: str) -> ColumnarResult:
+        """Execute a SQL query and return a columnar result.
+        
+        Read queries are served from the query result cache when an
+        equivalent query (after normalization) has already been run against
+        the current data version. Otherwise they are checked by the cost
+        guard before they run. Query times and failures are recorded in
+        the metrics, and results in the trace of a recorded request.
+        
+        Args:
+            query: SQL query to execute
+            
+        Returns:
+            ColumnarResult, shared with the cache and not to be mutated
+            
+        Raises:
+            QueryBudgetExceeded: If the planner estimates the query to be over budget
+        """
+        started_at = time.perf_counter()
+        cache_key = normalize_sql(query)
+        read_query = is_read_query(cache_key)
+        
+        try:
+            source = "database"
+            if self.query_cache is None or not read_query:
+                result = self._run_query(query, guarded=read_query)
+            else:
+                data_version = self.get_data_version()
+                result = self.query_cache.get(cache_key, data_version)
+                if result is None:
+                    result = self._run_query(query, guarded=True)
+                    self.query_cache.put(cache_key, result, data_version)
+                else:
+                    source = "cache"
+            
+            seconds = time.perf_counter() - started_at
+            record_sql(seconds, source=source)
+            if tracing():
+                record_event(
+                    "sql",
+                    sql=query,
+                    source=source,
+                    columns=result.columns,
+                    row_count=len(result),
+                    rows=result.rows(settings.trace_max_rows),
+                    duration_ms=round(seconds * 1000, 1)
+                )
+            return result
+            
+        except Exception as e:
+            SQL_ERRORS.inc()
+            record_event("sql", sql=query, error=str(e))
+            raise
+    
+    def _run_query(self, query: str, guarded: bool = False) -> ColumnarResult:
+        """Execute a SQL query against the database, bypassing the cache.
+        
+        Args:
+            query: SQL query to execute
+            guarded: Whether to check the query against the cost guard first
         """
         try:
             with self.engine.connect() as conn:
+                if guarded and self.query_guard is not None:
+                    query = self.query_guard.check(conn, query)
                 result = conn.execute(text(query))
-                
-                # Convert to list of dictionaries
-                columns = result.keys()
-                rows = []
-                for row in result:
-                    rows.append(dict(zip(columns, row)))
-                
-                return rows
+                if not result.returns_rows:
+                    return ColumnarResult([], [])
+                return ColumnarResult.from_rows(result.keys(), result.all())
                 
         except SQLAlchemyError as e:
             logger.error(f"Error executing query: {e}")
             raise
     
+    def stream_query(self, query: str, batch_size: Optional[int] = None) -> Iterator[ColumnarResult]:
+        """Execute a read query with a server-side cursor and yield batches.
+        
+        Rows are fetched from the database `batch_size` at a time, so large
+        results never have to be held in memory at once. Streamed results
+        bypass the query cache; the connection stays checked out until the
+        iterator is exhausted or closed.
+        
+        Args:
+            query: SQL query to execute
+            batch_size: Rows per batch, `query_stream_batch_size` by default
+            
+        Yields:
+            ColumnarResult for each batch of rows
+            
+        Raises:
+            QueryBudgetExceeded: If the planner estimates the query to be over budget
+        """
+        batch_size = batch_size or settings.query_stream_batch_size
+        try:
+            with self.engine.connect() as conn:
+                if self.query_guard is not None and is_read_query(normalize_sql(query)):
+                    query = self.query_guard.check(conn, query)
+                result = conn.execution_options(stream_results=True, max_row_buffer=batch_size).execute(text(query))
+                columns = list(result.keys())
+                for partition in result.partitions(batch_size):
+                    yield ColumnarResult.from_rows(columns, partition)
+                
+        except SQLAlchemyError as e:
+            logger.error(f"Error streaming query: {e}")
+            raise
+    
+    async def aexecute_query(self, query: str) -> List[Dict[str, Any]]:
+        """Execute a SQL query without blocking the event loop.
+        
+        The blocking driver call runs in a worker thread so that other
+        requests on the same event loop keep being served while the
+        query is in flight.
+        
+        Args:
+            query: SQL query to execute
+            
+        Returns:
+            List of dictionaries representing query results
+        """
+        return await asyncio.to_thread(self.execute_query, query)
+    
+    async def aexecute_query_columnar(self, query: str) -> ColumnarResult:
+        """Execute a SQL query for a columnar result without blocking the event loop."""
+        return await asyncio.to_thread(self.execute_query_columnar, query)
+    
+    def get_data_version(self) -> int:
+        """Get the version of the currently loaded census data.
+        
+        The bootstrap script records every data load in the data_loads
+        table. The version is re-read at most every
+        `data_version_check_seconds` so caches can cheaply detect reloads.
+        
+        Returns:
+            Latest data load id, or 0 if no load has been recorded
+        """
+        now = time.monotonic()
+        if self._data_version is None or now - self._data_version_checked_at >= settings.data_version_check_seconds:
+            try:
+                with self.engine.connect() as conn:
+                    version = int(conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM data_loads")).scalar())
+                if self._data_version is not None and version != self._data_version:
+                    logger.info(f"Data version changed to {version}, refreshing schema catalog")
+                    self.refresh_catalog()
+                self._data_version = version
+            except SQLAlchemyError as e:
+                logger.warning(f"Could not read data version: {e}")
+                self._data_version = self._data_version or 0
+            self._data_version_checked_at = now
+        return self._data_version
+    
+    async def aget_data_version(self) -> int:
+        """Get the data version without blocking the event loop."""
+        return await asyncio.to_thread(self.get_data_version)
+    
     def test_connection(self) -> bool:
         """Test database connection.
         
@@ -157,6 +379,10 @@ class DatabaseManager:
     def get_sample_data(self, table_name: str = "ny_census_data", limit: int = 5) -> List[Dict[str, Any]]:
         """Get sample data from a table.
         
+        Served from the schema catalog when it holds enough sample rows or
+        every row of the table. A query returning fewer rows than asked for
+        has read the whole table, so its rows are kept in the catalog.
+        
         Args:
             table_name: Name of the table
             limit: Number of rows to return
@@ -164,14 +390,24 @@ class DatabaseManager:
         Returns:
             List of dictionaries with sample data
         """
+        table = self._get_catalog_table(table_name)
+        if limit <= len(table.sample_rows):
+            return table.sample_rows[:limit]
+        if table.all_rows is not None:
+            return table.all_rows[:limit]
+        
         query = f"SELECT * FROM {table_name} LIMIT {limit}"
-        return self.execute_query(query)
+        rows = self.execute_query(query)
+        if len(rows) < limit:
+            table.all_rows = rows
+        return rows
     
-    def get_column_info(self, table_name: str = "ny_census_data") -> str:
+    def get_column_info(self, table_name: str = "ny_census_data", columns: Optional[List[str]] = None) -> str:
         """Get formatted column information for prompt context.
         
         Args:
             table_name: Name of the table
+            columns: Columns to include, e.g. a schema selection; all columns if None
             
         Returns:
             Formatted string with column information
@@ -180,11 +416,15 @@ class DatabaseManager:
         
         column_info = []
         for col in schema["columns"]:
+            if columns is not None and col["name"] not in columns:
+                continue
             info = f"- {col['name']} ({col['type']})"
             if col['primary_key']:
                 info += " [PRIMARY KEY]"
             if not col['nullable']:
                 info += " [NOT NULL]"
+            if col['comment']:
+                info += f": {col['comment']}"
             column_info.append(info)
         
         return f"Table: {table_name}\nColumns:\n" + "\n".join(column_info)
@@ -0,0 +1,99 @@
+"""Connection pool with checkout instrumentation."""
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+from typing import Any, Dict
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class PoolMetrics:
+    """Thread-safe counters for connection checkouts from a pool."""
+
+    def __init__(self, slow_checkout_seconds: float) -> None:
+        """Initialize the pool metrics.
+
+        Args:
+            slow_checkout_seconds: Checkout wait above which a warning is logged
+        """
+        self.slow_checkout_seconds = slow_checkout_seconds
+        self.checkouts = 0
+        self.timeouts = 0
+        self.slow_checkouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record_checkout(self, wait_seconds: float) -> None:
+        """Record a successful checkout and how long it waited."""
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait_seconds += wait_seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+            slow = wait_seconds >= self.slow_checkout_seconds
+            if slow:
+                self.slow_checkouts += 1
+        if slow:
+            logger.warning(f"Connection checkout waited {wait_seconds:.2f}s")
+
+    def record_timeout(self, wait_seconds: float) -> None:
+        """Record a checkout that gave up waiting for a connection."""
+        with self._lock:
+            self.timeouts += 1
+        logger.error(f"Connection checkout timed out after {wait_seconds:.2f}s")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the checkout counters."""
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "slow_checkouts": self.slow_checkouts,
+                "avg_checkout_ms": 1000 * self.total_wait_seconds / self.checkouts if self.checkouts else 0.0,
+                "max_checkout_ms": 1000 * self.max_wait_seconds
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that measures how long each checkout waits for a connection.
+
+    The measured time covers queueing for a free connection, opening a new
+    one and the pre-ping, which is everything a request spends before it
+    can run its query.
+    """
+
+    metrics: PoolMetrics
+
+    def connect(self) -> Any:
+        started_at = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.record_timeout(time.perf_counter() - started_at)
+            raise
+        self.metrics.record_checkout(time.perf_counter() - started_at)
+        return connection
+
+    def recreate(self) -> "InstrumentedQueuePool":
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the pool occupancy together with the checkout counters.
+
+        Returns:
+            Dictionary with pool size, connections in use, idle and overflow
+            connections and checkout latency counters
+        """
+        return {
+            "size": self.size(),
+            "in_use": self.checkedout(),
+            "idle": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+            **self.metrics.snapshot()
+        }
@@ -0,0 +1,83 @@
+"""Columnar query results."""
+
+from array import array
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+import sys
+
+Column = Union[array, List[Any]]
+
+
+def to_typed_array(values: Sequence[Any]) -> Column:
+    """Pack column values into a typed array when they allow it.
+
+    Integer columns become 64-bit integer arrays and float columns, or
+    columns mixing integers and floats, become double arrays. DECIMAL
+    results stay lists of Decimal, since a double would round them, as do
+    columns with NULLs, strings or mixed values.
+
+    Args:
+        values: Values of one column
+
+    Returns:
+        array("q"), array("d") or a list of the values
+    """
+    if not values:
+        return []
+    if all(type(value) is int for value in values):
+        try:
+            return array("q", values)
+        except OverflowError:
+            return list(values)
+    if all(type(value) in (int, float) for value in values):
+        return array("d", (float(value) for value in values))
+    return list(values)
+
+
+class ColumnarResult:
+    """Query result held as column names plus one array per column.
+
+    Avoids allocating a dict per row; row-oriented views are built on demand
+    for callers that need them.
+    """
+
+    def __init__(self, columns: List[str], arrays: List[Column]) -> None:
+        self.columns = columns
+        self.arrays = arrays
+
+    @classmethod
+    def from_rows(cls, columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> "ColumnarResult":
+        """Build a columnar result from row tuples."""
+        columns = list(columns)
+        if not rows:
+            return cls(columns, [[] for _ in columns])
+        return cls(columns, [to_typed_array(values) for values in zip(*rows)])
+
+    def __len__(self) -> int:
+        return len(self.arrays[0]) if self.arrays else 0
+
+    def column(self, name: str) -> Column:
+        """Get the values of a column by name."""
+        return self.arrays[self.columns.index(name)]
+
+    def rows(self, limit: Optional[int] = None) -> List[Tuple[Any, ...]]:
+        """Get the result, or its first `limit` rows, as row tuples."""
+        return list(islice(zip(*self.arrays), limit))
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over the result as one dict per row."""
+        for row in zip(*self.arrays):
+            yield dict(zip(self.columns, row))
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Get the result as a list of dicts, the format of DatabaseManager.execute_query."""
+        return list(self.iter_records())
+
+    def estimate_size(self) -> int:
+        """Estimate the memory held by the result in bytes."""
+        size = sys.getsizeof(self.arrays)
+        for column in self.arrays:
+            size += sys.getsizeof(column)
+            if isinstance(column, list):
+                size += sum(sys.getsizeof(value) for value in column)
+        return size
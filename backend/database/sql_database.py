@@ -0,0 +1,122 @@
+"""LangChain SQLDatabase backed by the DatabaseManager."""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from langchain_community.utilities import SQLDatabase
+from sqlalchemy.engine import Result
+from sqlalchemy.sql.expression import Executable
+from typing import Any, Dict, Iterable, Iterator, List, Literal, Optional, Sequence, Union
+
+from database.catalog import INTERNAL_TABLES, SchemaSelection
+from database.manager import DatabaseManager
+from database.results import ColumnarResult
+
+# Schema selected for the question being answered in the current context
+_schema_selection: ContextVar[Optional[SchemaSelection]] = ContextVar("schema_selection", default=None)
+
+# Results of the queries run in the current context, by query text
+_query_results: ContextVar[Optional[Dict[str, ColumnarResult]]] = ContextVar("query_results", default=None)
+
+
+class ManagedSQLDatabase(SQLDatabase):
+    """SQLDatabase that routes the agent's plain SQL through DatabaseManager.
+
+    The `sql_db_query` tool calls `_execute` with raw SQL strings; those go
+    through `DatabaseManager.execute_query_columnar` so the agent shares its
+    result cache with the rest of the application. Within
+    `collect_query_results` their results are kept, so the full result can
+    be returned instead of the truncated tool output.
+
+    While a schema selection is active, `get_table_info` only describes the
+    tables and columns selected for the current question, unless tables are
+    requested by name, as the `sql_db_schema` tool does. Internal
+    bookkeeping tables are never listed.
+    """
+
+    def __init__(self, manager: DatabaseManager, **kwargs: Any) -> None:
+        """Initialize the database wrapper.
+
+        Args:
+            manager: Database manager to execute queries with
+            **kwargs: Additional SQLDatabase arguments
+        """
+        self._manager = manager
+        kwargs.setdefault("lazy_table_reflection", True)
+        super().__init__(engine=manager.engine, **kwargs)
+
+    def get_usable_table_names(self) -> Iterable[str]:
+        """Get names of tables available, from the schema catalog."""
+        table_names = set(self._manager.catalog.table_names()) - INTERNAL_TABLES
+        if self._include_tables:
+            table_names &= self._include_tables
+        return sorted(table_names - self._ignore_tables)
+
+    @contextmanager
+    def schema_selection(self, selection: Optional[SchemaSelection]) -> Iterator[None]:
+        """Restrict table info to a question's schema selection within the block.
+
+        Args:
+            selection: Selected tables and columns, or None for the full schema
+        """
+        token = _schema_selection.set(selection)
+        try:
+            yield
+        finally:
+            _schema_selection.reset(token)
+
+    @contextmanager
+    def collect_query_results(self) -> Iterator[Dict[str, ColumnarResult]]:
+        """Keep the results of the queries run within the block.
+
+        Yields:
+            Dict filled with the result of each query, by query text
+        """
+        results: Dict[str, ColumnarResult] = {}
+        token = _query_results.set(results)
+        try:
+            yield results
+        finally:
+            _query_results.reset(token)
+
+    def get_table_info(self, table_names: Optional[List[str]] = None) -> str:
+        """Get information about specified tables from the schema catalog.
+
+        Args:
+            table_names: Tables to describe with all their columns; if None,
+                the selected tables and columns while a schema selection is
+                active and all usable tables otherwise
+
+        Returns:
+            CREATE TABLE statements with column descriptions and sample rows
+        """
+        all_table_names = self.get_usable_table_names()
+        selection = _schema_selection.get()
+        if table_names is not None:
+            missing_tables = set(table_names).difference(all_table_names)
+            if missing_tables:
+                raise ValueError(f"table_names {missing_tables} not found in database")
+            all_table_names = table_names
+        elif selection is not None:
+            all_table_names = [name for name in selection.tables if name in all_table_names]
+
+        columns = selection.columns if selection is not None and table_names is None else None
+        return self._manager.catalog.render(list(all_table_names), columns)
+
+    def _execute(
+            self,
+            command: Union[str, Executable],
+            fetch: Literal["all", "one", "cursor"] = "all",
+            *,
+            parameters: Optional[Dict[str, Any]] = None,
+            execution_options: Optional[Dict[str, Any]] = None) -> Union[Sequence[Dict[str, Any]], Result]:
+        if not isinstance(command, str) or fetch == "cursor" or parameters or execution_options:
+            return super()._execute(
+                command, fetch, parameters=parameters, execution_options=execution_options
+            )
+
+        result = self._manager.execute_query_columnar(command)
+        results = _query_results.get()
+        if results is not None:
+            results[command] = result
+        rows = result.to_records()
+        return rows[:1] if fetch == "one" else rows
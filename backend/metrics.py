@@ -0,0 +1,265 @@
+"""Latency, token and query metrics in the Prometheus text format.
+
+Counters and histograms are kept in process and rendered on `/metrics`.
+Work done while answering one question is also added to the
+RequestTimings of that request, when one is active in the current context,
+so responses can carry their own timing breakdown.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import bisect
+import threading
+import time
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+ITERATION_BUCKETS = (1, 2, 3, 4, 5, 6, 8, 10, 15)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Increase the counter of a label combination."""
+        key = tuple(str(labels[name]) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        """Render the counter in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, key)} {_format_number(value)}")
+        return lines
+
+
+class Histogram:
+    """Histogram with cumulative buckets and optional labels."""
+
+    def __init__(
+            self,
+            name: str,
+            help: str,
+            labels: Sequence[str] = (),
+            buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record one observation for a label combination."""
+        key = tuple(str(labels[name]) for name in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            counts[index] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def render(self) -> List[str]:
+        """Render the histogram in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key in sorted(self._counts):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), self._counts[key]):
+                    cumulative += count
+                    le = f'le="{_format_number(bound)}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+                labels = _format_labels(self.labels, key)
+                lines.append(f"{self.name}_sum{labels} {_format_number(self._sums[key])}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self) -> None:
+        self._metrics: List[object] = []
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        """Create and register a counter."""
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+            self,
+            name: str,
+            help: str,
+            labels: Sequence[str] = (),
+            buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        """Create and register a histogram."""
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+QUESTIONS = registry.counter(
+    "census_questions_total", "Questions answered, by answer path and status", ["path", "status"]
+)
+QUESTION_SECONDS = registry.histogram(
+    "census_question_duration_seconds", "Time to answer a question, by answer path", ["path"]
+)
+STAGE_SECONDS = registry.histogram(
+    "census_stage_duration_seconds", "Time spent in each stage of answering a question", ["stage"]
+)
+AGENT_ITERATIONS = registry.histogram(
+    "census_agent_iterations", "Tool calls made by the ReAct agent per question", buckets=ITERATION_BUCKETS
+)
+LLM_CALLS = registry.counter("census_llm_calls_total", "LLM calls")
+LLM_TOKENS = registry.counter("census_llm_tokens_total", "LLM tokens, by kind", ["kind"])
+SQL_SECONDS = registry.histogram(
+    "census_sql_query_duration_seconds", "SQL query time, by whether the result cache served it", ["source"]
+)
+SQL_ERRORS = registry.counter("census_sql_query_errors_total", "SQL queries that failed or were rejected")
+
+
+class RequestTimings:
+    """Timing breakdown of one request, filled in by the instrumented stages."""
+
+    def __init__(self) -> None:
+        self.started_at = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.sql_queries = 0
+        self.sql_seconds = 0.0
+        self.llm_calls = 0
+        self.tokens: Dict[str, int] = {}
+        self.agent_iterations = 0
+        self._lock = threading.Lock()
+
+    def add_stage(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def add_sql(self, seconds: float) -> None:
+        with self._lock:
+            self.sql_queries += 1
+            self.sql_seconds += seconds
+
+    def add_llm_call(self, tokens: Dict[str, int]) -> None:
+        with self._lock:
+            self.llm_calls += 1
+            for kind, count in tokens.items():
+                self.tokens[kind] = self.tokens.get(kind, 0) + count
+
+    def add_agent_iterations(self, iterations: int) -> None:
+        with self._lock:
+            self.agent_iterations += iterations
+
+    def elapsed(self) -> float:
+        """Get the seconds since the request started."""
+        return time.perf_counter() - self.started_at
+
+    def summary(self) -> Dict[str, object]:
+        """Get the breakdown so far, with times in milliseconds."""
+        with self._lock:
+            return {
+                "total_ms": round(self.elapsed() * 1000, 1),
+                "stages": {stage: round(seconds * 1000, 1) for stage, seconds in self.stages.items()},
+                "sql_queries": self.sql_queries,
+                "sql_ms": round(self.sql_seconds * 1000, 1),
+                "llm_calls": self.llm_calls,
+                "tokens": dict(self.tokens),
+                "agent_iterations": self.agent_iterations,
+            }
+
+
+_request_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def track_request() -> Iterator[RequestTimings]:
+    """Collect the timing breakdown of the work done within the block."""
+    timings = RequestTimings()
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    """Get the timing breakdown of the request in the current context, if any."""
+    return _request_timings.get()
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Time a stage into the stage histogram and the current request's breakdown."""
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started_at
+        STAGE_SECONDS.observe(seconds, stage=stage)
+        timings = current_timings()
+        if timings is not None:
+            timings.add_stage(stage, seconds)
+
+
+def record_sql(seconds: float, source: str) -> None:
+    """Record the time of one SQL query, served by the "database" or the "cache"."""
+    SQL_SECONDS.observe(seconds, source=source)
+    timings = current_timings()
+    if timings is not None:
+        timings.add_sql(seconds)
+
+
+def record_agent_iterations(iterations: int) -> None:
+    """Record the number of tool calls the ReAct agent made for a question."""
+    AGENT_ITERATIONS.observe(iterations)
+    timings = current_timings()
+    if timings is not None:
+        timings.add_agent_iterations(iterations)
+
+
+def record_llm_call(tokens: Dict[str, int]) -> None:
+    """Record one LLM call and its token usage by kind."""
+    LLM_CALLS.inc()
+    for kind, count in tokens.items():
+        LLM_TOKENS.inc(count, kind=kind)
+    timings = current_timings()
+    if timings is not None:
+        timings.add_llm_call(tokens)
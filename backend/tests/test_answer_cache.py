@@ -0,0 +1,123 @@
+from typing import Optional
+
+import pytest
+
+from agent.cache import AnswerCache
+from api.models import AgentResponse, AnswerPath
+
+DATA_VERSION = 1
+
+
+def make_cache(similarity_threshold: float = 0.85) -> AnswerCache:
+    return AnswerCache(similarity_threshold=similarity_threshold, max_entries=16, ttl_seconds=60)
+
+
+def cached_answer(cache: AnswerCache, question: str, text_answer: Optional[str] = None) -> None:
+    response = AgentResponse(text_answer=text_answer or f"Answer to: {question}", question=question)
+    cache.put(question, response, DATA_VERSION)
+
+
+@pytest.mark.parametrize("cached, asked", [
+    (
+        "Which county has the highest median household income?",
+        "Which county has the lowest median household income?",
+    ),
+    (
+        "What is the median household income in Kings County?",
+        "What is the median household income in Queens County?",
+    ),
+    (
+        "Compare the median household income of Kings County and Erie County",
+        "Compare the median household income of Kings County and Monroe County",
+    ),
+    (
+        "Show the top 10 counties by population",
+        "Show the bottom 10 counties by population",
+    ),
+    (
+        "Show the top 5 counties by population",
+        "Show the top 10 counties by population",
+    ),
+    (
+        "Which county has the most renters?",
+        "Which county has the least renters?",
+    ),
+    (
+        "What is the ratio of owners to renters?",
+        "What is the ratio of renters to owners?",
+    ),
+    (
+        "Compare the median age of Kings County and Erie County",
+        "Compare the median age of Erie County and Kings County",
+    ),
+    (
+        "Which county is the richest?",
+        "Which county is the poorest?",
+    ),
+])
+def test_different_questions_miss(cached: str, asked: str) -> None:
+    cache = make_cache()
+    cached_answer(cache, cached)
+
+    assert cache.get(asked, DATA_VERSION) is None
+
+
+@pytest.mark.parametrize("cached, asked", [
+    (
+        "Which county has the highest median household income?",
+        "Which county has the highest median household income?",
+    ),
+    (
+        "What's the most populous county?",
+        "most populous county",
+    ),
+    (
+        "Which counties have the highest median household income?",
+        "Highest median household income, which county has it?",
+    ),
+    (
+        "highest income county",
+        "which county earns the most",
+    ),
+    (
+        "What is the richest county?",
+        "Which county has the highest median household income?",
+    ),
+])
+def test_rephrased_questions_hit(cached: str, asked: str) -> None:
+    cache = make_cache()
+    cached_answer(cache, cached)
+
+    response = cache.get(asked, DATA_VERSION)
+
+    assert response is not None
+    assert response.text_answer == f"Answer to: {cached}"
+    assert response.question == asked
+    assert response.path == AnswerPath.cache
+
+
+def test_threshold_limits_extra_wording() -> None:
+    cached = "highest income county"
+    asked = "highest income county in new york state by ranking"
+
+    strict = make_cache(similarity_threshold=0.85)
+    cached_answer(strict, cached)
+    lenient = make_cache(similarity_threshold=0.5)
+    cached_answer(lenient, cached)
+
+    assert strict.get(asked, DATA_VERSION) is None
+    assert lenient.get(asked, DATA_VERSION) is not None
+
+
+@pytest.mark.parametrize("text_answer", [
+    "Agent stopped due to iteration limit or time limit.",
+    "Agent stopped due to max iterations.",
+    "I don't know",
+])
+def test_non_answers_are_not_cached(text_answer: str) -> None:
+    cache = make_cache()
+    question = "Which county has the highest median household income?"
+    cached_answer(cache, question, text_answer)
+
+    assert cache.get(question, DATA_VERSION) is None
+    assert cache.stats()["entries"] == 0
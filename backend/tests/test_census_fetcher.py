@@ -0,0 +1,148 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from database import census_fetcher
+from database.census_fetcher import MAIN_ENDPOINT, CensusFetcher, FetchError, Shard
+
+SHARD = Shard(MAIN_ENDPOINT, 2022, "36", ("NAME", "B01003_001E"))
+ROWS = [["NAME", "B01003_001E", "state", "county"], ["Kings County, New York", "2590516", "36", "047"]]
+BACKOFF_SECONDS = 0.5
+
+
+class StubCensusAPI(ThreadingHTTPServer):
+    """Local Census API stub answering with scripted status codes, then with ROWS."""
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.statuses = []
+        self.requests = []
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/data"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests.append(urlparse(self.path))
+        status = self.server.statuses.pop(0) if self.server.statuses else 200
+        body = json.dumps(ROWS).encode("utf-8") if status == 200 else b""
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def api():
+    server = StubCensusAPI()
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(census_fetcher.time, "sleep", delays.append)
+    return delays
+
+
+def make_fetcher(api: StubCensusAPI, cache_dir, **kwargs) -> CensusFetcher:
+    return CensusFetcher(str(cache_dir), base_url=api.base_url, backoff_seconds=BACKOFF_SECONDS, **kwargs)
+
+
+def cached_files(cache_dir) -> list:
+    return [os.path.join(root, name) for root, _, names in os.walk(cache_dir) for name in names]
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_retries_with_backoff(api, sleeps, tmp_path, status):
+    api.statuses = [status, status, status]
+
+    assert make_fetcher(api, tmp_path).fetch_shard(SHARD) == ROWS
+    assert len(api.requests) == 4
+    for attempt, delay in enumerate(sleeps):
+        assert BACKOFF_SECONDS * 2 ** attempt <= delay < BACKOFF_SECONDS * 2 ** (attempt + 1)
+    assert len(sleeps) == 3
+
+
+def test_gives_up_after_max_retries(api, sleeps, tmp_path):
+    api.statuses = [503] * 3
+
+    with pytest.raises(FetchError, match="HTTP 503"):
+        make_fetcher(api, tmp_path, max_retries=2).fetch_shard(SHARD)
+    assert len(api.requests) == 3
+    assert cached_files(tmp_path) == []
+
+
+def test_client_errors_are_not_retried(api, sleeps, tmp_path):
+    api.statuses = [400]
+
+    with pytest.raises(FetchError):
+        make_fetcher(api, tmp_path).fetch_shard(SHARD)
+    assert len(api.requests) == 1
+    assert sleeps == []
+
+
+def test_no_content_is_an_empty_result(api, sleeps, tmp_path):
+    api.statuses = [204]
+
+    assert make_fetcher(api, tmp_path).fetch_shard(SHARD) == []
+    assert len(api.requests) == 1
+    assert sleeps == []
+
+
+def test_cache_hit_and_miss(api, tmp_path):
+    fetcher = make_fetcher(api, tmp_path)
+    other_shard = SHARD._replace(state="34")
+
+    assert fetcher.fetch_shard(SHARD) == ROWS
+    assert fetcher.fetch_shard(SHARD) == ROWS
+    assert len(api.requests) == 1
+
+    assert make_fetcher(api, tmp_path).fetch_shard(SHARD) == ROWS
+    assert len(api.requests) == 1
+
+    fetcher.fetch_shard(other_shard)
+    assert len(api.requests) == 2
+    assert parse_qs(api.requests[-1].query)["in"] == ["state:34"]
+
+
+def test_api_key_is_sent_but_not_part_of_the_cache_key(api, tmp_path):
+    fetcher = make_fetcher(api, tmp_path, api_key="secret-key")
+
+    fetcher.fetch_shard(SHARD)
+    assert parse_qs(api.requests[0].query)["key"] == ["secret-key"]
+    assert fetcher.cache_path(SHARD) == make_fetcher(api, tmp_path).cache_path(SHARD)
+    assert all("secret-key" not in path for path in cached_files(tmp_path))
+
+    make_fetcher(api, tmp_path, api_key="other-key").fetch_shard(SHARD)
+    assert len(api.requests) == 1
+
+
+def test_cache_writes_are_atomic(api, tmp_path, monkeypatch):
+    def failing_dump(data, file):
+        file.write(json.dumps(data)[:10])
+        raise OSError("disk full")
+
+    fetcher = make_fetcher(api, tmp_path)
+    monkeypatch.setattr(census_fetcher.json, "dump", failing_dump)
+    with pytest.raises(OSError):
+        fetcher.fetch_shard(SHARD)
+    assert cached_files(tmp_path) == []
+
+    monkeypatch.undo()
+    assert fetcher.fetch_shard(SHARD) == ROWS
+    assert cached_files(tmp_path) == [fetcher.cache_path(SHARD)]
+    assert len(api.requests) == 2
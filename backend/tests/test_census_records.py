@@ -0,0 +1,63 @@
+import os
+import re
+import sqlite3
+
+import pytest
+
+from database.census_records import CENSUS_COLUMNS, TRACT_LOAD_COLUMNS, safe_float, safe_int, to_tract_record
+
+INIT_SQL = os.path.join(os.path.dirname(__file__), "..", "database", "init.sql")
+
+MISSING_VALUES = ["-222222222", "-333333333", "-555555555", "-666666666", "-888888888", "-999999999"]
+
+
+def init_statement(pattern: str) -> str:
+    """Get a statement of init.sql, adapted to sqlite."""
+    with open(INIT_SQL, encoding="utf-8") as f:
+        statement = re.search(pattern + r".*?;", f.read(), re.DOTALL).group(0)
+    statement = statement.replace(" PARTITION BY LIST (year)", "").replace("::NUMERIC", "")
+    return statement.replace("MATERIALIZED VIEW IF NOT EXISTS", "VIEW")
+
+
+def tract(tract_code: str, **values: str) -> dict:
+    row = {variable: "0" for _, variable, _ in CENSUS_COLUMNS}
+    row.update({"NAME": f"Census Tract {tract_code}; Kings County; New York", "state": "36", "county": "047", "tract": tract_code})
+    row.update(values)
+    return row
+
+
+@pytest.mark.parametrize("value", MISSING_VALUES)
+def test_missing_values_are_null(value):
+    assert safe_int(value) is None
+    assert safe_float(value) is None
+    assert safe_float(f"{value}.0") is None
+
+
+def test_values_are_converted():
+    assert safe_int("2590516") == 2590516
+    assert safe_int("-5") == -5
+    assert safe_float("36.5") == 36.5
+    assert safe_int("") is None
+    assert safe_float(None) is None
+
+
+def test_tracts_with_missing_estimates_are_excluded_from_the_rollup():
+    income, population, households = "B19013_001E", "B01003_001E", "B25003_002E"
+    rows = [
+        tract("000100", **{income: "50000", population: "1000", households: "400"}),
+        tract("000200", **{income: "-666666666", population: "2000", households: "400"}),
+    ]
+
+    with sqlite3.connect(":memory:") as conn:
+        conn.execute(init_statement(r"CREATE TABLE IF NOT EXISTS census_tract_data \("))
+        conn.execute(init_statement(r"CREATE MATERIALIZED VIEW IF NOT EXISTS census_county_rollup AS"))
+        conn.executemany(
+            f"INSERT INTO census_tract_data ({', '.join(TRACT_LOAD_COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in TRACT_LOAD_COLUMNS)})",
+            [to_tract_record(row, 2022) for row in rows]
+        )
+        rollup = conn.execute(
+            "SELECT county_name, tract_count, total_population, median_household_income FROM census_county_rollup"
+        ).fetchall()
+
+    assert rollup == [("Kings County", 2, 3000, 50000)]
@@ -0,0 +1,59 @@
+import json
+import sqlite3
+
+import pytest
+
+from database.guard import QueryCostGuard
+
+MAX_ROWS = 5
+
+
+class ExplainConnection:
+    """Connection returning a fixed EXPLAIN plan and recording the statements explained."""
+
+    class dialect:
+        name = "postgresql"
+
+    def __init__(self, cost: float, rows: float) -> None:
+        self.plan = json.dumps([{"Plan": {"Node Type": "Seq Scan", "Total Cost": cost, "Plan Rows": rows}}])
+        self.statements = []
+
+    def execute(self, statement):
+        self.statements.append(str(statement))
+        return self
+
+    def scalar(self):
+        return self.plan
+
+
+def run_on_sqlite(query: str) -> list:
+    with sqlite3.connect(":memory:") as conn:
+        conn.execute("CREATE TABLE counties (name TEXT)")
+        conn.executemany("INSERT INTO counties VALUES (?)", [(f"County {index}",) for index in range(20)])
+        return conn.execute(query).fetchall()
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT name FROM counties -- every county",
+    "SELECT name FROM counties; -- every county",
+    "SELECT name FROM counties /* every county */ ;\n",
+    "-- every county\nSELECT name FROM counties\n-- ordered as stored\n",
+])
+def test_row_cap_wraps_queries_ending_in_comments(query: str) -> None:
+    guard = QueryCostGuard(max_cost=1000, max_rows=MAX_ROWS)
+    conn = ExplainConnection(cost=10, rows=20)
+
+    capped = guard.check(conn, query)
+
+    assert guard.wrapped == 1
+    assert conn.statements[0].startswith("EXPLAIN (FORMAT JSON) ")
+    assert len(run_on_sqlite(capped)) == MAX_ROWS
+
+
+def test_row_cap_keeps_comment_markers_inside_strings() -> None:
+    guard = QueryCostGuard(max_cost=1000, max_rows=MAX_ROWS)
+
+    capped = guard.check(ExplainConnection(cost=10, rows=20), "SELECT name FROM counties WHERE name <> '--' -- note")
+
+    assert "'--'" in capped
+    assert len(run_on_sqlite(capped)) == MAX_ROWS
@@ -0,0 +1,51 @@
+from langchain.agents.agent import AgentAction
+from sqlalchemy import create_engine, text
+
+from agent.charts import QUERY_TOOL_NAME, query_result_from_steps
+from database.manager import DatabaseManager
+from database.sql_database import ManagedSQLDatabase
+
+QUERY = "SELECT name, population FROM counties ORDER BY population"
+EMPTY_QUERY = "SELECT name FROM counties WHERE population < 0"
+
+
+def make_database(tmp_path) -> ManagedSQLDatabase:
+    engine = create_engine(f"sqlite:///{tmp_path / 'results.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE counties (name TEXT, population INTEGER)"))
+        for index in range(200):
+            conn.execute(
+                text("INSERT INTO counties VALUES (:name, :population)"),
+                {"name": f"County {index}", "population": index * 1000}
+            )
+
+    manager = DatabaseManager()
+    manager._engine = engine
+    return ManagedSQLDatabase(manager)
+
+
+def test_query_result_is_the_full_result_not_the_tool_output(tmp_path):
+    sql_db = make_database(tmp_path)
+    with sql_db.collect_query_results() as results:
+        observation = sql_db.run_no_throw(QUERY)
+        empty_observation = sql_db.run_no_throw(EMPTY_QUERY)
+
+    steps = [
+        (AgentAction(tool=QUERY_TOOL_NAME, tool_input=QUERY, log=""), observation[:100]),
+        (AgentAction(tool=QUERY_TOOL_NAME, tool_input=EMPTY_QUERY, log=""), empty_observation),
+    ]
+    result = query_result_from_steps(steps, results)
+
+    assert result.columns == ["name", "population"]
+    assert result.row_count == 200
+    assert result.values[1][-1] == 199000
+
+
+def test_queries_outside_the_block_are_not_kept(tmp_path):
+    sql_db = make_database(tmp_path)
+    with sql_db.collect_query_results() as results:
+        pass
+    sql_db.run_no_throw(QUERY)
+
+    assert results == {}
+    assert query_result_from_steps([(AgentAction(tool=QUERY_TOOL_NAME, tool_input=QUERY, log=""), "")], results) is None
@@ -0,0 +1,56 @@
+from array import array
+from decimal import Decimal
+
+from sqlalchemy import create_engine, text
+
+from agent.charts import ParsedResult, build_chart_from_result
+from api.models import ChartType
+from database.manager import DatabaseManager
+from database.results import ColumnarResult, to_typed_array
+
+
+def test_integer_and_float_columns_are_typed_arrays():
+    assert to_typed_array([1, 2, 3]) == array("q", [1, 2, 3])
+    assert to_typed_array([1, 2.5]) == array("d", [1.0, 2.5])
+
+
+def test_decimal_columns_keep_their_precision():
+    values = [Decimal("12345678901234567.89"), Decimal("0.1")]
+    column = to_typed_array(values)
+
+    assert column == values
+    assert all(type(value) is Decimal for value in column)
+
+
+def test_nulls_strings_and_booleans_stay_lists():
+    assert to_typed_array([1, None]) == [1, None]
+    assert to_typed_array(["Kings", "Queens"]) == ["Kings", "Queens"]
+    assert to_typed_array([True, False]) == [True, False]
+
+
+def test_stream_query_yields_batches(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'stream.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE counties (name TEXT, population INTEGER)"))
+        for index in range(5):
+            conn.execute(
+                text("INSERT INTO counties VALUES (:name, :population)"),
+                {"name": f"County {index}", "population": index * 1000}
+            )
+
+    manager = DatabaseManager()
+    manager._engine = engine
+    batches = list(manager.stream_query("SELECT name, population FROM counties ORDER BY population", batch_size=2))
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert all(isinstance(batch, ColumnarResult) for batch in batches)
+    assert [value for batch in batches for value in batch.column("population")] == [0, 1000, 2000, 3000, 4000]
+    assert batches[0].columns == ["name", "population"]
+
+
+def test_decimal_columns_are_charted_as_numbers():
+    result = ColumnarResult.from_rows(["county_name", "median_age"], [("Kings", Decimal("35.1")), ("Erie", Decimal("41.2"))])
+    chart = build_chart_from_result(ParsedResult(result.columns, result.rows()))
+
+    assert chart.chart_type == ChartType.bar
+    assert chart.values == [35.1, 41.2]
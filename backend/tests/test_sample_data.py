@@ -0,0 +1,51 @@
+from sqlalchemy import create_engine, text
+
+from database.catalog import SchemaCatalog
+from database.manager import DatabaseManager
+
+
+def make_manager(tmp_path, rows: int) -> DatabaseManager:
+    engine = create_engine(f"sqlite:///{tmp_path / 'samples.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE counties (name TEXT)"))
+        for index in range(rows):
+            conn.execute(text("INSERT INTO counties VALUES (:name)"), {"name": f"County {index}"})
+
+    manager = DatabaseManager()
+    manager._engine = engine
+    manager._catalog = SchemaCatalog.build(engine, sample_rows=3)
+    return manager
+
+
+def count_queries(manager: DatabaseManager, monkeypatch) -> list:
+    queries = []
+    execute_query = manager.execute_query
+
+    def counting_execute_query(query):
+        queries.append(query)
+        return execute_query(query)
+
+    monkeypatch.setattr(manager, "execute_query", counting_execute_query)
+    return queries
+
+
+def test_short_catalog_sample_is_the_whole_table(tmp_path, monkeypatch):
+    manager = make_manager(tmp_path, rows=2)
+    queries = count_queries(manager, monkeypatch)
+
+    assert len(manager.get_sample_data("counties", limit=5)) == 2
+    assert len(manager.get_sample_data("counties", limit=10)) == 2
+    assert queries == []
+
+
+def test_short_query_result_is_kept(tmp_path, monkeypatch):
+    manager = make_manager(tmp_path, rows=4)
+    queries = count_queries(manager, monkeypatch)
+
+    assert len(manager.get_sample_data("counties", limit=2)) == 2
+    assert queries == []
+
+    assert len(manager.get_sample_data("counties", limit=10)) == 4
+    assert len(manager.get_sample_data("counties", limit=10)) == 4
+    assert len(manager.get_sample_data("counties", limit=3)) == 3
+    assert len(queries) == 1
@@ -0,0 +1,154 @@
+"""Sampled recording of request traces to an append-only JSONL file.
+
+A sampled request collects its LLM calls, tool calls and SQL results as
+plain dicts while it runs. When it finishes, the trace is handed to a
+background writer thread, which serializes it and appends one JSON line to
+the trace file, so requests never wait on disk. Recorded traces can be
+replayed with `python -m benchmarks.replay`.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+import json
+import logging
+import queue
+import random
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+class Trace:
+    """Events recorded while answering one question."""
+
+    def __init__(self, question: str) -> None:
+        self.trace_id = uuid.uuid4().hex
+        self.recorded_at = datetime.now(timezone.utc).isoformat()
+        self.question = question
+        self.started_at = time.perf_counter()
+        self.events: List[Dict[str, Any]] = []
+        self.outcome: Dict[str, Any] = {}
+
+    def add(self, event_type: str, **fields: Any) -> None:
+        """Add an event, timestamped relative to the start of the request."""
+        at_ms = round((time.perf_counter() - self.started_at) * 1000, 1)
+        self.events.append({"type": event_type, "at_ms": at_ms, **fields})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "recorded_at": self.recorded_at,
+            "question": self.question,
+            **self.outcome,
+            "events": self.events,
+        }
+
+
+class TraceRecorder:
+    """Appends finished traces to a JSONL file from a background thread.
+
+    Traces are queued without blocking; when the queue is full, because the
+    disk cannot keep up, further traces are dropped and counted instead.
+    """
+
+    def __init__(self, path: str, sample_rate: float, max_queued: int = 1000) -> None:
+        """Initialize the recorder.
+
+        Args:
+            path: JSONL file traces are appended to
+            sample_rate: Fraction of requests recorded, between 0 and 1
+            max_queued: Most traces waiting to be written
+        """
+        self.path = path
+        self.sample_rate = sample_rate
+        self.recorded = 0
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=max_queued)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def sample(self) -> bool:
+        """Whether to record the next request."""
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def submit(self, trace: Trace) -> None:
+        """Queue a finished trace for writing."""
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(trace.to_dict())
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self) -> None:
+        """Write the queued traces and stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def stats(self) -> Dict[str, int]:
+        """Get the numbers of traces written, dropped and waiting to be written."""
+        return {"recorded": self.recorded, "dropped": self.dropped, "queued": self._queue.qsize()}
+
+    def _ensure_writer(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._write, name="trace-writer", daemon=True)
+                self._thread.start()
+
+    def _write(self) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                trace = self._queue.get()
+                if trace is None:
+                    return
+                try:
+                    f.write(json.dumps(trace, default=str) + "\n")
+                    f.flush()
+                    self.recorded += 1
+                except (OSError, TypeError, ValueError) as e:
+                    logger.warning(f"Could not write trace {trace['trace_id']}: {e}")
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+
+@contextmanager
+def start_trace(recorder: Optional[TraceRecorder], question: str) -> Iterator[Optional[Trace]]:
+    """Record the events within the block into a new trace, if the request is sampled.
+
+    Args:
+        recorder: Recorder deciding whether to sample the request, or None when tracing is off
+        question: Question being answered
+
+    Yields:
+        The new Trace, or None when the request is not recorded
+    """
+    if recorder is None or not recorder.sample():
+        yield None
+        return
+    trace = Trace(question)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+def record_event(event_type: str, **fields: Any) -> None:
+    """Add an event to the trace of the current request, if it is being recorded."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(event_type, **fields)
+
+
+def tracing() -> bool:
+    """Whether the current request is being recorded."""
+    return _current_trace.get() is not None
@@ -1,4 +1,4 @@
-import type { ChartData } from '../types/api';
+import type { ChartData, QueryResult } from '../types/api';
 import { isBarChart, isScatterChart } from '../types/api';
 import { BarChart } from './BarChart';
 import { ScatterChart } from './ScatterChart';
@@ -6,9 +6,10 @@ import { DataTable } from './DataTable';
 
 interface ChartDisplayProps {
   data: ChartData;
+  result?: QueryResult | null;
 }
 
-export function ChartDisplay({ data }: ChartDisplayProps) {
+export function ChartDisplay({ data, result }: ChartDisplayProps) {
   const renderChart = () => {
     if (isBarChart(data)) {
       return <BarChart data={data} />;
@@ -35,7 +36,7 @@ export function ChartDisplay({ data }: ChartDisplayProps) {
       
       <div className="h-[40%] overflow-y-auto">
         <div className="p-4">
-          <DataTable data={data} />
+          <DataTable data={data} result={result} />
         </div>
       </div>
     </div>
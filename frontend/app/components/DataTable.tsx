@@ -1,11 +1,38 @@
-import type { ChartData } from '../types/api';
+import type { ChartData, QueryResult } from '../types/api';
 import { isBarChart, isScatterChart } from '../types/api';
 
 interface DataTableProps {
   data: ChartData;
+  result?: QueryResult | null;
 }
 
-export function DataTable({ data }: DataTableProps) {
+export function DataTable({ data, result }: DataTableProps) {
+  if (result && result.row_count > 0) {
+    const rowIndexes = Array.from({ length: result.row_count }, (_, index) => index);
+    return (
+      <div className="overflow-x-auto">
+        <table className="w-full text-sm border-collapse border border-gray-300 text-gray-800">
+          <thead>
+            <tr className="bg-gray-50">
+              {result.columns.map((column) => (
+                <th key={column} className="border border-gray-300 px-4 py-2 text-left font-semibold">{column}</th>
+              ))}
+            </tr>
+          </thead>
+          <tbody>
+            {rowIndexes.map((rowIndex) => (
+              <tr key={rowIndex} className="hover:bg-gray-50">
+                {result.values.map((column, columnIndex) => (
+                  <td key={columnIndex} className="border border-gray-300 px-4 py-2">{String(column[rowIndex] ?? "")}</td>
+                ))}
+              </tr>
+            ))}
+          </tbody>
+        </table>
+      </div>
+    );
+  }
+  
   if (isBarChart(data)) {
     return (
       <div className="overflow-x-auto">
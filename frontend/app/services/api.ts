@@ -2,7 +2,7 @@
  * API service for Census Data Explorer
  */
 
-import type { QuestionRequest, AgentResponse, ApiError } from "../types/api";
+import type { QuestionRequest, AgentResponse, ApiError, StreamEvent } from "../types/api";
 
 const API_BASE_URL = "http://localhost:8000";
 const IS_MOCK_MODE = import.meta.env.VITE_MOCK_API === 'true';
@@ -96,13 +96,13 @@ export async function askQuestion(question: string): Promise<AgentResponse> {
   const request: QuestionRequest = { question };
 
   console.log("🚀 API Request:", {
-    url: `${API_BASE_URL}/ask`,
+    url: `${API_BASE_URL}/ask?format=columnar`,
     method: "POST",
     body: request,
   });
 
   try {
-    const response = await fetch(`${API_BASE_URL}/ask`, {
+    const response = await fetch(`${API_BASE_URL}/ask?format=columnar`, {
       method: "POST",
       headers: {
         "Content-Type": "application/json",
@@ -138,4 +138,110 @@ export async function askQuestion(question: string): Promise<AgentResponse> {
       0
     );
   }
-}
\ No newline at end of file
+}
+
+/**
+ * Parse a single Server-Sent Events block into a typed stream event.
+ */
+function parseStreamEvent(block: string): StreamEvent | null {
+  let event = "";
+  const dataLines: string[] = [];
+
+  for (const line of block.split("\n")) {
+    if (line.startsWith("event:")) {
+      event = line.slice(6).trim();
+    } else if (line.startsWith("data:")) {
+      dataLines.push(line.slice(5).trim());
+    }
+  }
+
+  if (!event || dataLines.length === 0) {
+    return null;
+  }
+
+  return { event, data: JSON.parse(dataLines.join("\n")) } as StreamEvent;
+}
+
+/**
+ * Ask a question via the streaming endpoint.
+ *
+ * `onEvent` is called for every event as it arrives so the UI can render
+ * tool progress, answer tokens and the chart incrementally. The promise
+ * resolves with the final AgentResponse.
+ */
+export async function askQuestionStream(
+  question: string,
+  onEvent: (event: StreamEvent) => void
+): Promise<AgentResponse> {
+  // Mock mode replays a canned response as a token stream
+  if (IS_MOCK_MODE) {
+    const mockResponse = MOCK_RESPONSES[Math.floor(Math.random() * MOCK_RESPONSES.length)];
+    const result = { ...mockResponse, question };
+
+    for (const word of result.text_answer.split(/(?<= )/)) {
+      await new Promise(resolve => setTimeout(resolve, 30));
+      onEvent({ event: "token", data: { text: word } });
+    }
+    if (result.data) {
+      onEvent({ event: "chart", data: result.data });
+    }
+    onEvent({ event: "response", data: result });
+    return result;
+  }
+
+  const request: QuestionRequest = { question };
+
+  let response: Response;
+  try {
+    response = await fetch(`${API_BASE_URL}/ask/stream`, {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+        Accept: "text/event-stream",
+      },
+      body: JSON.stringify(request),
+    });
+  } catch (error) {
+    console.error("💥 API Stream Failed:", error);
+    throw new CensusApiError(
+      "Unable to connect to the census data service. Please try again later.",
+      0
+    );
+  }
+
+  if (!response.ok || !response.body) {
+    const errorData: ApiError = await response.json();
+    throw new CensusApiError(errorData.detail, response.status);
+  }
+
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = "";
+  let finalResponse: AgentResponse | null = null;
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) {
+      break;
+    }
+
+    buffer += value;
+    let boundary = buffer.indexOf("\n\n");
+    while (boundary >= 0) {
+      const streamEvent = parseStreamEvent(buffer.slice(0, boundary));
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf("\n\n");
+
+      if (streamEvent) {
+        onEvent(streamEvent);
+        if (streamEvent.event === "response") {
+          finalResponse = streamEvent.data;
+        }
+      }
+    }
+  }
+
+  if (!finalResponse) {
+    throw new CensusApiError("The answer stream ended unexpectedly.", 0);
+  }
+  return finalResponse;
+}
@@ -36,14 +36,44 @@ export interface QuestionRequest {
   question: string;
 }
 
+// Raw query result in the columnar format: one value array per column
+export interface QueryResult {
+  columns: string[];
+  values: unknown[][];
+  row_count: number;
+}
+
 export interface AgentResponse {
   text_answer: string;
   data: ChartData | null;
   question: string;
   status: "success" | "error";
   error?: string;
+  path?: "cache" | "template" | "fast_path" | "agent" | null;
+  result?: QueryResult | null;
 }
 
 export interface ApiError {
   detail: string;
-}
\ No newline at end of file
+}
+
+export interface ToolCallEvent {
+  tool: string;
+  tool_input: string;
+}
+
+export interface ToolResultEvent {
+  tool: string;
+  output: string;
+}
+
+export interface TokenEvent {
+  text: string;
+}
+
+export type StreamEvent =
+  | { event: "tool_call"; data: ToolCallEvent }
+  | { event: "tool_result"; data: ToolResultEvent }
+  | { event: "token"; data: TokenEvent }
+  | { event: "chart"; data: ChartData }
+  | { event: "response"; data: AgentResponse };
\ No newline at end of file
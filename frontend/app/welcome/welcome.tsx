@@ -3,7 +3,7 @@ import ReactMarkdown from "react-markdown";
 import { SearchBar } from "../components/SearchBar";
 import { ChartDisplay } from "../components/ChartDisplay";
 import { SuggestedPrompts } from "../components/SuggestedPrompts";
-import type { AgentResponse, ChartData } from "../types/api";
+import type { AgentResponse, ChartData, QueryResult } from "../types/api";
 
 interface Conversation {
   question: string;
@@ -16,6 +16,7 @@ type AnimationStage = 'welcome' | 'complete';
 export function Welcome() {
   const [conversations, setConversations] = useState<Conversation[]>([]);
   const [currentChart, setCurrentChart] = useState<ChartData | null>(null);
+  const [currentResult, setCurrentResult] = useState<QueryResult | null>(null);
   const [hasResults, setHasResults] = useState(false);
   const [animationStage, setAnimationStage] = useState<AnimationStage>('welcome');
   
@@ -62,6 +63,7 @@ export function Welcome() {
       return updated;
     });
     setCurrentChart(response.data);
+    setCurrentResult(response.result ?? null);
   };
 
   // Handle animation sequence - just right panel slide-in
@@ -146,7 +148,7 @@ export function Welcome() {
           }`}>
             {currentChart ? (
               <div className="flex-1 flex flex-col">
-                <ChartDisplay data={currentChart} />
+                <ChartDisplay data={currentChart} result={currentResult} />
               </div>
             ) : null}
           </div>